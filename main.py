@@ -3,8 +3,7 @@ import argparse
 import subprocess
 from pathlib import Path
 
-from mylib.mcp import MCPServer
-from mylib.llm import llm_client
+# 各模式的依赖在分支内按需导入，server 模式不会加载 openai / psycopg2 / streamlit
 
 def main():
     parser = argparse.ArgumentParser(description="Run MCP server or LLM/Agent clients")
@@ -21,15 +20,18 @@ def main():
     parser.add_argument("message", nargs="?", help="可选消息参数", default=None)
     parser.add_argument("--host", help="server host", default=None)
     parser.add_argument("--port", type=int, help="server port", default=None)
+    parser.add_argument("--workers", type=int, help="server worker processes", default=None)
     args = parser.parse_args()
 
     if args.mode == "server":
         print("🚀 启动 MCP Server...")
+        from mylib.mcp import MCPServer
         server = MCPServer()
-        server.run(host=args.host, port=args.port)
+        server.run(host=args.host, port=args.port, workers=args.workers)
         
     elif args.mode == "client":
         print("🚀 启动 LLM Client CLI...")
+        from mylib.llm import llm_client
         llm_client.main()
         
     elif args.mode == "web":
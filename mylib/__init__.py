@@ -1,6 +1,25 @@
-from .config import ConfigLoader
-from .kit import Loutput
-from .lian_orm import Sql
+import importlib
+
+
+# 按需导入: 访问 mylib.Sql 时才加载 ORM (psycopg2)，避免拖慢只需要 MCP Server 的进程启动
+_LAZY_ATTRS = {
+    "ConfigLoader": ".config",
+    "Loutput": ".kit",
+    "Sql": ".lian_orm",
+}
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_ATTRS))
 
 
 __all__ = [
@@ -1,5 +1,6 @@
 from .rag_agent import RAGAgent
 from .planner_agent import PlannerAgent
 from .executor_agent import ExecutorAgent
+from .memory_writer import MemoryWriter, get_memory_writer
 
-__all__ = ["RAGAgent", "PlannerAgent", "ExecutorAgent"]
+__all__ = ["RAGAgent", "PlannerAgent", "ExecutorAgent", "MemoryWriter", "get_memory_writer"]
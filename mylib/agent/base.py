@@ -1,14 +1,18 @@
-import httpx
-import asyncio
-from typing import List, Dict, Optional
+from typing import AsyncIterator, Callable, List, Dict, Optional
 from datetime import datetime
 
 from mylib.config import ConfigLoader
-from mylib.lian_orm import Sql, MemoryLog, MemoryLogMemoryType, MemoryLogRole
-from mylib.kit.Lfind.embedding import get_embedding
+from mylib.lian_orm import Sql, MemoryLog, MemoryLogMemoryType, MemoryLogRole, get_sql
 from mylib.kit.Loutput import Loutput
+from mylib.kit.Ltransport import get_llm_transport
 from mylib.kernel.Lenum import LLMContextType
 
+from .memory_writer import get_memory_writer
+
+
+# 流式输出回调: 每收到一段增量文本调用一次
+TokenHandler = Callable[[str], None]
+
 
 CATGIRL_PROMPT = """
 【角色设定】
@@ -79,7 +83,7 @@ class BaseAgent:
     def _init_db(self):
         """初始化数据库连接"""
         try:
-            self.sql = Sql()
+            self.sql = get_sql()
         except Exception as e:
             print(f"[{self.name}] Warning: Database initialization failed: {e}")
             self.sql = None
@@ -100,27 +104,69 @@ class BaseAgent:
             "stream": False
         }
         
-        max_retries = 3
-        retry_delay = 2
+        try:
+            return await get_llm_transport().apost_json(
+                f"{self.base_url}/chat/completions",
+                payload,
+                headers=headers,
+                timeout=60.0,
+                max_retries=3,
+                backoff_base=2.0,
+                label=self.name,
+            )
+        except Exception as e:
+            print(f"[{self.name}] LLM Call Error: {e}")
+            return {"choices": [{"message": {"content": f"Error: {str(e)}"}}]}
+
+    async def _stream_llm(self, messages: List[Dict], temperature: float = 0.7) -> AsyncIterator[str]:
+        """
+        流式调用 LLM API，逐段产出增量文本
+
+        只在收到第一个 token 之前重试，出错时直接抛出
+        """
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}"
+        }
         
-        for attempt in range(max_retries):
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                try:
-                    response = await client.post(
-                        f"{self.base_url}/chat/completions",
-                        headers=headers,
-                        json=payload
-                    )
-                    response.raise_for_status()
-                    return response.json()
-                except Exception as e:
-                    if attempt < max_retries - 1:
-                        print(f"[{self.name}] LLM Call failed (Attempt {attempt+1}/{max_retries}): {e}. Retrying in {retry_delay}s...")
-                        await asyncio.sleep(retry_delay)
-                        retry_delay *= 2
-                    else:
-                        print(f"[{self.name}] LLM Call Error after {max_retries} attempts: {e}")
-                        return {"choices": [{"message": {"content": f"Error: {str(e)}"}}]}
+        payload = {
+            "model": self.model_name,
+            "messages": messages,
+            "temperature": temperature,
+            "stream": True
+        }
+
+        async for event in get_llm_transport().astream_json(
+            f"{self.base_url}/chat/completions",
+            payload,
+            headers=headers,
+            timeout=60.0,
+            max_retries=3,
+            backoff_base=2.0,
+            label=self.name,
+        ):
+            choices = event.get("choices") or []
+            if not choices:
+                continue
+            delta = choices[0].get("delta", {}).get("content")
+            if delta:
+                yield delta
+
+    async def _call_llm_stream(self, messages: List[Dict], on_token: Optional[TokenHandler] = None, temperature: float = 0.7) -> Dict:
+        """
+        流式调用 LLM API，每收到一段文本回调 on_token，结束后返回与 _call_llm 相同结构的结果
+        """
+        chunks: List[str] = []
+        try:
+            async for delta in self._stream_llm(messages, temperature=temperature):
+                chunks.append(delta)
+                if on_token:
+                    on_token(delta)
+        except Exception as e:
+            print(f"[{self.name}] LLM Stream Error: {e}")
+            if not chunks:
+                return {"choices": [{"message": {"content": f"Error: {str(e)}"}}]}
+        return {"choices": [{"message": {"content": "".join(chunks)}}]}
 
     async def a_chat(self, message: str, history: List[Dict], memory_type: MemoryLogMemoryType = MemoryLogMemoryType.CONVERSATION, role: str = "user") -> str:
         """
@@ -160,26 +206,16 @@ class BaseAgent:
         return messages
 
     def save_memory(self, role: MemoryLogRole, content: str, memory_type: MemoryLogMemoryType = MemoryLogMemoryType.CONVERSATION):
-        """保存记忆到数据库 (自动计算 Embedding)"""
+        """保存记忆到数据库 (入队后立即返回，由 MemoryWriter 在后台批量计算 Embedding 并写入)"""
         if self.sql and self.sql.memory_log:
             try:
-                # 计算 Embedding
-                embedding = None
-                try:
-                    # 只有内容不为空时才计算
-                    if content and content.strip():
-                        embedding = get_embedding(content)
-                except Exception as e:
-                    print(f"[{self.name}] Failed to generate embedding: {e}")
-
                 log = MemoryLog(
                     role=role,
                     content=content,
-                    embedding=embedding,
                     memory_type=memory_type,
                     created_at=datetime.now()
                 )
-                self.sql.memory_log.create(log)
+                get_memory_writer().submit(log)
             except Exception as e:
                 print(f"[{self.name}] Failed to save memory: {e}")
 
@@ -187,10 +223,9 @@ class BaseAgent:
         """获取最近记忆"""
         if self.sql and self.sql.memory_log:
             try:
-                logs = self.sql.memory_log.read()
-                # 排序并取最近的
-                logs.sort(key=lambda x: x.created_at, reverse=True)
-                return [log.model_dump() for log in logs[:limit]]
+                # 排序与截断在数据库中完成, 不再读取整张表
+                logs = self.sql.memory_log.query().order_by("-created_at", "-id").limit(limit).all()
+                return [log.model_dump() for log in logs]
             except Exception as e:
                 print(f"[{self.name}] Failed to get memory: {e}")
                 return []
@@ -1,7 +1,8 @@
 import json
 import asyncio
 from typing import List, Dict, Any, Optional
-from .base import BaseAgent
+from .base import BaseAgent, TokenHandler
+from .tool_stream import ToolCallDetector
 from mylib.lian_orm.models import ToolCall, ToolCallsStatus, TaskStepsStatus, MemoryLogRole, MemoryLogMemoryType
 from mylib.kit.Loutput import Loutput, FontColor8
 
@@ -12,12 +13,17 @@ class ExecutorAgent(BaseAgent):
     负责执行具体指令，可以调用工具
     """
     
+    # 单个工具结果写入上下文的最大字符数 (超过时只保留预览)
+    MAX_TOOL_RESULT_CHARS = 10000
+    
     def __init__(self, name: str = "Executor_Ran", tools: List[Dict] = None):
         super().__init__(name)
         self.lo = Loutput()
         self.tools = tools or []
         self.system_prompt = self._build_system_prompt()
         self.max_rounds = 100
+        # 流式调用 LLM，边生成边检测工具调用
+        self.stream = True
 
     def _build_system_prompt(self) -> str:
         tools_json = json.dumps(self.tools, indent=2, ensure_ascii=False)
@@ -63,14 +69,17 @@ TOOL_CALL_END
 5. **工具使用建议**: 
     - 如果需要从网页获取信息，优先使用支持提取特定元素或标签的工具（如 `web_extract_elements`），而不是直接抓取整个页面。
     - 避免一次性请求大量数据，防止上下文溢出。
+    - 工具结果中出现 `"truncated": true` 与 `handle` 时，说明结果过大已保存在服务端，`preview` 只是预览；
+      需要其余部分时调用 `tool_result_slice`（传入 handle，用 path 选择字段、start_line / end_line 指定行号），按需分页读取。
 """
 
-    async def a_chat(self, message: str, history: List[Dict], tool_handler: Optional[callable] = None, task_id: int = None, step_id: int = None) -> str:
+    async def a_chat(self, message: str, history: List[Dict], tool_handler: Optional[callable] = None, task_id: int = None, step_id: int = None, on_token: Optional[TokenHandler] = None) -> str:
         """
         执行任务，支持工具调用循环
         :param tool_handler: 一个异步函数，接收 (tool_name, args) 返回 result
         :param task_id: 关联的任务ID
         :param step_id: 关联的步骤ID
+        :param on_token: 流式输出回调，每收到一段 LLM 输出调用一次
         """
         # 更新步骤状态为运行中
         if step_id and self.sql and self.sql.task_steps:
@@ -86,71 +95,22 @@ TOOL_CALL_END
         final_answer = "Error: Maximum tool call rounds reached."
         
         for _ in range(self.max_rounds):
-            response_data = await self._call_llm(context)
-            llm_content = response_data["choices"][0]["message"]["content"]
+            llm_content, tool_call_data, pending = await self._generate(context, tool_handler, task_id, step_id, on_token)
             
             # 检查是否是工具调用
             if "TOOL_CALL:" in llm_content:
                 try:
-                    json_str = llm_content.split("TOOL_CALL:", 1)[1].strip()
-                    tool_call_data = json.loads(json_str)
+                    if tool_call_data is None:
+                        json_str = llm_content.split("TOOL_CALL:", 1)[1].strip()
+                        tool_call_data = json.loads(json_str)
                     
                     context.append({"role": "assistant", "content": llm_content})
                     
-                    tool_calls = tool_call_data.get("tool_calls", [])
-                    tool_results = []
-                    
-                    for call in tool_calls:
-                        t_name = call["name"]
-                        t_args = call["arguments"]
-                        
-                        # 记录工具调用 (Before)
-                        tc_record = None
-                        if task_id and step_id and self.sql and self.sql.tool_calls:
-                            try:
-                                tc = ToolCall(
-                                    task_id=task_id,
-                                    step_id=step_id,
-                                    tool_name=t_name,
-                                    arguments=t_args,
-                                    status=ToolCallsStatus.SUCCESS
-                                )
-                                tc_record = self.sql.tool_calls.create(tc)
-                            except Exception as e:
-                                print(f"[{self.name}] Failed to create tool call record: {e}")
-
-                        if tool_handler:
-                            result = await tool_handler(t_name, t_args)
-                        else:
-                            result = f"Error: No tool handler provided for {t_name}"
-                        
-                        # --- 结果截断逻辑 ---
-                        result_str = json.dumps(result, ensure_ascii=False)
-                        max_len = 10000
-                        if len(result_str) > max_len:
-                            truncated_result = result_str[:max_len] + f"... (Truncated, total length: {len(result_str)})"
-                            try:
-                                result = json.loads(truncated_result)
-                            except:
-                                result = truncated_result
-                            
-                            self.lo.lput(f"[{self.name}] Tool output truncated ({len(result_str)} -> {max_len})", font_color=FontColor8.YELLOW)
-                        # -------------------
-
-                        # 更新工具调用结果 (After)
-                        if tc_record and self.sql and self.sql.tool_calls:
-                            try:
-                                # 这里假设 result 是 dict 或 str，存入 response
-                                # ToolCall.response 是 Dict[str, Any]
-                                resp_dict = {"result": result} if not isinstance(result, dict) else result
-                                self.sql.tool_calls.update(tc_record.id, response=resp_dict)
-                            except Exception as e:
-                                print(f"[{self.name}] Failed to update tool call record: {e}")
-
-                        tool_results.append({
-                            "name": t_name,
-                            "result": result
-                        })
+                    if pending is not None:
+                        # 流式阶段已提前开始执行
+                        tool_results = await pending
+                    else:
+                        tool_results = await self._run_tool_calls(tool_call_data.get("tool_calls", []), tool_handler, task_id, step_id)
                     
                     result_msg = f"Tool Results: {json.dumps(tool_results, ensure_ascii=False)}"
                     # 工具执行结果，role 设为 tool
@@ -158,6 +118,8 @@ TOOL_CALL_END
                     continue
                     
                 except Exception as e:
+                    if pending is not None and not pending.done():
+                        pending.cancel()
                     final_answer = f"Error parsing tool call: {e}\nContent: {llm_content}"
                     break
             
@@ -182,3 +144,92 @@ TOOL_CALL_END
                 print(f"[{self.name}] Failed to update step status to DONE: {e}")
                 
         return final_answer
+
+    async def _generate(self, context: List[Dict], tool_handler: Optional[callable], task_id: int, step_id: int, on_token: Optional[TokenHandler]):
+        """
+        调用一轮 LLM
+
+        流式模式下由 ToolCallDetector 增量检测 TOOL_CALL，JSON 一闭合就开始执行工具，
+        与模型剩余的生成过程重叠。
+
+        Returns:
+            (完整输出, 已解析的工具调用或 None, 已启动的工具执行 Task 或 None)
+        """
+        if not self.stream:
+            response_data = await self._call_llm(context)
+            return response_data["choices"][0]["message"]["content"], None, None
+
+        detector = ToolCallDetector()
+        pending: Optional[asyncio.Task] = None
+
+        def handle_token(delta: str):
+            nonlocal pending
+            tool_call = detector.feed(delta)
+            if pending is None and isinstance(tool_call, dict):
+                self.lo.lput(f"[{self.name}] Tool call detected while streaming, dispatching early.", font_color=FontColor8.CYAN)
+                pending = asyncio.ensure_future(
+                    self._run_tool_calls(tool_call.get("tool_calls", []), tool_handler, task_id, step_id)
+                )
+            if on_token:
+                on_token(delta)
+
+        response_data = await self._call_llm_stream(context, on_token=handle_token)
+        llm_content = response_data["choices"][0]["message"]["content"]
+        return llm_content, detector.tool_call, pending
+
+    async def _run_tool_calls(self, tool_calls: List[Dict], tool_handler: Optional[callable], task_id: int, step_id: int) -> List[Dict[str, Any]]:
+        """
+        按顺序执行一组工具调用
+
+        调用记录 (参数与结果) 在本组执行完后用一条多行 INSERT 一次写入、一次提交,
+        而不是每个调用执行前插入、执行后更新各提交一次
+        """
+        tool_results = []
+        records: List[ToolCall] = []
+        record = bool(task_id and step_id and self.sql and self.sql.tool_calls)
+        try:
+            for call in tool_calls:
+                t_name = call["name"]
+                t_args = call["arguments"]
+
+                if tool_handler:
+                    result = await tool_handler(t_name, t_args)
+                else:
+                    result = f"Error: No tool handler provided for {t_name}"
+            
+                # --- 结果截断逻辑 ---
+                # MCP Server 已将大结果转为句柄 + 预览 (tool_result_slice 分页读取), 这里只兜底
+                result_str = json.dumps(result, ensure_ascii=False)
+                max_len = self.MAX_TOOL_RESULT_CHARS
+                if len(result_str) > max_len:
+                    result = {
+                        "truncated": True,
+                        "total_length": len(result_str),
+                        "preview": result_str[:max_len],
+                    }
+                    self.lo.lput(f"[{self.name}] Tool output truncated ({len(result_str)} -> {max_len})", font_color=FontColor8.YELLOW)
+                # -------------------
+
+                if record:
+                    # ToolCall.response 是 Dict[str, Any], 非 dict 结果包一层
+                    records.append(ToolCall(
+                        task_id=task_id,
+                        step_id=step_id,
+                        tool_name=t_name,
+                        arguments=t_args,
+                        response={"result": result} if not isinstance(result, dict) else result,
+                        status=ToolCallsStatus.SUCCESS
+                    ))
+
+                tool_results.append({
+                    "name": t_name,
+                    "result": result
+                })
+        finally:
+            # 记录工具调用 (整组一次提交; 中途出错时已完成的调用同样写入)
+            if records:
+                try:
+                    self.sql.tool_calls.create_many(records)
+                except Exception as e:
+                    print(f"[{self.name}] Failed to create tool call records: {e}")
+        return tool_results
@@ -0,0 +1,212 @@
+import queue
+import time
+import atexit
+import threading
+from typing import List, Optional
+
+from mylib.lian_orm import Sql, MemoryLog, get_sql
+from mylib.kit.Lfind import get_embeddings
+
+
+_STOP = object()
+
+
+class MemoryWriter:
+    """
+    异步记忆写入器 (Write-Behind)
+    save_memory 只负责入队，后台线程批量计算 Embedding 并批量写入 memory_log，
+    使记忆持久化不再占用请求路径的延迟。
+    """
+
+    def __init__(self,
+                    sql: Optional[Sql] = None,
+                    max_queue_size: int = 1024,
+                    batch_size: int = 32,
+                    flush_interval: float = 0.5,
+                    put_timeout: float = 5.0):
+        """
+        Args:
+            sql: 写入使用的 Sql 实例，为空时在后台线程中按需获取共享实例
+            max_queue_size: 队列上限，队列满时 submit 会阻塞 (背压)
+            batch_size: 单批最多写入的记录数
+            flush_interval: 凑批等待的最长时间 (秒)
+            put_timeout: 队列满时 submit 的最长阻塞时间 (秒)，超时则丢弃该条记录
+        """
+        self._sql = sql
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+        # 进程退出前把队列里的记忆刷入数据库
+        atexit.register(self.close)
+
+    def _ensure_started(self):
+        """按需启动后台写入线程"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="MemoryWriter", daemon=True)
+                self._thread.start()
+
+    def submit(self, log: MemoryLog) -> bool:
+        """
+        提交一条记忆，立即返回
+
+        Returns:
+            是否成功入队 (写入器已关闭或背压超时时返回 False)
+        """
+        if self._closed:
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put(log, timeout=self.put_timeout)
+            return True
+        except queue.Full:
+            print(f"[MemoryWriter] Queue full, dropped memory: {log.content[:30]}")
+            return False
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待当前队列中的记忆全部写入
+
+        Returns:
+            是否在超时前写完
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout: Optional[float] = 10.0):
+        """
+        停止接收新记忆，刷完队列后关闭后台线程
+
+        最多等待 timeout 秒 (入队停止信号与等待线程退出共用): 后台线程卡在数据库或 Embedding 请求上、
+        队列一直是满的时，丢弃尚未写入的记忆为停止信号腾出位置，不让进程退出 (atexit) 卡住
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is None or not self._thread.is_alive():
+            return
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            dropped = 0
+            while True:
+                dropped += self._discard_pending()
+                try:
+                    self._queue.put_nowait(_STOP)
+                    break
+                except queue.Full:
+                    # 正在进行中的 submit 又放入了记忆
+                    continue
+            print(f"[MemoryWriter] Queue still full on close, dropped {dropped} memories.")
+
+        self._thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        if self._thread.is_alive():
+            # pending 中包含停止信号本身
+            print(f"[MemoryWriter] Writer thread did not finish in {timeout}s, {self.pending - 1} memories not written.")
+
+    def _discard_pending(self) -> int:
+        """丢弃队列中尚未取出的记忆, 返回丢弃的条数"""
+        dropped = 0
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                return dropped
+            self._queue.task_done()
+            dropped += 1
+
+    @property
+    def pending(self) -> int:
+        """尚未写入的记忆条数"""
+        return self._queue.unfinished_tasks
+
+    # === 后台线程 ===
+    def _run(self):
+        while True:
+            batch, stop = self._drain()
+            if batch:
+                try:
+                    self._write_batch(batch)
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+            if stop:
+                self._queue.task_done()
+                return
+
+    def _drain(self):
+        """阻塞等待第一条记忆，然后在 flush_interval 内尽量凑满一批"""
+        batch: List[MemoryLog] = []
+        item = self._queue.get()
+        if item is _STOP:
+            return batch, True
+        batch.append(item)
+
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _get_repo(self):
+        if self._sql is None:
+            self._sql = get_sql()
+        return self._sql.memory_log
+
+    def _write_batch(self, batch: List[MemoryLog]):
+        """批量计算 Embedding 并批量写入"""
+        pending = [log for log in batch if log.embedding is None and log.content and log.content.strip()]
+        if pending:
+            try:
+                embeddings = get_embeddings([log.content for log in pending])
+                for log, embedding in zip(pending, embeddings):
+                    log.embedding = embedding
+            except Exception as e:
+                print(f"[MemoryWriter] Failed to generate embeddings: {e}")
+
+        try:
+            repo = self._get_repo()
+            if repo is None:
+                print(f"[MemoryWriter] Memory log not initialized, dropped {len(batch)} memories.")
+                return
+            repo.create_many(batch)
+        except Exception as e:
+            print(f"[MemoryWriter] Failed to save {len(batch)} memories: {e}")
+
+
+# 进程级单例
+_writer: Optional[MemoryWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_memory_writer() -> MemoryWriter:
+    """获取记忆写入器单例"""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = MemoryWriter()
+    return _writer
@@ -27,11 +27,14 @@ class PlannerAgent(BaseAgent):
 3. 如果信息不足，请在计划的第一步尝试使用工具获取信息，或者直接生成一个步骤说明"由于缺少XX信息，无法继续执行"。
 4. 步骤应当具体、明确，可以直接映射到工具调用或代码执行。
 5. 绝对不要输出任何闲聊、问候或解释性文字。只输出 JSON。
+6. 步骤会按依赖关系并行执行。互不依赖的步骤（例如分别查询不同的资料）depends_on 必须为空数组，
+   只有确实需要用到前置步骤结果的步骤才填写依赖，前置步骤的结果会自动提供给它。
 
 输出必须是严格的 JSON 格式，包含一个 steps 数组，每个 step 包含：
 - step_index: 步骤序号
 - instruction: 具体指令
 - expected_output: 预期输出
+- depends_on: 依赖的步骤序号数组（无依赖时为 []）
 
 示例格式：
 {
@@ -39,12 +42,20 @@ class PlannerAgent(BaseAgent):
         {
             "step_index": 1,
             "instruction": "搜索关于 Python 3.13 的新特性",
-            "expected_output": "Python 3.13 特性列表"
+            "expected_output": "Python 3.13 特性列表",
+            "depends_on": []
         },
         {
             "step_index": 2,
-            "instruction": "总结这些特性",
-            "expected_output": "特性总结文本"
+            "instruction": "搜索关于 Python 3.12 的新特性",
+            "expected_output": "Python 3.12 特性列表",
+            "depends_on": []
+        },
+        {
+            "step_index": 3,
+            "instruction": "对比并总结这两个版本的特性",
+            "expected_output": "特性对比总结文本",
+            "depends_on": [1, 2]
         }
     ]
 }
@@ -84,18 +95,24 @@ class PlannerAgent(BaseAgent):
                     description=message, 
                     status=TasksStatus.PENDING
                 )
-                created_task = self.sql.tasks.create(task)
+                # 任务与步骤在同一事务中写入，失败时不会留下没有步骤的任务
+                with self.sql.transaction() as uow:
+                    created_task = uow.tasks.create(task)
+
+                    # 2. 创建步骤 (一条多行 INSERT)
+                    steps = [
+                        TaskStep(
+                            task_id=created_task.id,
+                            step_index=step.get('step_index', 0),
+                            instruction=step.get('instruction', ''),
+                            status=TaskStepsStatus.PENDING
+                        )
+                        for step in result['steps']
+                    ]
+                    created_steps = uow.task_steps.create_many(steps) if steps else []
+
                 result['task_id'] = created_task.id
-                
-                # 2. 创建步骤
-                for step in result['steps']:
-                    ts = TaskStep(
-                        task_id=created_task.id,
-                        step_index=step.get('step_index', 0),
-                        instruction=step.get('instruction', ''),
-                        status=TaskStepsStatus.PENDING
-                    )
-                    created_step = self.sql.task_steps.create(ts)
+                for step, created_step in zip(result['steps'], created_steps):
                     step['step_id'] = created_step.id # 回填 ID 供执行器使用
                 
                 self.lo.lput(f"[{self.name}] Plan saved to DB (Task ID: {created_task.id}).", font_color=FontColor8.GREEN)
@@ -1,5 +1,5 @@
-from typing import List, Dict
-from .base import BaseAgent, CATGIRL_PROMPT
+from typing import List, Dict, Optional
+from .base import BaseAgent, CATGIRL_PROMPT, TokenHandler
 from mylib.kit.Loutput import Loutput, FontColor8
 from mylib.lian_orm import MemoryLogRole, MemoryLogMemoryType
 
@@ -38,9 +38,10 @@ class SummaryAgent(BaseAgent):
 5. **错误处理**: 如果执行中有错误，用傲娇的方式道歉或推卸给魔法失控。
 """
 
-    async def a_chat(self, message: str, history: List[Dict], rag_context: str = "", plan_context: str = "", execution_results: str = "") -> str:
+    async def a_chat(self, message: str, history: List[Dict], rag_context: str = "", plan_context: str = "", execution_results: str = "", on_token: Optional[TokenHandler] = None) -> str:
         """
         生成最终总结
+        :param on_token: 流式输出回调，传入时边生成边推送到界面
         """
         self.lo.lput(f"[{self.name}] Generating summary...", font_color=FontColor8.MAGENTA)
         
@@ -69,7 +70,10 @@ class SummaryAgent(BaseAgent):
         messages.append({"role": "user", "content": message})
         
         try:
-            response = await self._call_llm(messages)
+            if on_token:
+                response = await self._call_llm_stream(messages, on_token=on_token)
+            else:
+                response = await self._call_llm(messages)
             content = response["choices"][0]["message"]["content"]
             self.lo.lput(f"[{self.name}] Summary generated.", font_color=FontColor8.MAGENTA)
             
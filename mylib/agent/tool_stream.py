@@ -0,0 +1,104 @@
+import json
+from typing import Any, Dict, Optional
+
+
+TOOL_CALL_MARKER = "TOOL_CALL:"
+
+
+class ToolCallDetector:
+    """
+    流式工具调用检测器
+
+    逐块接收 LLM 输出，在 `TOOL_CALL:` 后的 JSON 对象闭合的瞬间解析出工具调用，
+    使 Executor 可以在模型仍在生成后续文本时就开始执行工具。
+
+    JSON 边界通过括号深度判断，会跳过字符串内的括号与转义字符。
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.tool_call: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+
+        self._marker_pos = -1   # TOOL_CALL: 在 text 中的位置
+        self._json_start = -1   # JSON 对象 '{' 的位置
+        self._scan_pos = 0      # 下一个待扫描的字符
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def found(self) -> bool:
+        """是否已出现 TOOL_CALL: 标记"""
+        return self._marker_pos >= 0
+
+    @property
+    def done(self) -> bool:
+        """工具调用 JSON 是否已闭合 (解析成功或失败)"""
+        return self.tool_call is not None or self.error is not None
+
+    def feed(self, chunk: str) -> Optional[Dict[str, Any]]:
+        """
+        追加一段输出
+
+        Returns:
+            JSON 恰好在本段内闭合时返回解析结果，其余情况返回 None
+        """
+        self.text += chunk
+        if self.done:
+            return None
+
+        if self._marker_pos < 0:
+            # 标记可能被拆在两段之间，从上次末尾往前回退一个标记长度再找
+            search_from = max(0, len(self.text) - len(chunk) - len(TOOL_CALL_MARKER))
+            pos = self.text.find(TOOL_CALL_MARKER, search_from)
+            if pos < 0:
+                return None
+            self._marker_pos = pos
+            self._scan_pos = pos + len(TOOL_CALL_MARKER)
+
+        return self._scan()
+
+    def _scan(self) -> Optional[Dict[str, Any]]:
+        text = self.text
+        i = self._scan_pos
+        while i < len(text):
+            ch = text[i]
+            i += 1
+            if self._json_start < 0:
+                if ch == "{":
+                    self._json_start = i - 1
+                    self._depth = 1
+                elif not ch.isspace():
+                    self._scan_pos = i
+                    self.error = f"Expected '{{' after {TOOL_CALL_MARKER}, got {ch!r}"
+                    return None
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._scan_pos = i
+                    return self._parse(text[self._json_start:i])
+
+        self._scan_pos = i
+        return None
+
+    def _parse(self, json_str: str) -> Optional[Dict[str, Any]]:
+        try:
+            self.tool_call = json.loads(json_str)
+        except json.JSONDecodeError as e:
+            self.error = str(e)
+            return None
+        return self.tool_call
@@ -2,15 +2,17 @@
 import streamlit as st
 import asyncio
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 import time
 
 from mylib.agent.rag_agent import RAGAgent
 from mylib.agent.planner_agent import PlannerAgent
 from mylib.agent.executor_agent import ExecutorAgent
 from mylib.agent.summary_agent import SummaryAgent
-from mylib.mcp.tools import get_tools_list, call_tool
+from mylib.mcp.transport import tool_transport_from_config
+from mylib.kit.Ltransport import get_llm_transport
 from mylib.lian_orm.models import TasksStatus
+from mylib.core.pipeline import DagExecutor, PipelineEvent
 
 # --- Configuration & Setup ---
 st.set_page_config(
@@ -213,7 +215,6 @@ def get_custom_css():
 
 st.markdown(get_custom_css(), unsafe_allow_html=True)
 
-import requests
 from mylib.config import ConfigLoader
 
 # --- Helper Functions ---
@@ -221,48 +222,57 @@ from mylib.config import ConfigLoader
 # 加载配置以获取 MCP Server 地址
 # 指向 ../llm 目录以加载 llm_config.toml
 config = ConfigLoader(config_path="../llm")
-MCP_HOST = str(config.LLM_CONFIG.MCP_SERVER_HOST)
-MCP_PORT = str(config.LLM_CONFIG.MCP_SERVER_PORT)
-MCP_SERVER_URL = f"http://{MCP_HOST}:{MCP_PORT}"
 
 # Avatar Path
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 USER_AVATAR_PATH = os.path.join(CURRENT_DIR, "avatar.jpg")
 
-def get_remote_tools_list() -> List[Dict]:
-    """从 MCP Server 获取工具列表"""
+# 执行阶段最多同时运行的步骤数
+MAX_PARALLEL_STEPS = 4
+
+# 流式输出刷新界面的最小间隔 (秒)
+STREAM_RENDER_INTERVAL = 0.05
+
+# 单次工具调用的截止时间 (秒), 通过 X-Tool-Timeout 传给 MCP Server, 服务端先于客户端超时
+TOOL_CALL_TIMEOUT = 60
+
+# 工具调用传输层, 由 [LLM_CONFIG] MCP_TRANSPORT 选择 (http / uds / inprocess)
+TOOL_TRANSPORT = tool_transport_from_config(config.LLM_CONFIG, timeout=TOOL_CALL_TIMEOUT)
+
+async def fetch_remote_tools() -> Tuple[List[Dict], Optional[str]]:
+    """通过传输层获取工具列表"""
     try:
-        response = requests.get(f"{MCP_SERVER_URL}/tools", timeout=5)
-        if response.status_code == 200:
-            return response.json()["tools"]
-        else:
-            st.error(f"Failed to fetch tools from MCP Server: {response.status_code}")
-            return []
+        return await TOOL_TRANSPORT.list_tools(), None
     except Exception as e:
-        st.error(f"Connection to MCP Server failed: {e}")
-        return []
+        return [], f"Failed to fetch tools from MCP Server ({TOOL_TRANSPORT.kind}): {e}"
 
 async def tool_handler_wrapper(name: str, args: Dict) -> Any:
-    """包装 MCP 工具调用 (通过 HTTP 请求 MCP Server)"""
+    """包装 MCP 工具调用 (经由 TOOL_TRANSPORT, 返回 ToolResponse 字典)"""
     try:
-        # 使用 run_in_executor 避免阻塞异步循环
-        loop = asyncio.get_running_loop()
-        
-        def _call_remote():
-            response = requests.post(
-                f"{MCP_SERVER_URL}/tools/{name}/call",
-                json=args,
-                timeout=60
-            )
-            if response.status_code == 200:
-                return response.json()
-            else:
-                return {"error": f"HTTP Error {response.status_code}: {response.text}"}
-
-        return await loop.run_in_executor(None, _call_remote)
+        return await TOOL_TRANSPORT.call(name, args, timeout=TOOL_CALL_TIMEOUT)
     except Exception as e:
         return f"Tool Execution Error: {str(e)}"
 
+class LiveText:
+    """将 LLM 流式输出节流后渲染到 Streamlit 占位符"""
+
+    def __init__(self, placeholder, prefix: str = "", interval: float = STREAM_RENDER_INTERVAL):
+        self.placeholder = placeholder
+        self.prefix = prefix
+        self.interval = interval
+        self.text = ""
+        self._last_render = 0.0
+
+    def __call__(self, delta: str):
+        self.text += delta
+        now = time.monotonic()
+        if now - self._last_render >= self.interval:
+            self._last_render = now
+            self.render(cursor=True)
+
+    def render(self, cursor: bool = False):
+        self.placeholder.markdown(self.prefix + self.text + ("▌" if cursor else ""))
+
 def get_avatar(agent_name: str) -> str:
     """根据 Agent 名称返回头像"""
     if "RAG" in agent_name:
@@ -295,6 +305,13 @@ def get_badge_html(agent_name: str) -> str:
 
 # --- Main Logic ---
 
+async def run_agent_flow_once(user_input: str, status_placeholders: Dict):
+    """运行一轮流程; 每轮使用新的事件循环, 结束时关闭该循环上的工具连接与 LLM 连接"""
+    try:
+        await run_agent_flow(user_input, status_placeholders)
+    finally:
+        await asyncio.gather(TOOL_TRANSPORT.aclose(), get_llm_transport().aclose(), return_exceptions=True)
+
 async def run_agent_flow(user_input: str, status_placeholders: Dict):
     """执行多智能体协作流程"""
     
@@ -303,12 +320,8 @@ async def run_agent_flow(user_input: str, status_placeholders: Dict):
     planner_agent = PlannerAgent()
     summary_agent = SummaryAgent()
     
-    # 获取远程工具列表
-    tools = get_remote_tools_list()
-    if not tools:
-        st.warning("⚠️ 未检测到可用工具，请检查 MCP Server 是否启动。")
-        
-    executor_agent = ExecutorAgent(tools=tools)
+    # 获取工具列表 (与 RAG 阶段并发)
+    tools_future = asyncio.ensure_future(fetch_remote_tools())
     
     history = st.session_state.chat_history
     
@@ -338,7 +351,10 @@ async def run_agent_flow(user_input: str, status_placeholders: Dict):
         
         if isinstance(plan_result, dict) and "steps" in plan_result:
             steps = plan_result["steps"]
-            content = f"已生成计划，共 {len(steps)} 步:\n" + "\n".join([f"{s['step_index']}. {s['instruction']}" for s in steps])
+            content = f"已生成计划，共 {len(steps)} 步:\n" + "\n".join([
+                f"{s['step_index']}. {s['instruction']}" + (f" (依赖: {', '.join(str(d) for d in s['depends_on'])})" if s.get('depends_on') else "")
+                for s in steps
+            ])
         else:
             steps = []
             content = f"规划失败或直接回答: {plan_result}"
@@ -352,35 +368,79 @@ async def run_agent_flow(user_input: str, status_placeholders: Dict):
     status_placeholders["Planner"].success("🟢 星盘占卜师 (Planner)")
     status_placeholders["Executor"].info("🔵 魔力执行官 (Executor)")
 
+    tools, tools_error = await tools_future
+    if tools_error:
+        st.error(tools_error)
+    if not tools:
+        st.warning("⚠️ 未检测到可用工具，请检查 MCP Server 是否启动。")
+        
+    executor_agent = ExecutorAgent(tools=tools)
+
     # --- 执行阶段 ---
     execution_results_text = ""
     if steps:
         progress_bar = st.progress(0)
         status_text = st.empty()
-        
-        for i, step in enumerate(steps):
-            status_text.markdown(f"<span style='color: #E0E0E0;'>⚡ 正在施法: 步骤 {step['step_index']}/{len(steps)} - {step['instruction'][:20]}...</span>", unsafe_allow_html=True)
-            
+        live_area = st.container()
+        running: Dict[int, str] = {}
+        finished = 0
+
+        def on_event(event: PipelineEvent):
+            """将流水线进度事件推送到界面"""
+            nonlocal finished
+            if event.kind == "start":
+                running[event.step_index] = event.step['instruction'][:20]
+            else:
+                running.pop(event.step_index, None)
+                finished += 1
+                progress_bar.progress(finished / len(steps))
+                if event.kind == "skipped":
+                    result_text = f"步骤 {event.step_index} 已跳过: 依赖的步骤执行失败"
+                else:
+                    result_text = f"步骤 {event.step_index} 结果: {event.result}"
+                st.session_state.messages.append({
+                    "role": "assistant", 
+                    "agent": "Executor_Expert", 
+                    "content": result_text
+                })
+
+            if running:
+                spells = "、".join(f"步骤 {i} - {text}..." for i, text in running.items())
+                status_text.markdown(f"<span style='color: #E0E0E0;'>⚡ 正在施法 ({finished}/{len(steps)}): {spells}</span>", unsafe_allow_html=True)
+
+        async def run_step(step: Dict, dep_results: Dict[int, str]) -> str:
             instruction = step['instruction']
-            step_id = step.get('step_id')
-            
-            exec_result = await executor_agent.a_chat(
-                instruction, 
-                history, 
-                tool_handler=tool_handler_wrapper,
-                task_id=task_id,
-                step_id=step_id
-            )
-            
-            result_text = f"步骤 {step['step_index']} 结果: {exec_result}"
-            execution_results_text += result_text + "\n\n"
-            
-            st.session_state.messages.append({
-                "role": "assistant", 
-                "agent": "Executor_Expert", 
-                "content": result_text
-            })
-            progress_bar.progress((i + 1) / len(steps))
+            if dep_results:
+                dep_text = "\n\n".join(f"步骤 {i} 结果: {r}" for i, r in dep_results.items())
+                instruction = f"{instruction}\n\n前置步骤结果:\n{dep_text}"
+
+            # 每个运行中的步骤一个实时输出区域，步骤结束后移除
+            live = LiveText(live_area.empty(), prefix=f"**⚡ 步骤 {step['step_index']}** ")
+            try:
+                return await executor_agent.a_chat(
+                    instruction, 
+                    history, 
+                    tool_handler=tool_handler_wrapper,
+                    task_id=task_id,
+                    step_id=step.get('step_id'),
+                    on_token=live
+                )
+            finally:
+                live.placeholder.empty()
+
+        try:
+            dag = DagExecutor(steps, max_concurrency=MAX_PARALLEL_STEPS)
+        except ValueError as e:
+            # 依赖关系不合法时退化为顺序执行
+            print(f"Invalid step dependencies, falling back to sequential: {e}")
+            sequential = [
+                {k: v for k, v in step.items() if k != "depends_on"} | {"step_index": pos + 1}
+                for pos, step in enumerate(steps)
+            ]
+            dag = DagExecutor(sequential, max_concurrency=MAX_PARALLEL_STEPS)
+
+        results = await dag.run(run_step, on_event=on_event)
+        execution_results_text = "".join(f"步骤 {i} 结果: {r}\n\n" for i, r in results.items())
         
         status_text.empty()
         progress_bar.empty()
@@ -396,13 +456,19 @@ async def run_agent_flow(user_input: str, status_placeholders: Dict):
     
     # --- 总结阶段 ---
     with st.spinner("🐱 小恋正在整理魔法笔记..."):
-        summary_response = await summary_agent.a_chat(
-            user_input, 
-            history, 
-            rag_context=rag_response, 
-            plan_context=content,
-            execution_results=execution_results_text
-        )
+        with st.chat_message("assistant", avatar=get_avatar("Summary_Expert")):
+            st.markdown(get_badge_html("Summary_Expert"), unsafe_allow_html=True)
+            summary_view = LiveText(st.empty())
+            summary_response = await summary_agent.a_chat(
+                user_input, 
+                history, 
+                rag_context=rag_response, 
+                plan_context=content,
+                execution_results=execution_results_text,
+                on_token=summary_view
+            )
+            summary_view.text = summary_response
+            summary_view.render()
         st.session_state.messages.append({
             "role": "assistant", 
             "agent": "Summary_Expert", 
@@ -481,7 +547,7 @@ def main():
             st.markdown(prompt)
             
         # 运行异步流程
-        asyncio.run(run_agent_flow(prompt, status_placeholders))
+        asyncio.run(run_agent_flow_once(prompt, status_placeholders))
         
         # 强制刷新以显示完整历史
         st.rerun()
@@ -0,0 +1,137 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+@dataclass
+class PipelineEvent:
+    """
+    流水线进度事件
+    kind: start / done / failed / skipped
+    step_index: 步骤序号
+    step: 步骤原始数据
+    result: 步骤结果 (done / failed 时有值)
+    """
+    kind: str
+    step_index: int
+    step: Dict[str, Any]
+    result: Optional[str] = None
+
+
+StepRunner = Callable[[Dict[str, Any], Dict[int, str]], Awaitable[str]]
+EventHandler = Callable[[PipelineEvent], None]
+
+
+class DagExecutor:
+    """
+    基于依赖图 (DAG) 的步骤执行器
+
+    Planner 输出的每个 step 可带 depends_on 字段 (依赖的 step_index 列表)，
+    互不依赖的步骤并发执行，并发度由 max_concurrency 限制，
+    端到端耗时从所有步骤之和降为关键路径长度。
+
+    如果所有步骤都没有 depends_on 字段，按旧行为视为顺序链。
+    """
+
+    def __init__(self, steps: List[Dict[str, Any]], max_concurrency: int = 4):
+        """
+        Args:
+            steps: Planner 输出的步骤列表
+            max_concurrency: 同时执行的最大步骤数
+
+        Raises:
+            ValueError: 步骤序号重复、依赖不存在或存在环
+        """
+        self.steps: Dict[int, Dict[str, Any]] = {}
+        self.deps: Dict[int, List[int]] = {}
+        self.max_concurrency = max(1, max_concurrency)
+
+        has_deps = any("depends_on" in step for step in steps)
+        previous = None
+        for pos, step in enumerate(steps):
+            index = step.get("step_index", pos + 1)
+            if index in self.steps:
+                raise ValueError(f"重复的步骤序号: {index}")
+            self.steps[index] = step
+
+            if has_deps:
+                self.deps[index] = [int(d) for d in (step.get("depends_on") or [])]
+            else:
+                self.deps[index] = [previous] if previous is not None else []
+            previous = index
+
+        for index, deps in self.deps.items():
+            for dep in deps:
+                if dep not in self.steps:
+                    raise ValueError(f"步骤 {index} 依赖的步骤 {dep} 不存在")
+                if dep == index:
+                    raise ValueError(f"步骤 {index} 依赖自身")
+
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> List[int]:
+        """Kahn 拓扑排序，同层按原始顺序输出"""
+        indegree = {index: len(deps) for index, deps in self.deps.items()}
+        children: Dict[int, List[int]] = {index: [] for index in self.steps}
+        for index, deps in self.deps.items():
+            for dep in deps:
+                children[dep].append(index)
+
+        ready = [index for index in self.steps if indegree[index] == 0]
+        order = []
+        while ready:
+            index = ready.pop(0)
+            order.append(index)
+            for child in children[index]:
+                indegree[child] -= 1
+                if indegree[child] == 0:
+                    ready.append(child)
+
+        if len(order) != len(self.steps):
+            raise ValueError("步骤依赖存在环")
+        return order
+
+    async def run(self, runner: StepRunner, on_event: Optional[EventHandler] = None) -> Dict[int, str]:
+        """
+        执行所有步骤
+
+        Args:
+            runner: 异步函数，接收 (step, 依赖步骤的结果 {step_index: result}) 返回步骤结果
+            on_event: 进度事件回调 (在事件循环线程中同步调用)
+
+        Returns:
+            {step_index: result}，按拓扑顺序排列；被跳过的步骤不出现在结果中
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results: Dict[int, str] = {}
+        tasks: Dict[int, "asyncio.Task[bool]"] = {}
+
+        def emit(kind: str, index: int, result: Optional[str] = None):
+            if on_event:
+                on_event(PipelineEvent(kind=kind, step_index=index, step=self.steps[index], result=result))
+
+        async def run_step(index: int) -> bool:
+            deps = self.deps[index]
+            if deps:
+                outcomes = await asyncio.gather(*(tasks[d] for d in deps))
+                if not all(outcomes):
+                    emit("skipped", index)
+                    return False
+
+            async with semaphore:
+                emit("start", index)
+                try:
+                    result = await runner(self.steps[index], {d: results[d] for d in deps})
+                except Exception as e:
+                    results[index] = f"Error: {e}"
+                    emit("failed", index, results[index])
+                    return False
+                results[index] = result
+                emit("done", index, result)
+                return True
+
+        for index in self.order:
+            tasks[index] = asyncio.ensure_future(run_step(index))
+        await asyncio.gather(*tasks.values())
+
+        return {index: results[index] for index in self.order if index in results}
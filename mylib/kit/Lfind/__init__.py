@@ -1,6 +1,7 @@
-from .embedding import get_embedding
+from .embedding import get_embedding, get_embeddings
 
 
 __all__ = [
     "get_embedding",
+    "get_embeddings",
 ]
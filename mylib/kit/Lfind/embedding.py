@@ -1,19 +1,38 @@
 import os
+import threading
+
+from typing import List
 
-from openai import OpenAI
 from dotenv import load_dotenv
 
 
 load_dotenv()
 
-client = OpenAI(
-    api_key=os.getenv("QW_EMBEDDING_KEY"),
-    base_url="https://dashscope.aliyuncs.com/compatible-mode/v1"
-)
+# OpenAI SDK 导入较慢 (约 0.7s)，首次计算 Embedding 时才创建客户端
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """获取 Embedding 客户端 (懒加载)"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from openai import OpenAI
+                _client = OpenAI(
+                    api_key=os.getenv("QW_EMBEDDING_KEY"),
+                    base_url="https://dashscope.aliyuncs.com/compatible-mode/v1"
+                )
+    return _client
+
+
+# text-embedding-v4 单次请求最多接受 10 条输入
+EMBEDDING_BATCH_LIMIT = 10
 
 
 def get_embedding(input: str) -> list[float]:
-    return (client.embeddings.create(
+    return (get_client().embeddings.create(
         model="text-embedding-v4",
         input=input,
         dimensions=1536,
@@ -21,5 +40,22 @@ def get_embedding(input: str) -> list[float]:
     )).data[0].embedding
 
 
+def get_embeddings(inputs: List[str], batch_size: int = EMBEDDING_BATCH_LIMIT) -> List[list[float]]:
+    """批量计算 Embedding, 返回顺序与 inputs 一致"""
+    embeddings: List[list[float]] = []
+    for start in range(0, len(inputs), batch_size):
+        chunk = inputs[start:start + batch_size]
+        response = get_client().embeddings.create(
+            model="text-embedding-v4",
+            input=chunk,
+            dimensions=1536,
+            encoding_format="float"
+        )
+        # 接口返回的 data 带有 index 字段, 按 index 还原顺序
+        ordered = sorted(response.data, key=lambda item: item.index)
+        embeddings.extend(item.embedding for item in ordered)
+    return embeddings
+
+
 if __name__ == "__main__":
     print(get_embedding(input=input("输入文字: ")))
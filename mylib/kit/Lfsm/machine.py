@@ -1,4 +1,4 @@
-from typing import Generic, List, Any, Dict
+from typing import Generic, List, Any, Dict, Callable, Iterable, Iterator, Optional
 
 from mylib.kernel.Ltypevar import S, R
 
@@ -12,14 +12,20 @@ class LStateMachine(Generic[S, R]):
     
     核心功能：
     1. 状态管理：维护当前状态 (S) 并支持状态切换。
-    2. 动态分发：自动将处理逻辑分发到 `handle_{state_name}` 方法。
+    2. 动态分发：自动将处理逻辑分发到 `handle_{state_name}` 方法 (每个状态只解析一次, 缓存在分发表中)。
     3. 上下文追踪：内置行号、列号追踪及上下文存储。
+    4. 区间缓冲：begin_span / take_span 直接切片输入, 代替逐字符写入 buffer。
+    5. 流式解析：feed(chunk) / close() 增量推送输入, iter_parse(chunks) 以生成器方式逐个产出结果。
     
     泛型参数：
     - S: 状态枚举类型 (Enum)
     - R: 产出结果类型 (Result Type)
     """
     
+    # 流式解析时 handle 方法最多向后查看的元素个数;
+    # feed 只推进到距离已有输入末尾 lookahead 个元素处, 其余留到下一段输入或 close
+    lookahead: int = 1
+    
     def __init__(self, initial_state: S):
         self.state: S = initial_state
         self.buffer: List[str] = []
@@ -27,6 +33,11 @@ class LStateMachine(Generic[S, R]):
         self.context: Dict[str, Any] = {}  # 用于存储上下文信息, 如 dollar_tag
         self.line = 1
         self.col = 1
+        self.source: Any = None             # 正在解析的输入, 供 take_span 切片
+        self.span_start: Optional[int] = None
+        self._handlers: Dict[S, Callable] = {}  # 分发表: 状态 -> handle 方法
+        self._pending: Any = None           # 流式解析: 尚未消费完的输入, None 表示不在流式解析中
+        self._pos = 0                       # 流式解析: _pending 中下一个待处理的下标
     
     def switch_state(self, new_state: S):
         """切换状态"""
@@ -38,25 +49,120 @@ class LStateMachine(Generic[S, R]):
         content 可以是字符串, 也可以是 Token 列表
         """
         self._reset()
+        self._pending = content
+        self._pos = 0
+        try:
+            self._run(final=True)
+            self.on_finish()
+        finally:
+            self._pending = None
+            self.source = None
+        return self.results
+
+    # === 流式解析 ===
+    def feed(self, chunk: Any) -> List[R]:
+        """
+        增量输入一段内容 (字符串片段或元素列表), 返回因此新产出的结果
+
+        已产出的结果不会保留在 results 中, 内存占用只与未消费完的输入有关
+        """
+        if self._pending is None:
+            self._reset()
+            self._pending = "" if isinstance(chunk, str) else []
+            self._pos = 0
+
+        if isinstance(self._pending, str):
+            self._pending += chunk
+        else:
+            self._pending.extend(chunk)
+
+        try:
+            self._run(final=False)
+        except Exception:
+            self._pending = None
+            raise
+        finally:
+            self.source = None
+        self._trim()
+        return self._drain()
+
+    def close(self) -> List[R]:
+        """结束输入: 处理剩余内容并调用 on_finish, 返回最后产出的结果"""
+        if self._pending is None:
+            self._reset()
+            self._pending = []
+            self._pos = 0
+        try:
+            self._run(final=True)
+            self.on_finish()
+        finally:
+            self._pending = None
+            self.source = None
+        return self._drain()
+
+    def iter_parse(self, chunks: Iterable[Any]) -> Iterator[R]:
+        """生成器模式: 逐段 feed, 结果产出后立即 yield"""
+        for chunk in chunks:
+            yield from self.feed(chunk)
+        yield from self.close()
+
+    def _safe_limit(self, content: Any, n: int) -> int:
+        """流式解析时本轮最多处理到的下标 (不含), 子类可按语句边界等重写"""
+        return n - self.lookahead
+
+    def _run(self, final: bool):
+        """从 _pos 开始驱动状态机; final 为 False 时只处理到 _safe_limit"""
+        content = self._pending
+        self.source = content
+        
+        # 子类没有重写 _on_step 时跳过这次空调用
+        on_step = self._on_step if type(self)._on_step is not LStateMachine._on_step else None
+        handlers = self._handlers
         
         n = len(content)
-        i = 0
-        while i < n:
+        limit = n if final else self._safe_limit(content, n)
+        i = self._pos
+        while i < limit:
             item = content[i]
             
-            self._on_step(item)
+            if on_step is not None:
+                on_step(item)
 
-            # 动态分发到 handle_{state_name} 方法
-            handler = getattr(self, f"handle_{self.state.name.lower()}", self.handle_default)
+            # 分发到 handle_{state_name} 方法, 每个状态只查找一次
+            handler = handlers.get(self.state)
+            if handler is None:
+                handler = self._resolve_handler(self.state)
             new_i = handler(item, i, content, n)
             
             if new_i is not None:
                 i = new_i
             else:
                 i += 1
-        
-        self.on_finish()
-        return self.results
+        self._pos = i
+
+    def _trim(self):
+        """丢弃已消费的输入 (保留未 take 的区间)"""
+        keep = self._pos if self.span_start is None else min(self._pos, self.span_start)
+        if keep <= 0:
+            return
+        if isinstance(self._pending, str):
+            self._pending = self._pending[keep:]
+        else:
+            del self._pending[:keep]
+        self._pos -= keep
+        if self.span_start is not None:
+            self.span_start -= keep
+
+    def _drain(self) -> List[R]:
+        results = self.results
+        self.results = []
+        return results
+
+    def _resolve_handler(self, state: S) -> Callable:
+        """查找状态对应的 handle 方法并写入分发表"""
+        handler = getattr(self, f"handle_{state.name.lower()}", self.handle_default)
+        self._handlers[state] = handler
+        return handler
 
     def _on_step(self, item: Any):
         """每一步的回调, 用于更新行号等"""
@@ -69,6 +175,7 @@ class LStateMachine(Generic[S, R]):
         self.context = {}
         self.line = 1
         self.col = 1
+        self.span_start = None
 
     def handle_default(self, char: str, i: int, content: str, len: int) -> int:
         """默认处理逻辑：直接写入 buffer"""
@@ -97,6 +204,16 @@ class LStateMachine(Generic[S, R]):
         self.buffer = []
         return res.strip()
     
+    def begin_span(self, i: int):
+        """标记区间起点 (输入下标)"""
+        self.span_start = i
+
+    def take_span(self, end: int) -> Any:
+        """取出 source[span_start:end] 并清除起点, 相当于一次性 flush 逐字符写入的 buffer"""
+        start = self.span_start
+        self.span_start = None
+        return self.source[start:end]
+    
     def flush_result(self) -> List[R]:
         """返回result"""
         return self.results
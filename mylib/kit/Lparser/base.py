@@ -1,4 +1,5 @@
-from typing import Any, Optional, Type, Generic
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Optional, Type, Generic
 
 from mylib.kit.Lpda import LPDA
 from mylib.kit.Ltokenizer import LToken
@@ -9,8 +10,8 @@ class LParserBase(LPDA[S, R, P], Generic[S, R, P]):
     """
     Abstract base class for Parsers.
     解析器的抽象基类
-    Inherits from LPDA (FSM + Stack) and processes a list of LToken.
-    继承于 LPDA, 并处理 LToken 列表
+    Inherits from LPDA (FSM + Stack) and processes a list (or a stream) of LToken.
+    继承于 LPDA, 并处理 LToken 列表 (或 Token 流)
     """
     def __init__(self, initial_state: S, scope_enum: Type[P] = None):
         super().__init__(initial_state, scope_enum)
@@ -24,6 +25,24 @@ class LParserBase(LPDA[S, R, P], Generic[S, R, P]):
             self.line = item.line
             self.col = item.col
 
+    def iter_stream(self, tokens: Iterable[LToken], batch_size: int = 256) -> Iterator[R]:
+        """
+        直接消费 Token 迭代器 (如 tokenizer.iter_parse / scan 的输出), 不需要先生成完整的 Token 列表
+
+        Token 按 batch_size 分批 feed, 结果产出后立即 yield
+        """
+        tokens = iter(tokens)
+        while True:
+            batch = list(islice(tokens, batch_size))
+            if not batch:
+                break
+            yield from self.feed(batch)
+        yield from self.close()
+
+    def parse_stream(self, tokens: Iterable[LToken], batch_size: int = 256) -> List[R]:
+        """iter_stream 的列表版本"""
+        return list(self.iter_stream(tokens, batch_size))
+
     def error(self, message: str):
         """抛出一个包含上下文信息的解析错误"""
         token_info = f" at {self.current_token}" if self.current_token else ""
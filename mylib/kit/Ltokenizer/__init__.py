@@ -1,8 +1,10 @@
 from .token import LToken
 from .base import LTokenizerBase
+from .buffer import LTokenBuffer
 
 
 __all__ = [
     "LToken",
     "LTokenizerBase",
+    "LTokenBuffer",
 ]
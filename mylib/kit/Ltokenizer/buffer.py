@@ -0,0 +1,107 @@
+from array import array
+from enum import Enum
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Type, Union
+
+from .token import LToken
+
+
+class LTokenBuffer(Sequence[LToken]):
+    """
+    列式 Token 缓冲区
+
+    不为每个 Token 创建对象, 而是用若干并行的 array 保存:
+    - types: 类型编号 (token_types 中的下标)
+    - starts / ends: 值在 source 中的区间
+    - lines / cols: 行列号
+
+    Token 的值在访问时才从 source 切片; 值与区间内容不同的少数 Token (如含转义引号的字符串) 单独记录。
+    按下标访问时生成 LToken, 因此可以直接交给按下标读取 Token 的解析器 (如 LParserBase.parse)。
+    """
+
+    def __init__(self, source: str, token_types: Type[Enum]):
+        """
+        Args:
+            source: 被分词的原文
+            token_types: Token 类型枚举
+        """
+        self.source = source
+        self.token_types: List[Enum] = list(token_types)
+        self._type_ids: Dict[Enum, int] = {t: i for i, t in enumerate(self.token_types)}
+
+        self.types = array('B' if len(self.token_types) <= 256 else 'H')
+        self.starts = array('q')
+        self.ends = array('q')
+        self.lines = array('I')
+        self.cols = array('I')
+        self._values: Dict[int, str] = {}   # 下标 -> 值 (值不等于 source[start:end] 时)
+
+    def append(self, token_type: Enum, start: int, end: int, line: int, col: int, value: Optional[str] = None):
+        """
+        追加一个 Token
+
+        Args:
+            value: 值与 source[start:end] 不同时传入 (如转义后的字符串), 否则留空
+        """
+        if value is not None:
+            self._values[len(self.types)] = value
+        self.types.append(self._type_ids[token_type])
+        self.starts.append(start)
+        self.ends.append(end)
+        self.lines.append(line)
+        self.cols.append(col)
+
+    def extend(self, raw_tokens: Iterable[Tuple[Enum, int, int, int, int, Optional[str]]]):
+        """批量追加 (token_type, start, end, line, col, value) 元组, 比逐个 append 快"""
+        type_ids = self._type_ids
+        values = self._values
+        types, starts, ends = self.types.append, self.starts.append, self.ends.append
+        lines, cols = self.lines.append, self.cols.append
+        index = len(self.types)
+        for token_type, start, end, line, col, value in raw_tokens:
+            if value is not None:
+                values[index] = value
+            types(type_ids[token_type])
+            starts(start)
+            ends(end)
+            lines(line)
+            cols(col)
+            index += 1
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[LToken, List[LToken]]:
+        if isinstance(index, slice):
+            return [self._make(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("token index out of range")
+        return self._make(index)
+
+    def __iter__(self) -> Iterator[LToken]:
+        for i in range(len(self)):
+            yield self._make(i)
+
+    def type_at(self, index: int) -> Enum:
+        return self.token_types[self.types[index]]
+
+    def value_at(self, index: int) -> str:
+        value = self._values.get(index)
+        if value is None:
+            value = self.source[self.starts[index]:self.ends[index]]
+        return value
+
+    def span(self, index: int) -> Tuple[int, int]:
+        """Token 值在 source 中的区间"""
+        return self.starts[index], self.ends[index]
+
+    def nbytes(self) -> int:
+        """各列占用的字节数 (不含 source 与少量单独记录的值)"""
+        return sum(a.itemsize * len(a) for a in (self.types, self.starts, self.ends, self.lines, self.cols))
+
+    def _make(self, index: int) -> LToken:
+        return LToken(self.token_types[self.types[index]], self.value_at(index), self.lines[index], self.cols[index])
+
+    def __repr__(self):
+        return f"LTokenBuffer({len(self)} tokens, {self.nbytes()} bytes)"
@@ -19,8 +19,12 @@ class TokenType(Enum):
     EOF = auto()
 
 
-@dataclass
+@dataclass(slots=True)
 class LToken:
+    """
+    Token 对象 (__slots__, 没有实例 __dict__)
+    大量 Token 时可使用列式存储 LTokenBuffer
+    """
     type: Enum
     value: str
     line: int
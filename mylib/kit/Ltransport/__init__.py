@@ -0,0 +1,7 @@
+from .transport import LLMTransport, get_llm_transport
+
+
+__all__ = [
+    "LLMTransport",
+    "get_llm_transport",
+]
@@ -0,0 +1,263 @@
+import json
+import time
+import random
+import asyncio
+import threading
+import importlib.util
+from weakref import WeakKeyDictionary
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+
+
+# 安装了 h2 时自动启用 HTTP/2
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# 可重试的状态码: 限流 + 服务端错误
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class LLMTransport:
+    """
+    进程级共享的 LLM HTTP 传输层
+
+    - 复用带连接池的 httpx 客户端 (keep-alive, 可用时启用 HTTP/2)，避免每次调用都重新握手 TLS
+    - 指数退避 + 随机抖动 (full jitter)
+    - 遇到 429 / 503 时优先遵循服务端返回的 Retry-After
+    - 同时提供同步 (post_json)、异步 (apost_json) 与流式 (astream_json) 接口
+    """
+
+    def __init__(self,
+                    timeout: float = 60.0,
+                    max_retries: int = 3,
+                    backoff_base: float = 1.0,
+                    backoff_max: float = 30.0,
+                    max_connections: int = 20,
+                    max_keepalive_connections: int = 10,
+                    http2: Optional[bool] = None):
+        """
+        Args:
+            timeout: 默认请求超时 (秒)
+            max_retries: 默认最大尝试次数
+            backoff_base: 退避基数 (秒)，第 n 次重试的上限为 backoff_base * 2^n
+            backoff_max: 单次退避的最长时间 (秒)
+            max_connections: 连接池最大连接数
+            max_keepalive_connections: 连接池最大空闲 keep-alive 连接数
+            http2: 是否启用 HTTP/2，为空时根据 h2 是否安装自动判断
+        """
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.http2 = HTTP2_AVAILABLE if http2 is None else http2
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+        )
+
+        self._lock = threading.Lock()
+        self._sync_client: Optional[httpx.Client] = None
+        # AsyncClient 绑定到创建它的事件循环，每个事件循环各持有一个
+        self._async_clients: "WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = WeakKeyDictionary()
+
+    # === 客户端管理 ===
+    def _get_sync_client(self) -> httpx.Client:
+        if self._sync_client is None:
+            with self._lock:
+                if self._sync_client is None:
+                    self._sync_client = httpx.Client(
+                        http2=self.http2,
+                        limits=self._limits,
+                        timeout=self.timeout,
+                    )
+        return self._sync_client
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=self._limits,
+                timeout=self.timeout,
+            )
+            self._async_clients[loop] = client
+        return client
+
+    def close(self):
+        """关闭同步客户端"""
+        with self._lock:
+            if self._sync_client is not None:
+                self._sync_client.close()
+                self._sync_client = None
+
+    async def aclose(self):
+        """关闭当前事件循环上的异步客户端"""
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    # === 重试策略 ===
+    @staticmethod
+    def _parse_retry_after(response: Optional[httpx.Response]) -> Optional[float]:
+        """解析 Retry-After (秒数或 HTTP 日期)"""
+        if response is None:
+            return None
+        value = response.headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+            return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return None
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response], backoff_base: float) -> float:
+        """计算第 attempt 次失败后的等待时间"""
+        retry_after = self._parse_retry_after(response)
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        ceiling = min(self.backoff_max, backoff_base * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    def _attempts(self, max_retries: Optional[int]) -> int:
+        """本次调用的尝试次数: 显式传入的 0 不会被替换为默认值, 至少尝试一次"""
+        return max(1, self.max_retries if max_retries is None else max_retries)
+
+    @staticmethod
+    def _should_retry(exc: Exception) -> bool:
+        if isinstance(exc, httpx.HTTPStatusError):
+            return exc.response.status_code in RETRYABLE_STATUS
+        return isinstance(exc, httpx.TransportError)
+
+    # === 请求接口 ===
+    def post_json(self,
+                    url: str,
+                    payload: Dict[str, Any],
+                    headers: Optional[Dict[str, str]] = None,
+                    timeout: Optional[float] = None,
+                    max_retries: Optional[int] = None,
+                    backoff_base: Optional[float] = None,
+                    label: str = "LLM") -> Dict[str, Any]:
+        """
+        同步发送 JSON 请求并返回 JSON 响应
+
+        Raises:
+            httpx.HTTPStatusError: 不可重试的状态码，或重试耗尽
+            httpx.TransportError: 网络错误重试耗尽
+        """
+        retries = self._attempts(max_retries)
+        base = self.backoff_base if backoff_base is None else backoff_base
+        client = self._get_sync_client()
+
+        for attempt in range(retries):
+            response = None
+            try:
+                response = client.post(url, headers=headers, json=payload, timeout=timeout or self.timeout)
+                response.raise_for_status()
+                return response.json()
+            except Exception as e:
+                if attempt >= retries - 1 or not self._should_retry(e):
+                    raise
+                delay = self._retry_delay(attempt, response, base)
+                print(f"[{label}] LLM Call failed (Attempt {attempt+1}/{retries}): {e}. Retrying in {delay:.1f}s...")
+                time.sleep(delay)
+
+    async def apost_json(self,
+                    url: str,
+                    payload: Dict[str, Any],
+                    headers: Optional[Dict[str, str]] = None,
+                    timeout: Optional[float] = None,
+                    max_retries: Optional[int] = None,
+                    backoff_base: Optional[float] = None,
+                    label: str = "LLM") -> Dict[str, Any]:
+        """
+        异步发送 JSON 请求并返回 JSON 响应
+
+        Raises:
+            httpx.HTTPStatusError: 不可重试的状态码，或重试耗尽
+            httpx.TransportError: 网络错误重试耗尽
+        """
+        retries = self._attempts(max_retries)
+        base = self.backoff_base if backoff_base is None else backoff_base
+        client = self._get_async_client()
+
+        for attempt in range(retries):
+            response = None
+            try:
+                response = await client.post(url, headers=headers, json=payload, timeout=timeout or self.timeout)
+                response.raise_for_status()
+                return response.json()
+            except Exception as e:
+                if attempt >= retries - 1 or not self._should_retry(e):
+                    raise
+                delay = self._retry_delay(attempt, response, base)
+                print(f"[{label}] LLM Call failed (Attempt {attempt+1}/{retries}): {e}. Retrying in {delay:.1f}s...")
+                await asyncio.sleep(delay)
+
+    async def astream_json(self,
+                    url: str,
+                    payload: Dict[str, Any],
+                    headers: Optional[Dict[str, str]] = None,
+                    timeout: Optional[float] = None,
+                    max_retries: Optional[int] = None,
+                    backoff_base: Optional[float] = None,
+                    label: str = "LLM") -> AsyncIterator[Dict[str, Any]]:
+        """
+        异步发送流式请求 (SSE)，逐个产出 `data:` 事件解析后的 JSON
+
+        只在收到第一个事件之前重试；流已经开始产出后出错直接抛出，
+        避免重试导致调用方收到重复的内容。
+
+        Raises:
+            httpx.HTTPStatusError: 不可重试的状态码，或重试耗尽
+            httpx.TransportError: 网络错误重试耗尽
+        """
+        retries = self._attempts(max_retries)
+        base = self.backoff_base if backoff_base is None else backoff_base
+        client = self._get_async_client()
+
+        for attempt in range(retries):
+            response = None
+            started = False
+            try:
+                async with client.stream("POST", url, headers=headers, json=payload, timeout=timeout or self.timeout) as response:
+                    if response.is_error:
+                        await response.aread()
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[5:].strip()
+                        if data == "[DONE]":
+                            return
+                        started = True
+                        yield json.loads(data)
+                return
+            except Exception as e:
+                if started or attempt >= retries - 1 or not self._should_retry(e):
+                    raise
+                delay = self._retry_delay(attempt, response, base)
+                print(f"[{label}] LLM Stream failed (Attempt {attempt+1}/{retries}): {e}. Retrying in {delay:.1f}s...")
+                await asyncio.sleep(delay)
+
+
+# 进程级单例
+_transport: Optional[LLMTransport] = None
+_transport_lock = threading.Lock()
+
+
+def get_llm_transport() -> LLMTransport:
+    """获取共享的 LLM 传输层单例"""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = LLMTransport()
+    return _transport
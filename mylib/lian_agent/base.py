@@ -1,7 +1,4 @@
-import httpx
 import datetime
-import time
-import tiktoken
 
 
 from uuid import uuid4, UUID
@@ -9,9 +6,12 @@ from typing import List, Dict, Union, Any
 
 from mylib.config import ConfigLoader
 from mylib.kernel.Lenum import LLMRole, LLMStatus, MemoryLogMemoryType, MemoryLogRole, LLMContextType
-from mylib.lian_orm import Sql, MemoryLog, Task, TaskStep, ToolCall
+from mylib.lian_orm import MemoryLog, Task, TaskStep, ToolCall, get_sql
 from mylib.kit.Lfind import get_embedding
 from mylib.kit.Loutput import Loutput
+from mylib.kit.Ltransport import get_llm_transport
+
+from .context import ContextWindow, count_tokens, get_tokenizer
 
 
 class BaseAgent:
@@ -38,8 +38,7 @@ class BaseAgent:
     role: LLMRole                       # {ruler, caster, foreteller, assassin, shielder}
     description: str                    # 自我认知的内容（System Prompt）
     goals: list[str]                    # 当前目标列表
-    memory: list[dict]                  # 短期上下文（部分）
-    memory_tokens: list[int]            # 短期上下文的token
+    context: ContextWindow              # 短期上下文及其 token 统计
 
     # === 实例变量 === 子类可选实现 ===
     long_memory_ids: list[str]          # 长期记忆在 DB 的存储引用
@@ -48,30 +47,33 @@ class BaseAgent:
 
     def __init__(self):
         self.agent_id = uuid4()
-        self.db = Sql()
+        self.db = get_sql()
         self.lo = Loutput()
         self.status = LLMStatus.IDLE
-        self.memory = []
-        self.memory_tokens = []
-        self.tokenizer = tiktoken.get_encoding("cl100k_base")
+        self.tokenizer = get_tokenizer("cl100k_base")
+        self.context = ContextWindow(max_tokens=self.max_tokens, counter=self._tokens)
 
 
         # === 子类必须实例化的变量 ===
         # {role, descriptopn, goals}
 
+    @property
+    def memory(self) -> list[dict]:
+        """短期上下文（部分）"""
+        return self.context.messages
+
+    @property
+    def memory_tokens(self) -> list[int]:
+        """短期上下文的token"""
+        return self.context.tokens
+
     def _tokens(self, content: str) -> int:
         """计算一个content的tokens"""
-        if self.tokenizer:
-            try:
-                return len(self.tokenizer.encode(content))
-            except Exception:
-                return len(content) // 4
-        return len(content) // 4
+        return count_tokens(content)
 
-    def _append_memory(self, role: LLMContextType, content: str):
-        """将一条role: content加入memory"""
-        self.memory.append({"role": role, "content": content})
-        self.memory_tokens.append(self._tokens(content))
+    def _append_memory(self, role: LLMContextType, content: str, pinned: bool = False):
+        """将一条role: content加入memory, pinned 的消息不会被截断"""
+        self.context.append(role, content, pinned=pinned)
 
 
     # === 必须实现的方法 === think = save_memory ===
@@ -93,30 +95,9 @@ class BaseAgent:
         """构造请求消息"""
         self._append_memory(LLMContextType.USER, user_input)
 
-        contexts: list[Dict[LLMContextType, str]] = [{
-            "role": LLMContextType.SYSTEM,
-            "content": self.description,
-        }]
-
-        remaining_tokens = self.max_tokens - self._tokens(self.description)
-        start = len(self.memory)
-
-        for i in range(len(self.memory) - 1, -1, -1):
-            tokens = self.memory_tokens[i]
-            if remaining_tokens < tokens:
-                break
-            remaining_tokens -= tokens
-            start = i
-
-        if start > 0:
-            contexts.append({
-                "role": LLMContextType.SYSTEM,
-                "content": "[History Truncated]"
-            })
-
-        contexts.extend(self.memory[start:])
-
-        return contexts
+        # System Prompt 的 tokens 按内容缓存，截断点由前缀和二分得到
+        self.context.system_prompt = self.description
+        return self.context.build()
 
 
     def _call_llm(self, contexts: List[Dict[LLMContextType, str]]) -> Dict[str, Any]:
@@ -132,23 +113,19 @@ class BaseAgent:
             "stream": False,
         }
 
-        for attempt in range(self.max_retries):
-            try:
-                with httpx.Client(timeout=self.api_timeout) as client:
-                    response = client.post(
-                        self.api_url,
-                        headers=headers,
-                        json=payload,
-                    )
-                    response.raise_for_status()
-                    return response.json()
-            except Exception as e:
-                if attempt < self.max_retries - 1:
-                    time.sleep(self.retry_delay * (2 ** attempt))
-                else:
-                    print(f"[{self.agent_id}] LLM Call Error: {e}")
-                    return {"choices": [{"message": {"content": f"Error: {str(e)}"}}]}
-        return {"choices": [{"message": {"content": "Error: Max retries reached"}}]}
+        try:
+            return get_llm_transport().post_json(
+                self.api_url,
+                payload,
+                headers=headers,
+                timeout=self.api_timeout,
+                max_retries=self.max_retries,
+                backoff_base=self.retry_delay,
+                label=self.agent_id,
+            )
+        except Exception as e:
+            print(f"[{self.agent_id}] LLM Call Error: {e}")
+            return {"choices": [{"message": {"content": f"Error: {str(e)}"}}]}
 
     def save_memory(self, role: MemoryLogRole, content: str, memmory_type: MemoryLogMemoryType = MemoryLogMemoryType.CONVERSATION):
         """保存一条对话历史到数据库"""
@@ -0,0 +1,242 @@
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional
+
+import tiktoken
+
+from mylib.kernel.Lenum import LLMContextType
+
+
+TRUNCATED_NOTICE = "[History Truncated]"
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer(encoding: str = "cl100k_base"):
+    """获取 tiktoken 编码器 (进程内只加载一次)"""
+    try:
+        return tiktoken.get_encoding(encoding)
+    except Exception:
+        return None
+
+
+def count_tokens(content: str, encoding: str = "cl100k_base") -> int:
+    """计算一段文本的 tokens，编码器不可用时按 4 字符 / token 估算"""
+    tokenizer = get_tokenizer(encoding)
+    if tokenizer:
+        try:
+            return len(tokenizer.encode(content))
+        except Exception:
+            return len(content) // 4
+    return len(content) // 4
+
+
+class ContextWindow:
+    """
+    上下文窗口
+
+    增量维护短期记忆的 token 统计，构造请求消息时不再逐条回扫:
+    - System Prompt 的 token 数按内容缓存，内容不变时不会重复计算
+    - 维护非固定消息 tokens 的前缀和，二分查找截断点 O(log n)
+    - 固定消息 (pinned) 永远保留在上下文中，不参与截断
+    - 可选的总结钩子 (summarizer)，把被截断的消息折叠成一条固定的摘要
+    """
+
+    def __init__(self,
+                    max_tokens: int,
+                    system_prompt: str = "",
+                    counter: Callable[[str], int] = count_tokens,
+                    summarizer: Optional[Callable[[List[Dict]], str]] = None,
+                    summarize_after: Optional[int] = None):
+        """
+        Args:
+            max_tokens: 上下文 token 上限
+            system_prompt: 系统提示词
+            counter: token 计数函数
+            summarizer: 总结钩子，接收被截断的消息列表，返回摘要文本
+            summarize_after: 被截断的消息达到该数量时，build 自动调用 compact；为空时只能手动 compact
+        """
+        self.max_tokens = max_tokens
+        self.counter = counter
+        self.summarizer = summarizer
+        self.summarize_after = summarize_after
+
+        self.messages: List[Dict] = []
+        self.tokens: List[int] = []
+        self.pinned: List[int] = []         # 固定消息的下标 (升序)
+        self._prefix: List[int] = [0]       # _prefix[i] = 前 i 条非固定消息的 tokens 之和
+        self._pinned_tokens = 0
+
+        self._system_prompt = ""
+        self._system_tokens = 0
+        self.system_prompt = system_prompt
+
+    # === System Prompt ===
+    @property
+    def system_prompt(self) -> str:
+        return self._system_prompt
+
+    @system_prompt.setter
+    def system_prompt(self, content: str):
+        if content is self._system_prompt or content == self._system_prompt:
+            return
+        self._system_prompt = content
+        self._system_tokens = self.counter(content) if content else 0
+
+    @property
+    def system_tokens(self) -> int:
+        return self._system_tokens
+
+    # === 消息管理 ===
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    @property
+    def total_tokens(self) -> int:
+        """全部消息 (不含 System Prompt) 的 tokens"""
+        return self._prefix[-1] + self._pinned_tokens
+
+    def append(self, role: LLMContextType, content: str, pinned: bool = False) -> int:
+        """
+        追加一条消息，O(1)
+
+        Returns:
+            消息下标
+        """
+        tokens = self.counter(content)
+        index = len(self.messages)
+        self.messages.append({"role": role, "content": content})
+        self.tokens.append(tokens)
+
+        if pinned:
+            self.pinned.append(index)
+            self._pinned_tokens += tokens
+            self._prefix.append(self._prefix[-1])
+        else:
+            self._prefix.append(self._prefix[-1] + tokens)
+        return index
+
+    def pin(self, index: int):
+        """固定一条已有消息 (需要重建前缀和，O(n))"""
+        if self._is_pinned(index):
+            return
+        self.pinned.insert(bisect_left(self.pinned, index), index)
+        self._rebuild()
+
+    def unpin(self, index: int):
+        """取消固定 (需要重建前缀和，O(n))"""
+        if not self._is_pinned(index):
+            return
+        self.pinned.pop(bisect_left(self.pinned, index))
+        self._rebuild()
+
+    def clear(self):
+        self.messages.clear()
+        self.tokens.clear()
+        self.pinned.clear()
+        self._prefix = [0]
+        self._pinned_tokens = 0
+
+    def _is_pinned(self, index: int) -> bool:
+        pos = bisect_left(self.pinned, index)
+        return pos < len(self.pinned) and self.pinned[pos] == index
+
+    def _rebuild(self):
+        """根据 messages / tokens / pinned 重建前缀和"""
+        pinned = set(self.pinned)
+        prefix = [0]
+        pinned_tokens = 0
+        for index, tokens in enumerate(self.tokens):
+            if index in pinned:
+                pinned_tokens += tokens
+                prefix.append(prefix[-1])
+            else:
+                prefix.append(prefix[-1] + tokens)
+        self._prefix = prefix
+        self._pinned_tokens = pinned_tokens
+
+    # === 截断与构造 ===
+    def truncation_point(self) -> int:
+        """
+        二分查找截断点: 最小的 start，使 messages[start:] 中非固定消息的 tokens 不超过剩余预算
+
+        Returns:
+            start，0 表示未截断
+        """
+        budget = self.max_tokens - self._system_tokens - self._pinned_tokens
+        total = self._prefix[-1]
+        if budget >= total:
+            return 0
+        if budget < 0:
+            return len(self.messages)
+        # _prefix 单调不减，找到第一个 _prefix[start] >= total - budget
+        return bisect_left(self._prefix, total - budget)
+
+    def build(self) -> List[Dict]:
+        """
+        构造请求消息: System Prompt + 被截断区间内的固定消息 + 截断提示 + 窗口内的消息
+        """
+        start = self.truncation_point()
+
+        if (start > 0 and self.summarizer and self.summarize_after
+                and start - bisect_left(self.pinned, start) >= self.summarize_after):
+            if self.compact(start):
+                start = self.truncation_point()
+
+        contexts: List[Dict] = [{
+            "role": LLMContextType.SYSTEM,
+            "content": self._system_prompt,
+        }]
+
+        if start > 0:
+            for index in self.pinned[:bisect_left(self.pinned, start)]:
+                contexts.append(self.messages[index])
+            if start - bisect_left(self.pinned, start) > 0:
+                contexts.append({
+                    "role": LLMContextType.SYSTEM,
+                    "content": TRUNCATED_NOTICE
+                })
+
+        contexts.extend(self.messages[start:])
+        return contexts
+
+    def compact(self, start: Optional[int] = None) -> bool:
+        """
+        调用总结钩子，把截断点之前的非固定消息折叠成一条固定的摘要消息
+
+        Args:
+            start: 截断点，为空时自动计算
+
+        Returns:
+            是否发生了折叠
+        """
+        if not self.summarizer:
+            return False
+        start = self.truncation_point() if start is None else start
+        pinned = set(self.pinned)
+        evicted = [self.messages[i] for i in range(start) if i not in pinned]
+        if not evicted:
+            return False
+
+        try:
+            summary = self.summarizer(evicted)
+        except Exception as e:
+            print(f"[ContextWindow] Summarizer failed: {e}")
+            return False
+
+        kept = [i for i in range(len(self.messages)) if i >= start or i in pinned]
+        messages = [self.messages[i] for i in kept]
+        tokens = [self.tokens[i] for i in kept]
+        new_pinned = [pos for pos, i in enumerate(kept) if i in pinned]
+
+        # 摘要放在被截断区间原有固定消息之后，保持时间顺序
+        insert_at = bisect_left(self.pinned, start)
+        messages.insert(insert_at, {"role": LLMContextType.SYSTEM, "content": summary})
+        tokens.insert(insert_at, self.counter(summary))
+        new_pinned = [pos if pos < insert_at else pos + 1 for pos in new_pinned]
+        new_pinned.insert(insert_at, insert_at)
+
+        self.messages = messages
+        self.tokens = tokens
+        self.pinned = new_pinned
+        self._rebuild()
+        return True
@@ -1,4 +1,6 @@
-from .orm import Sql
+from .orm import Sql, get_sql, shutdown
+from .unit_of_work import UnitOfWork
+from .repository import Query, Q
 
 from .models import (
     MemoryLog, 
@@ -18,6 +20,11 @@ from .models import (
 
 __all__ = [
     "Sql", 
+    "get_sql",
+    "shutdown",
+    "UnitOfWork",
+    "Query",
+    "Q",
     "MemoryLog", 
     "Task", 
     "TaskStep", 
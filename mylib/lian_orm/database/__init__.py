@@ -1,7 +1,10 @@
 from .client import DatabaseClient
+from .transaction import Transaction
 
 
 __all__ = [
     # 数据库连接客户端
-    "DatabaseClient"
+    "DatabaseClient",
+    # 事务 (共享连接 / 保存点)
+    "Transaction",
 ]
\ No newline at end of file
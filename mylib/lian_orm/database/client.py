@@ -1,41 +1,140 @@
 from contextlib import contextmanager
-from typing import Any, List, Optional, Dict
+from contextvars import ContextVar
+from typing import Any, Iterator, List, Optional, Dict
 
 from .pool import PostgreSQLConnectionPool
+from .transaction import Transaction
 
 
 class DatabaseClient:
     def __init__(self, connection_pool: PostgreSQLConnectionPool):
         self._pool = connection_pool
+        # 当前上下文 (线程 / asyncio Task) 中进行中的事务
+        self._current: ContextVar[Optional[Transaction]] = ContextVar(f"lml_tx_{id(self)}", default=None)
+
+    @property
+    def in_transaction(self) -> bool:
+        return self._current.get() is not None
+
+    @contextmanager
+    def transaction(self) -> Iterator[Transaction]:
+        """
+        开启事务: 块内的所有操作共用一条连接，正常退出时提交一次，异常时回滚
+
+        已在事务中时开启 SAVEPOINT，异常只回滚到保存点，外层事务继续。
+        事务绑定在当前上下文 (contextvars)，不同线程 / asyncio Task 互不影响；
+        在块内创建的 Task 会继承该事务，不要在这些 Task 中并发使用同一事务。
+        """
+        current = self._current.get()
+        if current is not None:
+            name = current.begin_savepoint()
+            try:
+                yield current
+            except BaseException:
+                try:
+                    current.rollback_savepoint(name)
+                except Exception:
+                    pass
+                raise
+            current.release_savepoint(name)
+            return
+
+        conn = self._pool.get_connection()
+        tx = Transaction(conn)
+        token = self._current.set(tx)
+        try:
+            try:
+                yield tx
+            except BaseException:
+                try:
+                    conn.rollback()
+                except Exception:
+                    pass
+                raise
+            conn.commit()
+        finally:
+            self._current.reset(token)
+            self._pool.release_connection(conn)
+
+    def _commit(self, conn):
+        """事务外每条语句单独提交，事务内推迟到事务结束"""
+        if self._current.get() is None:
+            conn.commit()
 
     @contextmanager
     def _get_cursor(self):
+        tx = self._current.get()
+        if tx is not None:
+            # 事务内: 复用事务连接，出错时由 transaction() 负责回滚
+            cursor = tx.conn.cursor()
+            try:
+                yield cursor, tx.conn
+            finally:
+                cursor.close()
+            return
+
         conn = self._pool.get_connection()
         try:
             cursor = conn.cursor()
-            yield cursor, conn
-        except Exception:
-            conn.rollback()
-            raise
+            try:
+                yield cursor, conn
+            except Exception:
+                # 连接已断开时回滚也会失败，保留原始异常，由连接池在归还时丢弃该连接
+                try:
+                    conn.rollback()
+                except Exception:
+                    pass
+                raise
+            finally:
+                cursor.close()
         finally:
-            cursor.close()
             self._pool.release_connection(conn)
 
     def execute(self, sql: str, params: Optional[List[Any]] = None) -> int:
         """Execute a write operation (INSERT, UPDATE, DELETE)"""
         with self._get_cursor() as (cursor, conn):
             cursor.execute(sql, params or [])
-            conn.commit()
+            self._commit(conn)
             return cursor.rowcount
 
+    def execute_autocommit(self, sql: str, params: Optional[List[Any]] = None) -> int:
+        """
+        在自动提交模式下执行语句
+
+        用于不能在事务块中执行的语句 (如 CREATE INDEX CONCURRENTLY, VACUUM)
+        """
+        if self._current.get() is not None:
+            raise RuntimeError("execute_autocommit() cannot be used inside a transaction")
+        conn = self._pool.get_connection()
+        previous = conn.autocommit
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute(sql, params or [])
+                return cursor.rowcount
+        finally:
+            try:
+                conn.autocommit = previous
+            except Exception:
+                pass
+            self._pool.release_connection(conn)
+
     def execute_returning(self, sql: str, params: Optional[List[Any]] = None) -> Any:
         """Execute an operation that returns a value (e.g. INSERT ... RETURNING id)"""
         with self._get_cursor() as (cursor, conn):
             cursor.execute(sql, params or [])
             result = cursor.fetchone()
-            conn.commit()
+            self._commit(conn)
             return result[0] if result else None
 
+    def execute_returning_all(self, sql: str, params: Optional[List[Any]] = None) -> List[Any]:
+        """Execute a multi-row operation that returns values (e.g. bulk INSERT ... RETURNING id)"""
+        with self._get_cursor() as (cursor, conn):
+            cursor.execute(sql, params or [])
+            results = cursor.fetchall() if cursor.description is not None else []
+            self._commit(conn)
+            return [row[0] for row in results]
+
     def fetch_all(self, sql: str, params: Optional[List[Any]] = None) -> List[Dict[str, Any]]:
         """Execute a read operation and return list of dicts"""
         with self._get_cursor() as (cursor, conn):
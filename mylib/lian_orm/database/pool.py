@@ -1,55 +1,299 @@
+import time
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+import psycopg2
 from psycopg2 import pool
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+
+class PoolTimeoutError(pool.PoolError):
+    """在 acquire_timeout 内没有等到可用连接"""
+
+
+class _Waiter:
+    """等待队列中的一个请求, 归还的连接 (或空出的名额) 直接交给队首的等待者"""
+    __slots__ = ("event", "conn", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.conn = None
+        self.error: Optional[Exception] = None
 
 
 class PostgreSQLConnectionPool:
     """PostgreSQL 数据库连接池管理类
-    
-    封装了 psycopg2 的 ThreadedConnectionPool，提供连接的获取和释放功能。
+
+    线程安全的连接池，提供连接的获取和释放功能:
+    - 连接耗尽时阻塞等待 (带超时)，等待者按先来先到 (FIFO) 获得连接，形成背压而不是直接抛出 PoolError
+    - 取出空闲过久的连接前执行 pre-ping (SELECT 1)，失效连接自动丢弃重建
+    - 超过 max_lifetime 的连接在取出/归还时回收
+    - 统计等待次数、获取耗时、活跃/空闲连接数与错误数
     """
-    
-    def __init__(self, minconn=1, maxconn=10, **kwargs):
+
+    def __init__(self, minconn=1, maxconn=10, acquire_timeout: float = 30.0,
+                    max_lifetime: Optional[float] = 3600.0, pre_ping: bool = True,
+                    ping_interval: float = 10.0, **kwargs):
         """初始化连接池
-        
+
         Args:
-            minconn: 连接池中的最小连接数
+            minconn: 连接池中的最小连接数 (初始化时建立)
             maxconn: 连接池中的最大连接数
+            acquire_timeout: 获取连接的最长等待时间 (秒)
+            max_lifetime: 单个连接的最长存活时间 (秒)，为空表示不限制
+            pre_ping: 是否在取出空闲连接前检测其可用性
+            ping_interval: 空闲超过该时间 (秒) 的连接才执行 pre-ping，0 表示每次都检测
             **kwargs: 传递给 psycopg2 的连接参数，如 host, port, dbname, user, password 等
         """
-        self._pool = pool.ThreadedConnectionPool(
-            minconn=minconn,
-            maxconn=maxconn,
-            **kwargs
-        )
+        if maxconn < 1 or minconn > maxconn:
+            raise pool.PoolError(f"invalid pool size: minconn={minconn}, maxconn={maxconn}")
+
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.acquire_timeout = acquire_timeout
+        self.max_lifetime = max_lifetime
+        self.pre_ping = pre_ping
+        self.ping_interval = ping_interval
         self._kwargs = kwargs
 
-    def get_connection(self):
+        self._lock = threading.Lock()
+        self._idle: Deque[Any] = deque()            # 空闲连接 (右端最近使用)
+        self._waiters: Deque[_Waiter] = deque()     # 等待队列
+        self._meta: Dict[int, List[float]] = {}     # id(conn) -> [创建时间, 最近归还时间]
+        self._total = 0                             # 已创建 (含正在创建) 的连接数
+        self._closed = False
+
+        self._stats = {
+            "acquires": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "errors": 0,
+            "recycled": 0,
+            "acquire_time_total": 0.0,
+            "acquire_time_max": 0.0,
+        }
+
+        for _ in range(minconn):
+            self._idle.append(self._connect())
+            self._total += 1
+
+    # === 获取与释放 ===
+    def get_connection(self, timeout: Optional[float] = None):
         """获取数据库连接
-        
+
+        Args:
+            timeout: 最长等待时间 (秒)，为空时使用 acquire_timeout
+
         Returns:
             数据库连接对象
+
+        Raises:
+            PoolTimeoutError: 超时仍没有可用连接
+            pool.PoolError: 连接池已关闭
         """
-        return self._pool.getconn()
+        start = time.monotonic()
+        deadline = start + (self.acquire_timeout if timeout is None else timeout)
+
+        conn = self._checkout(deadline)
+        try:
+            if conn is None:
+                conn = self._connect()
+            elif not self._validate(conn):
+                # 沿用该连接占用的名额重建
+                self._discard(conn)
+                conn = self._connect()
+        except Exception:
+            self._give_back_slot()
+            raise
+
+        elapsed = time.monotonic() - start
+        with self._lock:
+            self._stats["acquires"] += 1
+            self._stats["acquire_time_total"] += elapsed
+            self._stats["acquire_time_max"] = max(self._stats["acquire_time_max"], elapsed)
+        return conn
 
     def release_connection(self, conn):
         """释放数据库连接回连接池
-        
+
+        事务未结束的连接会先回滚；已关闭、已损坏或超过存活时间的连接直接丢弃。
+
         Args:
             conn: 要释放的数据库连接对象
         """
-        self._pool.putconn(conn)
+        discard = bool(conn.closed) or self._closed
+        if not discard and self._expired(conn):
+            self._count("recycled")
+            discard = True
+        if not discard:
+            try:
+                if conn.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                self._count("errors")
+                discard = True
+
+        if discard:
+            self._discard(conn)
+            self._give_back_slot()
+            return
+
+        with self._lock:
+            meta = self._meta.get(id(conn))
+            if meta:
+                meta[1] = time.monotonic()
+            if self._waiters:
+                waiter = self._waiters.popleft()
+                waiter.conn = conn
+                waiter.event.set()
+            else:
+                self._idle.append(conn)
 
     def clear_connections(self):
         """关闭所有连接
-        
-        清空连接池中的所有连接。
+
+        关闭空闲连接并拒绝新的获取请求，使用中的连接在归还时关闭。
         """
-        self._pool.closeall()
+        with self._lock:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._total -= len(idle)
+            waiters = list(self._waiters)
+            self._waiters.clear()
+        for conn in idle:
+            self._close_quietly(conn)
+            self._meta.pop(id(conn), None)
+        for waiter in waiters:
+            waiter.error = pool.PoolError("connection pool is closed")
+            waiter.event.set()
 
+    # === 统计 ===
     @property
     def pool_size(self) -> int:
         """获取连接池的最大连接数
-        
+
         Returns:
             连接池的最大连接数
         """
-        return self._pool.maxconn
+        return self.maxconn
+
+    def stats(self) -> Dict[str, Any]:
+        """连接池运行指标
+
+        Returns:
+            total / active / idle / waiting: 当前连接与等待者数量
+            acquires / waits / timeouts / errors / recycled: 累计计数
+            acquire_time_avg_ms / acquire_time_max_ms: 获取连接耗时
+        """
+        with self._lock:
+            acquires = self._stats["acquires"]
+            return {
+                "maxconn": self.maxconn,
+                "total": self._total,
+                "active": self._total - len(self._idle),
+                "idle": len(self._idle),
+                "waiting": len(self._waiters),
+                "acquires": acquires,
+                "waits": self._stats["waits"],
+                "timeouts": self._stats["timeouts"],
+                "errors": self._stats["errors"],
+                "recycled": self._stats["recycled"],
+                "acquire_time_avg_ms": self._stats["acquire_time_total"] / acquires * 1000 if acquires else 0.0,
+                "acquire_time_max_ms": self._stats["acquire_time_max"] * 1000,
+            }
+
+    # === 内部实现 ===
+    def _checkout(self, deadline: float):
+        """取出一个空闲连接; 返回 None 表示获得了新建连接的名额"""
+        with self._lock:
+            if self._closed:
+                raise pool.PoolError("connection pool is closed")
+            # 已有人排队时不插队，保证公平
+            if not self._waiters:
+                if self._idle:
+                    return self._idle.pop()
+                if self._total < self.maxconn:
+                    self._total += 1
+                    return None
+            waiter = _Waiter()
+            self._waiters.append(waiter)
+            self._stats["waits"] += 1
+
+        waiter.event.wait(max(0.0, deadline - time.monotonic()))
+
+        with self._lock:
+            if not waiter.event.is_set():
+                self._waiters.remove(waiter)
+                self._stats["timeouts"] += 1
+                raise PoolTimeoutError(
+                    f"no connection available within timeout (maxconn={self.maxconn}, waiting={len(self._waiters)})"
+                )
+        if waiter.error:
+            raise waiter.error
+        return waiter.conn
+
+    def _give_back_slot(self):
+        """归还一个连接名额: 有等待者时转交给队首 (由其新建连接)，否则名额减一"""
+        with self._lock:
+            if self._waiters and not self._closed:
+                waiter = self._waiters.popleft()
+                waiter.conn = None
+                waiter.event.set()
+            else:
+                self._total -= 1
+
+    def _connect(self):
+        try:
+            conn = psycopg2.connect(**self._kwargs)
+        except Exception:
+            self._count("errors")
+            raise
+        now = time.monotonic()
+        self._meta[id(conn)] = [now, now]
+        return conn
+
+    def _expired(self, conn) -> bool:
+        if self.max_lifetime is None:
+            return False
+        meta = self._meta.get(id(conn))
+        return meta is not None and time.monotonic() - meta[0] > self.max_lifetime
+
+    def _validate(self, conn) -> bool:
+        """检查取出的连接是否可用"""
+        if conn.closed:
+            self._count("errors")
+            return False
+        if self._expired(conn):
+            self._count("recycled")
+            return False
+        if not self.pre_ping:
+            return True
+
+        meta = self._meta.get(id(conn))
+        if meta and time.monotonic() - meta[1] < self.ping_interval:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            self._count("errors")
+            return False
+
+    def _discard(self, conn):
+        self._meta.pop(id(conn), None)
+        self._close_quietly(conn)
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
@@ -0,0 +1,91 @@
+import atexit
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from .pool import PostgreSQLConnectionPool
+
+
+PoolKey = Tuple[Tuple[str, Any], ...]
+
+
+class PoolRegistry:
+    """
+    进程级连接池注册表
+
+    同一 DSN (连接参数完全相同) 只创建一个 PostgreSQLConnectionPool，
+    按引用计数管理生命周期: 最后一个持有者释放时关闭连接池。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pools: Dict[PoolKey, PostgreSQLConnectionPool] = {}
+        self._refs: Dict[PoolKey, int] = {}
+
+    @staticmethod
+    def make_key(**kwargs) -> PoolKey:
+        return tuple(sorted(kwargs.items()))
+
+    def acquire(self, minconn: int = 1, maxconn: int = 10,
+                    pool_options: Optional[Dict[str, Any]] = None, **kwargs) -> PostgreSQLConnectionPool:
+        """
+        获取 (必要时创建) DSN 对应的连接池，并增加引用计数
+
+        Args:
+            minconn / maxconn: 连接池大小
+            pool_options: 其他连接池参数 (acquire_timeout, max_lifetime, pre_ping, ping_interval)
+            **kwargs: psycopg2 连接参数，作为连接池的键
+
+        连接池已存在时沿用首次创建时的参数
+        """
+        key = self.make_key(**kwargs)
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = PostgreSQLConnectionPool(minconn=minconn, maxconn=maxconn, **(pool_options or {}), **kwargs)
+                self._pools[key] = pool
+                self._refs[key] = 0
+            self._refs[key] += 1
+            return pool
+
+    def release(self, pool: PostgreSQLConnectionPool):
+        """减少引用计数，归零时关闭连接池"""
+        with self._lock:
+            key = self._find(pool)
+            if key is None:
+                return
+            self._refs[key] -= 1
+            if self._refs[key] > 0:
+                return
+            del self._pools[key]
+            del self._refs[key]
+        pool.clear_connections()
+
+    def close_all(self):
+        """关闭所有连接池 (进程退出或显式停机时调用)"""
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools.clear()
+            self._refs.clear()
+        for pool in pools:
+            try:
+                pool.clear_connections()
+            except Exception as e:
+                print(f"[PoolRegistry] Failed to close pool: {e}")
+
+    def refcount(self, pool: PostgreSQLConnectionPool) -> int:
+        with self._lock:
+            key = self._find(pool)
+            return self._refs.get(key, 0) if key else 0
+
+    def __len__(self) -> int:
+        return len(self._pools)
+
+    def _find(self, pool: PostgreSQLConnectionPool):
+        for key, value in self._pools.items():
+            if value is pool:
+                return key
+        return None
+
+
+pool_registry = PoolRegistry()
+atexit.register(pool_registry.close_all)
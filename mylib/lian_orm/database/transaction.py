@@ -0,0 +1,47 @@
+from typing import Any, List
+
+
+class Transaction:
+    """
+    一个进行中的数据库事务
+
+    事务期间绑定同一条连接，DatabaseClient 的所有读写都在这条连接上执行，
+    结束时统一提交 (或回滚)。嵌套开启事务时使用 SAVEPOINT。
+    """
+    __slots__ = ("conn", "_savepoints", "_counter")
+
+    def __init__(self, conn: Any):
+        self.conn = conn
+        self._savepoints: List[str] = []
+        self._counter = 0
+
+    @property
+    def depth(self) -> int:
+        """当前嵌套层数，0 表示最外层事务"""
+        return len(self._savepoints)
+
+    def begin_savepoint(self) -> str:
+        self._counter += 1
+        name = f"lml_sp_{self._counter}"
+        self._execute(f"SAVEPOINT {name}")
+        self._savepoints.append(name)
+        return name
+
+    def release_savepoint(self, name: str):
+        self._pop(name)
+        self._execute(f"RELEASE SAVEPOINT {name}")
+
+    def rollback_savepoint(self, name: str):
+        self._pop(name)
+        self._execute(f"ROLLBACK TO SAVEPOINT {name}")
+        # ROLLBACK TO 之后保存点仍然存在，释放掉以免堆积
+        self._execute(f"RELEASE SAVEPOINT {name}")
+
+    def _pop(self, name: str):
+        if not self._savepoints or self._savepoints[-1] != name:
+            raise RuntimeError(f"savepoint {name} is not the innermost one")
+        self._savepoints.pop()
+
+    def _execute(self, statement: str):
+        with self.conn.cursor() as cursor:
+            cursor.execute(statement)
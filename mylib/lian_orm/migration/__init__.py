@@ -0,0 +1,23 @@
+from .migrator import Migrator
+from .diff import MigrationPlan, MigrationStep, VectorIndexOptions, diff_schema
+from .introspect import introspect_schema, table_row_counts, extension_versions, invalid_indexes
+from .vector import recommend_ivfflat_lists, tune_vector_index
+
+
+__all__ = [
+    # 迁移执行
+    "Migrator",
+    # 迁移计划
+    "MigrationPlan",
+    "MigrationStep",
+    "VectorIndexOptions",
+    "diff_schema",
+    # 数据库结构读取
+    "introspect_schema",
+    "table_row_counts",
+    "extension_versions",
+    "invalid_indexes",
+    # 向量索引调优
+    "recommend_ivfflat_lists",
+    "tune_vector_index",
+]
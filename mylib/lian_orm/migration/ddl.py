@@ -0,0 +1,133 @@
+import re
+from typing import List, Optional
+
+from ..schema.metadata import ColumnMeta, IndexMeta, TableMeta
+
+
+# 类型别名 -> PostgreSQL 规范名 (format_type 的输出)
+_TYPE_ALIASES = {
+    "int": "integer", "int4": "integer", "integer": "integer",
+    "serial": "integer", "serial4": "integer",
+    "bigint": "bigint", "int8": "bigint", "bigserial": "bigint", "serial8": "bigint",
+    "smallint": "smallint", "int2": "smallint", "smallserial": "smallint", "serial2": "smallint",
+    "float": "double precision", "float8": "double precision", "double precision": "double precision",
+    "real": "real", "float4": "real",
+    "decimal": "numeric", "numeric": "numeric",
+    "varchar": "character varying", "character varying": "character varying",
+    "char": "character", "character": "character", "bpchar": "character",
+    "bool": "boolean", "boolean": "boolean",
+    "timestamp": "timestamp without time zone",
+    "timestamp without time zone": "timestamp without time zone",
+    "timestamptz": "timestamp with time zone",
+    "timestamp with time zone": "timestamp with time zone",
+}
+
+SERIAL_TYPES = {"serial", "serial4", "bigserial", "serial8", "smallserial", "serial2"}
+
+_TYPE_RE = re.compile(r"^\s*([a-zA-Z_][a-zA-Z0-9_ ]*?)\s*(?:\(\s*([^)]*)\))?\s*(\[\])?\s*$")
+_CAST_RE = re.compile(r"::[a-zA-Z_][a-zA-Z0-9_ ]*(?:\([0-9, ]*\))?(?:\[\])?$")
+
+
+def normalize_type(data_type: str) -> str:
+    """类型规范化, 用于比较 SQL 文件中的写法与数据库中的类型: VARCHAR(64) -> character varying(64)"""
+    match = _TYPE_RE.match(data_type or "")
+    if not match:
+        return (data_type or "").strip().lower()
+    base, args, array = match.groups()
+    base = " ".join(base.lower().split())
+    base = _TYPE_ALIASES.get(base, base)
+    if args:
+        base += "(" + ",".join(a.strip() for a in args.split(",")) + ")"
+    return base + (array or "")
+
+
+def is_serial(data_type: str) -> bool:
+    return (data_type or "").strip().lower() in SERIAL_TYPES
+
+
+def normalize_default(default: Optional[str]) -> Optional[str]:
+    """默认值规范化: 去掉数据库附加的类型转换 ('x'::character varying -> 'x'), 函数名小写"""
+    if default is None:
+        return None
+    value = default.strip()
+    while True:
+        stripped = _CAST_RE.sub("", value).strip()
+        if stripped.startswith("(") and stripped.endswith(")") and stripped.count("(") == 1:
+            stripped = stripped[1:-1].strip()
+        if stripped == value:
+            break
+        value = stripped
+    if not value.startswith("'"):
+        value = value.lower()
+    return value
+
+
+def column_definition(column: ColumnMeta) -> str:
+    """列定义 (用于 CREATE TABLE / ADD COLUMN)"""
+    parts = [quote_ident(column.name), column.data_type]
+    if column.is_primary_key:
+        parts.append("PRIMARY KEY")
+    if not column.is_nullable:
+        parts.append("NOT NULL")
+    if column.default is not None:
+        parts.append(f"DEFAULT {column.default}")
+    if "UNIQUE" in column.constraints:
+        parts.append("UNIQUE")
+    if column.references:
+        parts.append(f"REFERENCES {column.references}")
+        parts.extend(c for c in column.constraints if c.startswith("ON "))
+    return " ".join(parts)
+
+
+def create_table_sql(table: TableMeta) -> str:
+    lines = [f"    {column_definition(col)}" for col in table.columns.values()]
+    if len(table.primary_key) > 1:
+        # 多列主键改为表级约束
+        lines = [f"    {column_definition(_without_pk(col))}" for col in table.columns.values()]
+        lines.append(f"    PRIMARY KEY ({', '.join(quote_ident(c) for c in table.primary_key)})")
+    body = ",\n".join(lines)
+    return f"CREATE TABLE IF NOT EXISTS {quote_ident(table.name)} (\n{body}\n)"
+
+
+def create_index_sql(index: IndexMeta, concurrently: bool = False, name: Optional[str] = None) -> str:
+    """CREATE INDEX 语句, name 用于以临时名称重建"""
+    elements: List[str] = []
+    for col in index.columns:
+        opclass = index.opclasses.get(col)
+        elements.append(f"{quote_ident(col)} {opclass}" if opclass else quote_ident(col))
+
+    sql = "CREATE "
+    if index.unique:
+        sql += "UNIQUE "
+    sql += "INDEX "
+    if concurrently:
+        sql += "CONCURRENTLY "
+    sql += f"IF NOT EXISTS {quote_ident(name or index.name)} ON {quote_ident(index.table_name)}"
+    if index.method:
+        sql += f" USING {index.method}"
+    sql += f" ({', '.join(elements)})"
+    if index.options:
+        sql += " WITH (" + ", ".join(f"{k} = {v}" for k, v in index.options.items()) + ")"
+    return sql
+
+
+_PLAIN_IDENT = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+
+def quote_ident(name: str) -> str:
+    """标识符只有在需要时才加双引号"""
+    if _PLAIN_IDENT.match(name):
+        return name
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _without_pk(column: ColumnMeta) -> ColumnMeta:
+    return ColumnMeta(
+        name=column.name,
+        data_type=column.data_type,
+        is_nullable=column.is_nullable,
+        default=column.default,
+        references=column.references,
+        constraints=column.constraints,
+        description=column.description,
+    )
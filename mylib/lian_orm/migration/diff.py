@@ -0,0 +1,245 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+
+from ..schema.metadata import SchemaMeta, TableMeta, IndexMeta
+from .ddl import (
+    normalize_type,
+    normalize_default,
+    is_serial,
+    quote_ident,
+    column_definition,
+    create_table_sql,
+    create_index_sql,
+)
+from .vector import is_vector_index, tune_vector_index, lists_drifted
+
+
+@dataclass
+class MigrationStep:
+    """
+    迁移计划中的一步
+
+    sql: 要执行的语句
+    description: 说明
+    kind: 类别 (extension / table / column / index)
+    concurrent: 是否为 CONCURRENTLY 语句 (不能在事务中执行)
+    destructive: 是否会删除数据或索引 (默认不执行)
+    """
+    sql: str
+    description: str
+    kind: str
+    concurrent: bool = False
+    destructive: bool = False
+
+
+@dataclass
+class MigrationPlan:
+    """迁移计划: 按执行顺序排列的步骤"""
+    steps: List[MigrationStep] = field(default_factory=list)
+
+    def add(self, sql: str, description: str, kind: str, concurrent: bool = False, destructive: bool = False):
+        self.steps.append(MigrationStep(sql, description, kind, concurrent, destructive))
+
+    @property
+    def empty(self) -> bool:
+        return not self.steps
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    def __iter__(self):
+        return iter(self.steps)
+
+    def render(self, include_destructive: bool = True) -> str:
+        """渲染为可直接执行的 SQL 脚本"""
+        lines = []
+        for step in self.steps:
+            if step.destructive and not include_destructive:
+                continue
+            prefix = "-- [destructive] " if step.destructive else "-- "
+            lines.append(f"{prefix}{step.description}")
+            lines.append(f"{step.sql};")
+        return "\n".join(lines)
+
+
+@dataclass
+class VectorIndexOptions:
+    """
+    向量索引调优参数
+
+    strategy: "auto" / "ivfflat" / "hnsw" / "keep" (保持 SQL 文件中的定义)
+    hnsw_available: pgvector 是否支持 HNSW
+    min_ivfflat_rows: auto 模式下低于该行数时改用 HNSW
+    """
+    strategy: str = "auto"
+    hnsw_available: bool = True
+    min_ivfflat_rows: int = 10000
+    hnsw_m: int = 16
+    hnsw_ef_construction: int = 64
+    drift_factor: float = 2.0
+
+
+def diff_schema(current: SchemaMeta,
+                target: SchemaMeta,
+                row_counts: Optional[Dict[str, int]] = None,
+                vector: Optional[VectorIndexOptions] = None,
+                invalid: Optional[Set[str]] = None) -> MigrationPlan:
+    """
+    比较数据库现状与目标 Schema, 生成最小迁移计划
+
+    - 缺少的扩展 / 表 / 列 / 索引: 创建
+    - 列类型、NOT NULL、默认值不同: ALTER COLUMN
+    - 已有表上的索引使用 CREATE INDEX CONCURRENTLY, 不阻塞写入
+    - 定义变化的索引: 以临时名称并发创建新索引, 并发删除旧索引后改名
+    - 向量索引按表行数调整参数 (见 tune_vector_index)
+    - 目标中不存在的列 / 索引: 生成 destructive 步骤
+    - 并发建索引中断遗留的无效索引: 删除后重建
+
+    Args:
+        current: 数据库现状 (introspect_schema)
+        target: 目标 Schema (SQL 文件)
+        row_counts: 表行数 (table_row_counts), 为空时按 0 行处理
+        vector: 向量索引调优参数
+        invalid: 无效索引名 (invalid_indexes), 先删除再按目标定义重建
+    """
+    row_counts = row_counts or {}
+    vector = vector or VectorIndexOptions()
+    plan = MigrationPlan()
+
+    installed = {ext.name for ext in current.extensions}
+    for ext in target.extensions:
+        if ext.name not in installed:
+            plan.add(f"CREATE EXTENSION IF NOT EXISTS {quote_ident(ext.name)}",
+                        f"安装扩展 {ext.name}", "extension")
+
+    # 新表按 SQL 文件中的顺序创建 (外键依赖)
+    for table in target.tables.values():
+        if table.name not in current.tables:
+            plan.add(create_table_sql(table), f"创建表 {table.name}", "table")
+            for index in table.indices.values():
+                index = _tune(index, row_counts.get(table.name, 0), vector, None)
+                plan.add(create_index_sql(index), f"创建索引 {index.name}", "index")
+
+    for table in target.tables.values():
+        existing = current.tables.get(table.name)
+        if existing is not None:
+            _diff_columns(plan, existing, table)
+
+    for table in target.tables.values():
+        existing = current.tables.get(table.name)
+        if existing is not None:
+            _diff_indices(plan, existing, table, row_counts.get(table.name, 0), vector, invalid or set())
+
+    return plan
+
+
+def _diff_columns(plan: MigrationPlan, current: TableMeta, target: TableMeta):
+    table = quote_ident(target.name)
+    for column in target.columns.values():
+        have = current.columns.get(column.name)
+        name = quote_ident(column.name)
+        if have is None:
+            plan.add(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column_definition(column)}",
+                        f"新增列 {target.name}.{column.name}", "column")
+            continue
+
+        want_type = normalize_type(column.data_type)
+        if want_type != normalize_type(have.data_type):
+            plan.add(f"ALTER TABLE {table} ALTER COLUMN {name} TYPE {column.data_type}",
+                        f"修改列类型 {target.name}.{column.name}: {have.data_type} -> {want_type}", "column")
+
+        want_not_null = column.is_primary_key or not column.is_nullable
+        have_not_null = have.is_primary_key or not have.is_nullable
+        if want_not_null and not have_not_null:
+            plan.add(f"ALTER TABLE {table} ALTER COLUMN {name} SET NOT NULL",
+                        f"{target.name}.{column.name} 设为 NOT NULL", "column")
+        elif have_not_null and not want_not_null and not have.is_primary_key:
+            plan.add(f"ALTER TABLE {table} ALTER COLUMN {name} DROP NOT NULL",
+                        f"{target.name}.{column.name} 允许 NULL", "column")
+
+        # SERIAL 列的默认值是序列, 由数据库维护
+        if is_serial(column.data_type):
+            continue
+        want_default = normalize_default(column.default)
+        if want_default != normalize_default(have.default):
+            if column.default is None:
+                plan.add(f"ALTER TABLE {table} ALTER COLUMN {name} DROP DEFAULT",
+                            f"删除默认值 {target.name}.{column.name}", "column")
+            else:
+                plan.add(f"ALTER TABLE {table} ALTER COLUMN {name} SET DEFAULT {column.default}",
+                            f"修改默认值 {target.name}.{column.name}: {have.default} -> {column.default}", "column")
+
+    for column in current.columns.values():
+        if column.name not in target.columns:
+            plan.add(f"ALTER TABLE {table} DROP COLUMN {quote_ident(column.name)}",
+                        f"删除列 {target.name}.{column.name}", "column", destructive=True)
+
+
+def _diff_indices(plan: MigrationPlan, current: TableMeta, target: TableMeta, rows: int,
+                    vector: VectorIndexOptions, invalid: Set[str]):
+    for index in target.indices.values():
+        have = current.indices.get(index.name)
+        index = _tune(index, rows, vector, have)
+        if have is None:
+            for name in (index.name, f"{index.name}_new"):
+                if name in invalid:
+                    plan.add(f"DROP INDEX CONCURRENTLY IF EXISTS {quote_ident(name)}",
+                                f"删除无效索引 {name}", "index", concurrent=True)
+            plan.add(create_index_sql(index, concurrently=True),
+                        f"并发创建索引 {index.name}", "index", concurrent=True)
+            continue
+        reason = _index_changed(have, index, vector)
+        if reason is None:
+            continue
+        temp_name = f"{index.name}_new"
+        if temp_name in invalid:
+            plan.add(f"DROP INDEX CONCURRENTLY IF EXISTS {quote_ident(temp_name)}",
+                        f"删除无效索引 {temp_name}", "index", concurrent=True)
+        # 先建后删, 重建期间查询仍可使用旧索引
+        plan.add(create_index_sql(index, concurrently=True, name=temp_name),
+                    f"重建索引 {index.name} ({reason})", "index", concurrent=True)
+        plan.add(f"DROP INDEX CONCURRENTLY IF EXISTS {quote_ident(index.name)}",
+                    f"删除旧索引 {index.name}", "index", concurrent=True)
+        plan.add(f"ALTER INDEX {quote_ident(temp_name)} RENAME TO {quote_ident(index.name)}",
+                    f"新索引改名为 {index.name}", "index")
+
+    for name in current.indices:
+        if name not in target.indices:
+            plan.add(f"DROP INDEX CONCURRENTLY IF EXISTS {quote_ident(name)}",
+                        f"删除索引 {name}", "index", concurrent=True, destructive=True)
+
+
+def _tune(index: IndexMeta, rows: int, vector: VectorIndexOptions, current: Optional[IndexMeta]) -> IndexMeta:
+    if vector.strategy == "keep" or not is_vector_index(index):
+        return index
+    return tune_vector_index(
+        index, rows,
+        strategy=vector.strategy,
+        hnsw_available=vector.hnsw_available,
+        current=current,
+        min_ivfflat_rows=vector.min_ivfflat_rows,
+        hnsw_m=vector.hnsw_m,
+        hnsw_ef_construction=vector.hnsw_ef_construction,
+    )
+
+
+def _index_changed(have: IndexMeta, want: IndexMeta, vector: VectorIndexOptions) -> Optional[str]:
+    """返回索引需要重建的原因, 无需重建时返回 None"""
+    have_method = (have.method or "btree").lower()
+    want_method = (want.method or "btree").lower()
+    if have_method != want_method:
+        return f"{have_method} -> {want_method}"
+    if list(have.columns) != list(want.columns):
+        return "列变化"
+    if have.unique != want.unique:
+        return "唯一性变化"
+    if {k: v.lower() for k, v in have.opclasses.items()} != {k: v.lower() for k, v in want.opclasses.items()}:
+        return "操作符类变化"
+    if is_vector_index(want) and vector.strategy != "keep":
+        # 调优得到的参数随行数变化, 只在偏离较大时重建
+        if want_method == "ivfflat" and lists_drifted(have, want, vector.drift_factor):
+            return f"lists {have.options.get('lists', '100')} -> {want.options['lists']}"
+        return None
+    if have.options != want.options:
+        return "参数变化"
+    return None
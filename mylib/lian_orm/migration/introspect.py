@@ -0,0 +1,214 @@
+from typing import Dict, Optional, Set
+
+from ..schema.metadata import SchemaMeta, TableMeta, ColumnMeta, IndexMeta, ExtensionMeta
+
+
+_COLUMNS_SQL = """
+SELECT c.relname AS table_name,
+       a.attname AS column_name,
+       format_type(a.atttypid, a.atttypmod) AS data_type,
+       a.attnotnull AS not_null,
+       pg_get_expr(d.adbin, d.adrelid) AS column_default
+FROM pg_attribute a
+JOIN pg_class c ON c.oid = a.attrelid
+JOIN pg_namespace n ON n.oid = c.relnamespace
+LEFT JOIN pg_attrdef d ON d.adrelid = a.attrelid AND d.adnum = a.attnum
+WHERE n.nspname = %s AND c.relkind IN ('r', 'p')
+  AND a.attnum > 0 AND NOT a.attisdropped
+ORDER BY c.relname, a.attnum
+"""
+
+_PRIMARY_KEYS_SQL = """
+SELECT c.relname AS table_name, a.attname AS column_name
+FROM pg_index i
+JOIN pg_class c ON c.oid = i.indrelid
+JOIN pg_namespace n ON n.oid = c.relnamespace
+JOIN LATERAL unnest(i.indkey::int2[]) WITH ORDINALITY AS k(attnum, ord) ON true
+JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum = k.attnum
+WHERE n.nspname = %s AND i.indisprimary
+ORDER BY c.relname, k.ord
+"""
+
+_FOREIGN_KEYS_SQL = """
+SELECT c.relname AS table_name,
+       a.attname AS column_name,
+       rc.relname AS ref_table,
+       ra.attname AS ref_column,
+       con.confdeltype AS on_delete,
+       con.confupdtype AS on_update
+FROM pg_constraint con
+JOIN pg_class c ON c.oid = con.conrelid
+JOIN pg_namespace n ON n.oid = c.relnamespace
+JOIN pg_class rc ON rc.oid = con.confrelid
+JOIN pg_attribute a ON a.attrelid = con.conrelid AND a.attnum = con.conkey[1]
+JOIN pg_attribute ra ON ra.attrelid = con.confrelid AND ra.attnum = con.confkey[1]
+WHERE n.nspname = %s AND con.contype = 'f' AND array_length(con.conkey, 1) = 1
+"""
+
+_UNIQUE_SQL = """
+SELECT c.relname AS table_name, a.attname AS column_name
+FROM pg_constraint con
+JOIN pg_class c ON c.oid = con.conrelid
+JOIN pg_namespace n ON n.oid = c.relnamespace
+JOIN pg_attribute a ON a.attrelid = con.conrelid AND a.attnum = con.conkey[1]
+WHERE n.nspname = %s AND con.contype = 'u' AND array_length(con.conkey, 1) = 1
+"""
+
+# 不含由约束 (主键 / 唯一约束) 自动创建的索引
+_INDEXES_SQL = """
+SELECT t.relname AS table_name,
+       ic.relname AS index_name,
+       am.amname AS method,
+       i.indisunique AS is_unique,
+       ic.reloptions AS options,
+       pg_get_indexdef(i.indexrelid) AS definition,
+       array_agg(a.attname ORDER BY k.ord) AS columns,
+       array_agg(opc.opcname ORDER BY k.ord) AS opclasses,
+       array_agg(opc.opcdefault ORDER BY k.ord) AS opclass_defaults
+FROM pg_index i
+JOIN pg_class ic ON ic.oid = i.indexrelid
+JOIN pg_class t ON t.oid = i.indrelid
+JOIN pg_namespace n ON n.oid = t.relnamespace
+JOIN pg_am am ON am.oid = ic.relam
+JOIN LATERAL unnest(i.indkey::int2[], i.indclass::oid[]) WITH ORDINALITY AS k(attnum, opclass, ord) ON true
+JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = k.attnum
+JOIN pg_opclass opc ON opc.oid = k.opclass
+WHERE n.nspname = %s AND i.indisvalid
+  AND NOT EXISTS (SELECT 1 FROM pg_constraint con WHERE con.conindid = i.indexrelid)
+GROUP BY t.relname, ic.relname, am.amname, i.indisunique, ic.reloptions, i.indexrelid
+ORDER BY t.relname, ic.relname
+"""
+
+# CREATE INDEX CONCURRENTLY 失败后遗留的无效索引
+_INVALID_INDEXES_SQL = """
+SELECT ic.relname AS index_name
+FROM pg_index i
+JOIN pg_class ic ON ic.oid = i.indexrelid
+JOIN pg_namespace n ON n.oid = ic.relnamespace
+WHERE n.nspname = %s AND NOT i.indisvalid
+"""
+
+_EXTENSIONS_SQL = "SELECT extname, extversion FROM pg_extension ORDER BY extname"
+
+_ROW_ESTIMATES_SQL = """
+SELECT c.relname AS table_name, c.reltuples::bigint AS estimate
+FROM pg_class c
+JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE n.nspname = %s AND c.relkind IN ('r', 'p')
+"""
+
+# pg_constraint.confdeltype / confupdtype
+_FK_ACTIONS = {"c": "CASCADE", "n": "SET NULL", "d": "SET DEFAULT", "r": "RESTRICT"}
+
+
+def introspect_schema(db, schema: str = "public") -> SchemaMeta:
+    """
+    读取数据库中的表结构 (pg_catalog), 生成与 SqlParser 输出可比较的 SchemaMeta
+
+    Args:
+        db: DatabaseClient
+        schema: 数据库 schema 名
+    """
+    result = SchemaMeta()
+
+    for row in db.fetch_all(_COLUMNS_SQL, [schema]):
+        table = result.tables.get(row["table_name"])
+        if table is None:
+            table = TableMeta(name=row["table_name"])
+            result.add_table(table)
+        table.columns[row["column_name"]] = ColumnMeta(
+            name=row["column_name"],
+            data_type=row["data_type"],
+            is_nullable=not row["not_null"],
+            default=row["column_default"],
+        )
+
+    for row in db.fetch_all(_PRIMARY_KEYS_SQL, [schema]):
+        table = result.tables.get(row["table_name"])
+        if table and row["column_name"] in table.columns:
+            table.primary_key.append(row["column_name"])
+            table.columns[row["column_name"]].is_primary_key = True
+
+    for row in db.fetch_all(_FOREIGN_KEYS_SQL, [schema]):
+        column = _column(result, row["table_name"], row["column_name"])
+        if column is None:
+            continue
+        column.references = f"{row['ref_table']}({row['ref_column']})"
+        for prefix, action in (("ON DELETE", row["on_delete"]), ("ON UPDATE", row["on_update"])):
+            if action in _FK_ACTIONS:
+                column.constraints.append(f"{prefix} {_FK_ACTIONS[action]}")
+
+    for row in db.fetch_all(_UNIQUE_SQL, [schema]):
+        column = _column(result, row["table_name"], row["column_name"])
+        if column is not None:
+            column.constraints.append("UNIQUE")
+
+    for row in db.fetch_all(_INDEXES_SQL, [schema]):
+        table = result.tables.get(row["table_name"])
+        if table is None:
+            continue
+        columns = list(row["columns"])
+        # 只记录非默认的操作符类, 与 SQL 文件的写法一致
+        opclasses = {
+            col: opc for col, opc, is_default in zip(columns, row["opclasses"], row["opclass_defaults"])
+            if not is_default
+        }
+        table.indices[row["index_name"]] = IndexMeta(
+            name=row["index_name"],
+            table_name=row["table_name"],
+            columns=columns,
+            method=row["method"],
+            unique=row["is_unique"],
+            definition=row["definition"],
+            opclasses=opclasses,
+            options=_parse_reloptions(row["options"]),
+        )
+
+    for row in db.fetch_all(_EXTENSIONS_SQL):
+        if row["extname"] != "plpgsql":
+            result.extensions.append(ExtensionMeta(name=row["extname"]))
+
+    return result
+
+
+def extension_versions(db) -> Dict[str, str]:
+    """已安装扩展 -> 版本号"""
+    return {row["extname"]: row["extversion"] for row in db.fetch_all(_EXTENSIONS_SQL)}
+
+
+def invalid_indexes(db, schema: str = "public") -> Set[str]:
+    """无效索引名 (并发建索引中断后遗留, 不参与查询, 需要删除后重建)"""
+    return {row["index_name"] for row in db.fetch_all(_INVALID_INDEXES_SQL, [schema])}
+
+
+def table_row_counts(db, schema: str = "public", exact: bool = False) -> Dict[str, int]:
+    """
+    各表行数, 用于调整向量索引参数
+
+    默认使用 pg_class.reltuples 估计值; 从未 ANALYZE 的表 (reltuples < 0) 或 exact=True 时执行 count(*)
+    """
+    counts: Dict[str, int] = {}
+    for row in db.fetch_all(_ROW_ESTIMATES_SQL, [schema]):
+        estimate = row["estimate"]
+        if exact or estimate is None or estimate < 0:
+            table = row["table_name"].replace('"', '""')
+            count = db.fetch_one(f'SELECT count(*) AS n FROM "{schema}"."{table}"')
+            estimate = count["n"] if count else 0
+        counts[row["table_name"]] = int(estimate)
+    return counts
+
+
+def _column(schema: SchemaMeta, table_name: str, column_name: str) -> Optional[ColumnMeta]:
+    table = schema.tables.get(table_name)
+    if table is None:
+        return None
+    return table.columns.get(column_name)
+
+
+def _parse_reloptions(options) -> Dict[str, str]:
+    """reloptions: ['lists=100'] -> {'lists': '100'}"""
+    parsed: Dict[str, str] = {}
+    for item in options or []:
+        key, _, value = item.partition("=")
+        parsed[key] = value
+    return parsed
@@ -0,0 +1,103 @@
+from dataclasses import replace
+from typing import List, Optional
+
+from ..schema.metadata import SchemaMeta
+from .diff import MigrationPlan, MigrationStep, VectorIndexOptions, diff_schema
+from .introspect import introspect_schema, table_row_counts, extension_versions, invalid_indexes
+
+
+# pgvector 从 0.5.0 开始支持 HNSW
+HNSW_MIN_VERSION = (0, 5, 0)
+
+
+class Migrator:
+    """
+    Schema 迁移: 读取数据库现状, 与目标 Schema (LML_SQL.sql) 比较并执行最小变更
+
+    用法:
+        migrator = Migrator(db_client, schema_manager.schema)
+        plan = migrator.plan()
+        print(plan.render())
+        migrator.apply(plan)
+    """
+
+    def __init__(self, db, target: SchemaMeta, schema: str = "public",
+                    vector: Optional[VectorIndexOptions] = None,
+                    lock_timeout: Optional[str] = "5s"):
+        """
+        Args:
+            db: DatabaseClient
+            target: 目标 Schema
+            schema: 数据库 schema 名
+            vector: 向量索引调优参数
+            lock_timeout: DDL 等待锁的最长时间, 避免 ALTER TABLE 长时间排队阻塞其他查询; 为空表示不限制
+        """
+        self.db = db
+        self.target = target
+        self.schema = schema
+        self.vector = vector or VectorIndexOptions()
+        self.lock_timeout = lock_timeout
+
+    def introspect(self) -> SchemaMeta:
+        """读取数据库当前的 Schema"""
+        return introspect_schema(self.db, self.schema)
+
+    def plan(self, current: Optional[SchemaMeta] = None) -> MigrationPlan:
+        """生成迁移计划 (不执行)"""
+        if current is None:
+            current = self.introspect()
+        row_counts = table_row_counts(self.db, self.schema)
+        vector = self.vector
+        version = extension_versions(self.db).get("vector")
+        if version is not None and _parse_version(version) < HNSW_MIN_VERSION:
+            vector = replace(vector, hnsw_available=False)
+        return diff_schema(current, self.target, row_counts, vector, invalid_indexes(self.db, self.schema))
+
+    def apply(self, plan: Optional[MigrationPlan] = None, allow_destructive: bool = False) -> List[MigrationStep]:
+        """
+        执行迁移计划
+
+        连续的普通步骤合并到一个事务中执行, CONCURRENTLY 步骤在事务外逐条执行。
+        某一步失败时抛出异常, 之前已提交的步骤不会回滚 (计划可重复执行, 已完成的步骤不会再生成)。
+
+        Args:
+            plan: 迁移计划, 为空时重新生成
+            allow_destructive: 是否执行删除列 / 索引的步骤
+
+        Returns:
+            已执行的步骤
+        """
+        if plan is None:
+            plan = self.plan()
+        steps = [s for s in plan if allow_destructive or not s.destructive]
+
+        applied: List[MigrationStep] = []
+        batch: List[MigrationStep] = []
+        for step in steps:
+            if step.concurrent:
+                self._run_batch(batch, applied)
+                batch = []
+                self.db.execute_autocommit(step.sql)
+                applied.append(step)
+            else:
+                batch.append(step)
+        self._run_batch(batch, applied)
+        return applied
+
+    def _run_batch(self, batch: List[MigrationStep], applied: List[MigrationStep]):
+        if not batch:
+            return
+        with self.db.transaction():
+            if self.lock_timeout:
+                self.db.execute(f"SET LOCAL lock_timeout = '{self.lock_timeout}'")
+            for step in batch:
+                self.db.execute(step.sql)
+        applied.extend(batch)
+
+
+def _parse_version(version: str) -> tuple:
+    parts: List[int] = []
+    for part in version.split("."):
+        digits = "".join(ch for ch in part if ch.isdigit())
+        parts.append(int(digits) if digits else 0)
+    return tuple(parts)
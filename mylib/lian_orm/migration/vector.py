@@ -0,0 +1,77 @@
+import math
+from dataclasses import replace
+from typing import Optional
+
+from ..schema.metadata import IndexMeta
+
+
+VECTOR_METHODS = ("ivfflat", "hnsw")
+
+
+def is_vector_index(index: IndexMeta) -> bool:
+    return (index.method or "").lower() in VECTOR_METHODS
+
+
+def recommend_ivfflat_lists(row_count: int) -> int:
+    """pgvector 建议: 100 万行以内 lists = rows / 1000, 更多时 lists = sqrt(rows)"""
+    if row_count <= 1_000_000:
+        return max(1, row_count // 1000)
+    return int(math.sqrt(row_count))
+
+
+def tune_vector_index(index: IndexMeta,
+                        row_count: int,
+                        strategy: str = "auto",
+                        hnsw_available: bool = True,
+                        current: Optional[IndexMeta] = None,
+                        min_ivfflat_rows: int = 10000,
+                        hnsw_m: int = 16,
+                        hnsw_ef_construction: int = 64) -> IndexMeta:
+    """
+    按表的行数调整向量索引的构建参数, 返回新的 IndexMeta (不修改传入的对象)
+
+    ivfflat 在建索引时按已有数据训练聚类中心, 空表上建出的索引召回率很差,
+    SQL 文件中固定的 lists = 100 也不会随数据增长而调整。
+
+    Args:
+        index: SQL 文件中声明的索引
+        row_count: 表的 (估计) 行数
+        strategy: "auto" / "ivfflat" / "hnsw"
+            - auto: 数据量不足 min_ivfflat_rows 且 pgvector 支持 HNSW 时改用 HNSW,
+                    已经是 HNSW 的索引保持不变; 否则使用 ivfflat 并按行数计算 lists
+        hnsw_available: pgvector 是否支持 HNSW (>= 0.5.0)
+        current: 数据库中现有的同名索引
+    """
+    if not is_vector_index(index):
+        return index
+
+    method = (index.method or "").lower()
+    if strategy == "hnsw" and hnsw_available:
+        method = "hnsw"
+    elif strategy == "ivfflat":
+        method = "ivfflat"
+    elif strategy == "auto":
+        current_method = (current.method or "").lower() if current else ""
+        if hnsw_available and (current_method == "hnsw" or row_count < min_ivfflat_rows):
+            method = "hnsw"
+        else:
+            method = "ivfflat"
+
+    if method == "hnsw" and not hnsw_available:
+        method = "ivfflat"
+
+    if method == "hnsw":
+        options = {"m": str(hnsw_m), "ef_construction": str(hnsw_ef_construction)}
+    else:
+        options = {"lists": str(recommend_ivfflat_lists(row_count))}
+    return replace(index, method=method, options=options)
+
+
+def lists_drifted(current: IndexMeta, target: IndexMeta, factor: float = 2.0) -> bool:
+    """现有 ivfflat 索引的 lists 与建议值相差超过 factor 倍时需要重建"""
+    try:
+        have = int(current.options.get("lists", "100"))
+        want = int(target.options.get("lists", "100"))
+    except ValueError:
+        return False
+    return max(have, want) > factor * max(1, min(have, want))
@@ -1,12 +1,16 @@
 import inspect
+import threading
 import importlib
 from pathlib import Path
-from typing import Dict, Any, Optional, Callable, List, TYPE_CHECKING
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Callable, Iterator, List, TYPE_CHECKING
 
 from .config import load_sql_config
-from .database.pool import PostgreSQLConnectionPool
+from .database.registry import pool_registry
 from .database.client import DatabaseClient
 from .schema.manager import SchemaManager
+from .unit_of_work import UnitOfWork
+from .migration import Migrator, VectorIndexOptions
 from .repository import MemoryLogRepo, TasksRepo, TaskStepsRepo, ToolCallsRepo
 
 if TYPE_CHECKING:
@@ -49,14 +53,27 @@ class Sql:
         if missing:
             raise ValueError(f"数据库连接参数不完整, 请提供{missing}")
         
-        # 创建数据库连接池
-        self.connection_pool = PostgreSQLConnectionPool(
+        self.minconn = int(getattr(self.cfg.Postgresql, 'minconn', 1))
+        self.maxconn = int(getattr(self.cfg.Postgresql, 'maxconn', 10))
+        pool_options = {
+            "acquire_timeout": float(getattr(self.cfg.Postgresql, 'acquire_timeout', 30.0)),
+            "max_lifetime": float(getattr(self.cfg.Postgresql, 'max_lifetime', 3600.0)) or None,
+            "pre_ping": bool(getattr(self.cfg.Postgresql, 'pre_ping', True)),
+            "ping_interval": float(getattr(self.cfg.Postgresql, 'ping_interval', 10.0)),
+        }
+        
+        # 获取数据库连接池 (相同 DSN 在进程内共享同一个连接池)
+        self.connection_pool = pool_registry.acquire(
+            minconn=self.minconn,
+            maxconn=self.maxconn,
+            pool_options=pool_options,
             host=self.host,
             port=self.port,
             dbname=self.dbname,
             user=self.user,
             password=self.password
         )
+        self._closed = False
         
         # 创建数据库客户端
         self.db_client = DatabaseClient(self.connection_pool)
@@ -87,6 +104,42 @@ class Sql:
     def tool_calls(self) -> "ToolCallsRepo":
         return self._repos.get("tool_calls")
     
+    @contextmanager
+    def transaction(self) -> Iterator[UnitOfWork]:
+        """开启事务，返回工作单元
+        
+        块内所有 Repo 操作共用一条连接，正常退出时提交一次，异常时整体回滚；
+        在事务内再次调用时开启 SAVEPOINT。
+        
+        Yields:
+            UnitOfWork 实例
+        """
+        with self.db_client.transaction() as tx:
+            yield UnitOfWork(self, tx)
+    
+    def migrator(self, schema: str = "public", vector_index: Optional[str] = None) -> Migrator:
+        """创建 Schema 迁移器, 目标为 LML_SQL.sql
+        
+        参数默认读取配置文件的 [Migration] 段
+        
+        Args:
+            schema: 数据库 schema 名
+            vector_index: 向量索引策略 auto / ivfflat / hnsw / keep
+            
+        Returns:
+            Migrator 实例, 用法见 migrator.plan() / migrator.apply()
+        """
+        section = getattr(self.cfg, 'Migration', None)
+        vector = VectorIndexOptions(
+            strategy=vector_index or getattr(section, 'vector_index', 'auto'),
+            min_ivfflat_rows=int(getattr(section, 'min_ivfflat_rows', 10000)),
+            hnsw_m=int(getattr(section, 'hnsw_m', 16)),
+            hnsw_ef_construction=int(getattr(section, 'hnsw_ef_construction', 64)),
+        )
+        lock_timeout = getattr(section, 'lock_timeout', '5s') or None
+        return Migrator(self.db_client, self.schema_manager.schema, schema=schema,
+                        vector=vector, lock_timeout=lock_timeout)
+    
     def _load_repos(self):
         """动态加载所有的Repo类
         
@@ -197,10 +250,54 @@ class Sql:
             print(f"数据库连接失败: {e}")
             return False
     
+    def close(self):
+        """释放对连接池的引用，最后一个引用释放时连接池关闭"""
+        if getattr(self, '_closed', True):
+            return
+        self._closed = True
+        pool_registry.release(self.connection_pool)
+
     def __del__(self):
-        """析构函数，关闭连接池"""
-        if hasattr(self, 'connection_pool'):
-            self.connection_pool.clear_connections()
+        """析构函数，释放连接池引用"""
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+# === 进程级共享实例 ===
+_shared: Dict[tuple, Sql] = {}
+_shared_lock = threading.Lock()
+
+
+def get_sql(host: Optional[str] = None, port: Optional[int] = None, 
+                dbname: Optional[str] = None, user: Optional[str] = None, 
+                passwd: Optional[str] = None, config_path: Optional[str] = None) -> Sql:
+    """获取进程级共享的 Sql 实例
+    
+    参数相同的调用返回同一个实例, 避免每个 Agent 各自创建 Sql 与连接池。
+    参数含义同 Sql.__init__
+    """
+    key = (host, port, dbname, user, passwd, config_path)
+    sql = _shared.get(key)
+    if sql is not None:
+        return sql
+    with _shared_lock:
+        sql = _shared.get(key)
+        if sql is None:
+            sql = Sql(host=host, port=port, dbname=dbname, user=user, passwd=passwd, config_path=config_path)
+            _shared[key] = sql
+        return sql
+
+
+def shutdown():
+    """显式停机: 释放所有共享 Sql 实例并关闭全部连接池"""
+    with _shared_lock:
+        instances = list(_shared.values())
+        _shared.clear()
+    for sql in instances:
+        sql.close()
+    pool_registry.close_all()
 
 
 if __name__ == "__main__":
@@ -1,12 +1,13 @@
 from enum import Enum
 from abc import ABC, abstractmethod
-from typing import Any, List, Optional, Dict, Generic, Type
+from typing import Any, Iterable, List, Optional, Dict, Generic, Type
 
 from ..database.client import DatabaseClient
 from ..mapper.converter import DataConverter
 from ..models.core.BaseModel import RelationalModel
 from ..models.core.Type import T
 from ..schema.metadata import TableMeta
+from .query import Query, Q, split_lookup, compile_condition
 
 
 class BaseRepo(ABC, Generic[T]):
@@ -90,42 +91,98 @@ class BaseRepo(ABC, Generic[T]):
             
         return model_instance
 
+    def create_many(self, model_instances: List[T]) -> List[T]:
+        """
+        批量创建记录, 字段集合相同的实例合并为一条多行 INSERT
+
+        Args:
+            model_instances: 数据模型实例列表
+
+        Returns:
+            创建后的模型实例列表 (包含生成的ID) 
+        """
+        if not self._can_create:
+            raise ValueError(f"表 '{self.get_table_name()}' 不允许创建操作")
+
+        # 1. 导出并转换数据, 按字段集合分组
+        groups: Dict[tuple, List[tuple]] = {}
+        for model_instance in model_instances:
+            data = model_instance.model_dump(exclude_unset=True, exclude_none=True)
+            data.pop('id', None)
+            for field in ['created_at', 'updated_at']:
+                data.pop(field, None)
+
+            sql_data = DataConverter.python_to_sql(data, self._table_meta)
+            if not sql_data:
+                raise ValueError("没有可插入的数据")
+
+            columns = tuple(sql_data.keys())
+            groups.setdefault(columns, []).append((model_instance, list(sql_data.values())))
+
+        # 2. 每组构建一条多行 INSERT 并执行 (多组时放在同一事务中，要么全部写入要么全部回滚)
+        with self.db.transaction():
+            for columns, rows in groups.items():
+                fields = ', '.join(columns)
+                row_placeholder = '(' + ', '.join(['%s'] * len(columns)) + ')'
+                values_clause = ', '.join([row_placeholder] * len(rows))
+                sql = f"INSERT INTO {self.get_table_name()} ({fields}) VALUES {values_clause} RETURNING id"
+
+                params = [value for _, values in rows for value in values]
+                new_ids = self.db.execute_returning_all(sql, params)
+
+                # PostgreSQL 按 VALUES 顺序返回 RETURNING 结果
+                for (model_instance, _), new_id in zip(rows, new_ids):
+                    model_instance.id = new_id
+
+        return model_instances
+
     def read(self, **kwargs) -> List[T]:
         """
         读取记录, 支持多字段查询
 
         Args:
-            **kwargs: 查询条件, 支持_allowed_get_fields中的字段
+            **kwargs: 查询条件, 支持_allowed_get_fields中的字段, 可带后缀 (如 created_at__gte, 见 Query)
 
         Returns:
             符合条件的模型实例列表
         """
-        if not self._can_read:
-            raise ValueError(f"表 '{self.get_table_name()}' 不允许读取操作")
+        self._require("read", "读取")
+        return self.query().where(**kwargs).all()
 
-        invalid_fields = [field for field in kwargs.keys() if field not in self._allowed_get_fields]
-        if invalid_fields:
-            raise ValueError(f"无效的查询字段: {invalid_fields}, 允许的字段: {self._allowed_get_fields}")
+    def query(self) -> Query:
+        """
+        创建查询构造器
 
-        if kwargs:
-            conditions = ' AND '.join([f"{field} = %s" for field in kwargs.keys()])
-            sql = f"SELECT * FROM {self.get_table_name()} WHERE {conditions}"
-            params = list(kwargs.values())
-        else:
-            sql = f"SELECT * FROM {self.get_table_name()}"
-            params = []
+        Returns:
+            Query 实例, 如 repo.query().where(status__in=[...]).order_by("-created_at").limit(10).all()
+        """
+        return Query(self)
 
-        # 1. 执行查询
-        results = self.db.fetch_all(sql, params)
-        
+    def count(self, *conditions: Q, **kwargs) -> int:
+        """统计符合条件的记录数 (SELECT count(*))"""
+        return self.query().where(*conditions, **kwargs).count()
+
+    def exists(self, *conditions: Q, **kwargs) -> bool:
+        """是否存在符合条件的记录 (SELECT 1 ... LIMIT 1)"""
+        return self.query().where(*conditions, **kwargs).exists()
+
+    def _require(self, operation: str, label: str) -> None:
+        if not getattr(self, f"_can_{operation}"):
+            raise ValueError(f"表 '{self.get_table_name()}' 不允许{label}操作")
+
+    def _check_fields(self, fields: Iterable[str], label: str) -> None:
+        invalid_fields = [field for field in fields if field not in self._allowed_get_fields]
+        if invalid_fields:
+            raise ValueError(f"无效的{label}字段: {invalid_fields}, 允许的字段: {self._allowed_get_fields}")
+
+    def _to_models(self, rows: List[Dict[str, Any]]) -> List[T]:
         instances = []
-        for row in results:
-            # 2. 数据转换 (SQL -> Python)
+        for row in rows:
+            # 1. 数据转换 (SQL -> Python)
             python_data = DataConverter.sql_to_python(row, self._table_meta)
             
-            # 3. 实例化模型
-            instance = self._model_class(**python_data)
-            instances.append(instance)
+            # 2. 实例化模型
+            instances.append(self._model_class(**python_data))
         
         return instances
 
@@ -311,12 +368,8 @@ class BaseRepo(ABC, Generic[T]):
         if not foreign_key_values:
             return
         
-        # 批量查询关联对象
-        related_objects = {}
-        for fk_value in foreign_key_values:
-            results = target_repo.read(id=fk_value)
-            if results:
-                related_objects[fk_value] = results[0]
+        # 批量查询关联对象 (一条 id = ANY(...) 查询)
+        related_objects = {obj.id: obj for obj in target_repo.query().where(id__in=foreign_key_values).all()}
         
         # 设置关联对象
         for instance in instances:
@@ -343,16 +396,11 @@ class BaseRepo(ABC, Generic[T]):
         if not primary_key_values:
             return
         
-        all_related_objects = []
-        for pk_value in primary_key_values:
-            results = target_repo.read(**{foreign_key_field: pk_value})
-            all_related_objects.extend([(pk_value, obj) for obj in results])
-        
+        # 一条查询取回所有关联对象, 再按外键分组
         related_objects_map = {}
-        for pk_value, obj in all_related_objects:
-            if pk_value not in related_objects_map:
-                related_objects_map[pk_value] = []
-            related_objects_map[pk_value].append(obj)
+        results = target_repo.query().where(**{f"{foreign_key_field}__in": primary_key_values}).order_by("id").all()
+        for obj in results:
+            related_objects_map.setdefault(getattr(obj, foreign_key_field), []).append(obj)
         
         for instance in instances:
             if hasattr(instance, 'id'):
@@ -402,11 +450,14 @@ class BaseRepo(ABC, Generic[T]):
         sql += f"{join_type} JOIN {join_table} ON {join_condition}"
         
         if where_conditions:
+            # 字段可带表名前缀, 条件支持与 Query 相同的后缀
             where_parts = []
             params = []
-            for field, value in where_conditions.items():
-                where_parts.append(f"{field} = %s")
-                params.append(value)
+            for key, value in where_conditions.items():
+                field, lookup = split_lookup(key)
+                part, part_params = compile_condition(field, lookup, value)
+                where_parts.append(part)
+                params.extend(part_params)
             sql += " WHERE " + " AND ".join(where_parts)
         else:
             params = []
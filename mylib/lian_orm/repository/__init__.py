@@ -2,6 +2,7 @@ from .MemoryLogRepo import MemoryLogRepo
 from .TasksRepo import TasksRepo
 from .TaskStepsRepo import TaskStepsRepo
 from .ToolCallsRepo import ToolCallsRepo
+from .query import Query, Q
 
 
 __all__ = [
@@ -9,4 +10,7 @@ __all__ = [
     "TasksRepo",
     "TaskStepsRepo",
     "ToolCallsRepo",
+    # 查询构造器
+    "Query",
+    "Q",
 ]
@@ -0,0 +1,258 @@
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .BaseRepo import BaseRepo
+
+
+# 条件后缀 -> 编译函数 (列名, 值) -> (SQL 片段, 参数)
+_LOOKUPS: Dict[str, Callable[[str, Any], Tuple[str, List[Any]]]] = {
+    "eq": lambda col, v: (f"{col} IS NULL", []) if v is None else (f"{col} = %s", [v]),
+    "ne": lambda col, v: (f"{col} IS NOT NULL", []) if v is None else (f"{col} IS DISTINCT FROM %s", [v]),
+    "gt": lambda col, v: (f"{col} > %s", [v]),
+    "gte": lambda col, v: (f"{col} >= %s", [v]),
+    "lt": lambda col, v: (f"{col} < %s", [v]),
+    "lte": lambda col, v: (f"{col} <= %s", [v]),
+    # 列表作为数组参数传入, 不同长度的 IN 共用同一条 SQL
+    "in": lambda col, v: (f"{col} = ANY(%s)", [list(v)]),
+    "not_in": lambda col, v: (f"NOT ({col} = ANY(%s))", [list(v)]),
+    "between": lambda col, v: (f"{col} BETWEEN %s AND %s", list(v)),
+    "isnull": lambda col, v: (f"{col} IS NULL" if v else f"{col} IS NOT NULL", []),
+    "like": lambda col, v: (f"{col} LIKE %s", [v]),
+    "ilike": lambda col, v: (f"{col} ILIKE %s", [v]),
+    "contains": lambda col, v: (f"{col} ILIKE %s", [f"%{_escape_like(v)}%"]),
+    "startswith": lambda col, v: (f"{col} ILIKE %s", [f"{_escape_like(v)}%"]),
+}
+
+
+def _escape_like(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _sql_value(value: Any) -> Any:
+    """枚举转为值, 列表 / 元组逐项转换"""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [_sql_value(v) for v in value]
+    return value
+
+
+def split_lookup(key: str) -> Tuple[str, str]:
+    """'created_at__gte' -> ('created_at', 'gte'); 无后缀时为 eq"""
+    field, sep, lookup = key.rpartition("__")
+    if sep and lookup in _LOOKUPS:
+        return field, lookup
+    return key, "eq"
+
+
+def compile_condition(field: str, lookup: str, value: Any) -> Tuple[str, List[Any]]:
+    """编译单个条件, field 需事先校验"""
+    value = _sql_value(value)
+    if lookup in ("in", "not_in") and not value:
+        # 空列表: IN () 恒假, NOT IN () 恒真
+        return ("FALSE" if lookup == "in" else "TRUE"), []
+    return _LOOKUPS[lookup](field, value)
+
+
+class Q:
+    """
+    可组合的查询条件
+
+    关键字参数之间为 AND, 条件之间可用 & | ~ 组合:
+        Q(status="pending") | Q(status="running")
+        Q(user_id="u1") & ~Q(title__isnull=True)
+
+    键的格式为 "字段__后缀", 后缀见 _LOOKUPS (省略时为 eq)
+    """
+    __slots__ = ("op", "children", "negated")
+
+    def __init__(self, *children: "Q", _op: str = "AND", **conditions):
+        self.op = _op
+        self.children: List[Any] = list(children) + list(conditions.items())
+        self.negated = False
+
+    def _combine(self, other: "Q", op: str) -> "Q":
+        if not isinstance(other, Q):
+            return NotImplemented
+        return Q(self, other, _op=op)
+
+    def __and__(self, other: "Q") -> "Q":
+        return self._combine(other, "AND")
+
+    def __or__(self, other: "Q") -> "Q":
+        return self._combine(other, "OR")
+
+    def __invert__(self) -> "Q":
+        q = Q(self, _op=self.op)
+        q.negated = True
+        return q
+
+    def __bool__(self) -> bool:
+        return bool(self.children)
+
+    def fields(self) -> Iterable[str]:
+        """条件中出现的所有字段名"""
+        for child in self.children:
+            if isinstance(child, Q):
+                yield from child.fields()
+            else:
+                yield split_lookup(child[0])[0]
+
+    def compile(self) -> Tuple[str, List[Any]]:
+        """编译为 (SQL 片段, 参数), 字段需事先校验"""
+        parts: List[str] = []
+        params: List[Any] = []
+        for child in self.children:
+            if isinstance(child, Q):
+                if not child:
+                    continue
+                sql, child_params = child.compile()
+            else:
+                field, lookup = split_lookup(child[0])
+                sql, child_params = compile_condition(field, lookup, child[1])
+            parts.append(sql)
+            params.extend(child_params)
+
+        if not parts:
+            sql = "TRUE"
+        elif len(parts) == 1:
+            sql = parts[0]
+        else:
+            sql = "(" + f" {self.op} ".join(parts) + ")"
+        if self.negated:
+            sql = f"NOT ({sql})"
+        return sql, params
+
+    def __repr__(self):
+        sql, params = self.compile()
+        return f"Q({sql}, {params})"
+
+
+class Query:
+    """
+    单表查询构造器, 由 BaseRepo.query() 创建
+
+    字段名按表元数据 (或 _allowed_get_fields) 校验, 值全部以参数传递。
+    每个方法返回新的 Query, 原对象不变, 可以作为基础查询复用:
+
+        pending = sql.tasks.query().where(status=TasksStatus.PENDING)
+        pending.where(created_at__gte=since).order_by("-created_at").limit(20).all()
+        pending.count()
+    """
+
+    def __init__(self, repo: "BaseRepo"):
+        self._repo = repo
+        self._where: List[Q] = []
+        self._order: List[str] = []
+        self._columns: List[str] = []
+        self._limit: Optional[int] = None
+        self._offset: Optional[int] = None
+
+    def _clone(self) -> "Query":
+        q = Query.__new__(Query)
+        q._repo = self._repo
+        q._where = list(self._where)
+        q._order = list(self._order)
+        q._columns = list(self._columns)
+        q._limit = self._limit
+        q._offset = self._offset
+        return q
+
+    # === 构造 ===
+    def where(self, *conditions: Q, **kwargs) -> "Query":
+        """追加条件 (与已有条件 AND)"""
+        q = Q(*conditions, **kwargs)
+        self._repo._check_fields(q.fields(), "查询")
+        clone = self._clone()
+        clone._where.append(q)
+        return clone
+
+    filter = where
+
+    def order_by(self, *fields: str) -> "Query":
+        """排序, 字段前加一个 "-" 表示降序"""
+        # 只去掉一个 "-": 校验的字段名与写入 SQL 的必须相同 ("--id" 会变成 SQL 注释)
+        order = [(f[1:], "DESC") if f.startswith("-") else (f, "ASC") for f in fields]
+        self._repo._check_fields([name for name, _ in order], "排序")
+        clone = self._clone()
+        clone._order.extend(f"{name} {direction}" for name, direction in order)
+        return clone
+
+    def select(self, *fields: str) -> "Query":
+        """只读取部分字段 (未读取的字段使用模型默认值)"""
+        self._repo._check_fields(fields, "查询")
+        clone = self._clone()
+        clone._columns = list(fields)
+        return clone
+
+    def limit(self, n: Optional[int]) -> "Query":
+        clone = self._clone()
+        clone._limit = None if n is None else int(n)
+        return clone
+
+    def offset(self, n: Optional[int]) -> "Query":
+        clone = self._clone()
+        clone._offset = None if n is None else int(n)
+        return clone
+
+    # === 编译 ===
+    def _compile_where(self) -> Tuple[str, List[Any]]:
+        if not self._where:
+            return "", []
+        sql, params = Q(*self._where).compile()
+        return f" WHERE {sql}", params
+
+    def compile(self) -> Tuple[str, List[Any]]:
+        """编译为 (SQL, 参数)"""
+        columns = ", ".join(self._columns) if self._columns else "*"
+        where, params = self._compile_where()
+        sql = f"SELECT {columns} FROM {self._repo.get_table_name()}{where}"
+        if self._order:
+            sql += " ORDER BY " + ", ".join(self._order)
+        if self._limit is not None:
+            sql += " LIMIT %s"
+            params.append(self._limit)
+        if self._offset is not None:
+            sql += " OFFSET %s"
+            params.append(self._offset)
+        return sql, params
+
+    # === 执行 ===
+    def all(self) -> List[Any]:
+        """执行查询, 返回模型实例列表"""
+        self._repo._require("read", "读取")
+        sql, params = self.compile()
+        return self._repo._to_models(self._repo.db.fetch_all(sql, params))
+
+    def first(self) -> Optional[Any]:
+        """返回第一条记录, 没有时返回 None"""
+        results = self.limit(1).all()
+        return results[0] if results else None
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """执行查询, 返回字典列表 (不实例化模型)"""
+        self._repo._require("read", "读取")
+        sql, params = self.compile()
+        return self._repo.db.fetch_all(sql, params)
+
+    def count(self) -> int:
+        """符合条件的记录数 (忽略 ORDER BY / LIMIT / OFFSET)"""
+        self._repo._require("read", "读取")
+        where, params = self._compile_where()
+        row = self._repo.db.fetch_one(f"SELECT count(*) AS n FROM {self._repo.get_table_name()}{where}", params)
+        return int(row["n"]) if row else 0
+
+    def exists(self) -> bool:
+        """是否存在符合条件的记录, 找到第一行即返回"""
+        self._repo._require("read", "读取")
+        where, params = self._compile_where()
+        row = self._repo.db.fetch_one(f"SELECT 1 AS found FROM {self._repo.get_table_name()}{where} LIMIT 1", params)
+        return row is not None
+
+    def __iter__(self):
+        return iter(self.all())
+
+    def __repr__(self):
+        sql, params = self.compile()
+        return f"Query({sql!r}, {params!r})"
@@ -0,0 +1,107 @@
+import os
+import json
+import hashlib
+import threading
+from typing import Dict, Optional, Tuple
+
+from .metadata import SchemaMeta
+
+
+# 快照格式版本，SchemaMeta 结构或解析结果变化时递增，旧快照会被忽略
+SNAPSHOT_VERSION = 2
+SNAPSHOT_SUFFIX = ".schema.json"
+
+# 进程级缓存: 绝对路径 -> ((mtime_ns, size), SchemaMeta)
+_cache: Dict[str, Tuple[Tuple[int, int], SchemaMeta]] = {}
+_cache_lock = threading.Lock()
+
+
+def snapshot_path(file_path: str) -> str:
+    """快照文件路径: 与 SQL 文件同目录, 如 LML_SQL.sql.schema.json"""
+    return file_path + SNAPSHOT_SUFFIX
+
+
+def load_schema(file_path: str, use_snapshot: bool = True) -> SchemaMeta:
+    """
+    加载 SQL 文件对应的 SchemaMeta
+
+    1. 进程内缓存: 文件 mtime / size 未变时直接返回，只做一次 stat
+    2. 快照: 内容哈希与快照一致时从 JSON 还原，跳过逐字符的状态机解析
+    3. 都未命中时调用 SqlParser 解析，并写回快照
+
+    返回的 SchemaMeta 在同一进程内共享，调用方不应修改
+    """
+    path = os.path.abspath(file_path)
+    stat = os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size)
+
+    cached = _cache.get(path)
+    if cached and cached[0] == key:
+        return cached[1]
+
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached and cached[0] == key:
+            return cached[1]
+
+        with open(path, "r", encoding="utf-8") as f:
+            content = f.read()
+        digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+        schema = _read_snapshot(path, digest) if use_snapshot else None
+        if schema is None:
+            from .localfile.parser import SqlParser
+            schema = SqlParser().parse_string(content)
+            if use_snapshot:
+                _write_snapshot(path, digest, schema)
+
+        _cache[path] = (key, schema)
+        return schema
+
+
+def clear_schema_cache(file_path: Optional[str] = None):
+    """清除进程内缓存 (不删除快照文件)"""
+    with _cache_lock:
+        if file_path is None:
+            _cache.clear()
+        else:
+            _cache.pop(os.path.abspath(file_path), None)
+
+
+def _read_snapshot(path: str, digest: str) -> Optional[SchemaMeta]:
+    try:
+        with open(snapshot_path(path), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"[SchemaCache] Failed to read snapshot: {e}")
+        return None
+
+    if data.get("version") != SNAPSHOT_VERSION or data.get("sha256") != digest:
+        return None
+    try:
+        return SchemaMeta.from_dict(data["schema"])
+    except Exception as e:
+        print(f"[SchemaCache] Invalid snapshot, reparsing: {e}")
+        return None
+
+
+def _write_snapshot(path: str, digest: str, schema: SchemaMeta):
+    """原子写入快照，失败 (如只读文件系统) 时忽略"""
+    target = snapshot_path(path)
+    tmp = f"{target}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": SNAPSHOT_VERSION,
+                "sha256": digest,
+                "schema": schema.to_dict(),
+            }, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, target)
+    except Exception as e:
+        print(f"[SchemaCache] Failed to write snapshot: {e}")
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
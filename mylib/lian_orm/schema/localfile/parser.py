@@ -1,5 +1,5 @@
 from enum import Enum, auto
-from typing import List, Optional, Any
+from typing import Iterator, List, Optional, Any
 
 from mylib.kit.Lparser import LParserBase
 from mylib.kit.Ltokenizer import LToken
@@ -39,19 +39,37 @@ class SqlParser(LParserBase[SqlParserState, Any, SqlScope]):
         super().__init__(SqlParserState.IDLE, scope_enum=SqlScope)
         self.schema = SchemaMeta()
 
-    def parse_file(self, file_path: str) -> SchemaMeta:
-        """打开文件, 返回parse_string处理过的文本对象"""
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        return self.parse_string(content)
+    def parse_file(self, file_path: str, chunk_size: int = 1 << 16) -> SchemaMeta:
+        """按块读取文件并流式解析, 读取与解析交替进行, 内存占用与文件大小无关"""
+        def read_chunks() -> Iterator[str]:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                while chunk := f.read(chunk_size):
+                    yield chunk
+
+        self.parse_stream(SqlTokenizer().iter_parse(read_chunks()))
+        return self.schema
 
     def parse_string(self, content: str) -> SchemaMeta:
-        """调用SqlTokenizer, 将处理得到的 token 列表传入 parse 解析流, 返回 SchemaMeta"""
-        tokenizer = SqlTokenizer()
-        tokens = tokenizer.parse(content)
-        self.parse(tokens)
+        """调用SqlTokenizer, 将产出的 token 列表一次性传入解析器, 返回 SchemaMeta
+
+        内容已经全部在内存中, 不走 parse_stream 的分批缓冲 (按 ; 切分、裁剪已消费的 Token)
+        """
+        self.parse(SqlTokenizer().parse(content))
         return self.schema
 
+    def _safe_limit(self, tokens: List[LToken], n: int) -> int:
+        """
+        流式解析按语句分批: 只处理到最后一个 ; 为止
+
+        各 handle 方法的向后查看 (列定义、索引列等) 都不会越过语句结尾, 
+        因此完整的语句可以直接解析, 最后一条不完整的语句留到下一批
+        """
+        for j in range(n - 1, self._pos - 1, -1):
+            token = tokens[j]
+            if token.type == SqlTokenType.SYMBOL and token.value == ";":
+                return j + 1
+        return self._pos
+
     def handle_idle(self, token: LToken, i: int, tokens: List[LToken], n: int) -> int:
         """
         处理 IDLE 状态。
@@ -176,31 +194,72 @@ class SqlParser(LParserBase[SqlParserState, Any, SqlScope]):
         """
         处理 EXPECT_INDEX_COLUMNS 状态。
         主要职责:
-        1. 解析括号内的列名列表
-        2. 完成索引创建并挂载到 TableMeta
-        3. 清理 context 并返回 IDLE
+        1. 解析括号内的列列表 (每项: 列名 [操作符类] [ASC|DESC] [NULLS FIRST|LAST])
+        2. 解析可选的 WITH (参数 = 值, ...) 存储参数
+        3. 完成索引创建并挂载到 TableMeta
+        4. 清理 context 并返回 IDLE
         """
         if token.value == "(":
             j = i + 1
             cols = []
+            opclasses = {}
+            expect_column = True
             while j < n:
                 t = tokens[j]
                 match t.value:
                     case ")":
                         current_index = self.context.get("current_index")
+                        j += 1
+                        if j + 1 < n and tokens[j].value.upper() == "WITH" and tokens[j+1].value == "(":
+                            options, j = self._parse_index_options(tokens, j + 2, n)
+                            if current_index:
+                                current_index.options = options
                         if current_index:
                             current_index.columns = cols
+                            current_index.opclasses = opclasses
                             if current_index.table_name in self.schema.tables:
                                 self.schema.tables[current_index.table_name].indices[current_index.name] = current_index
                             self.context["current_index"] = None # 显式更新/清理
                         self.switch_state(SqlParserState.IDLE)
-                        return j + 1
+                        return j
+                    case ",":
+                        expect_column = True
                     case _:
                         if t.type == SqlTokenType.IDENTIFIER:
-                            cols.append(t.value.strip('"'))
+                            if expect_column:
+                                cols.append(t.value.strip('"'))
+                                expect_column = False
+                            elif cols and cols[-1] not in opclasses:
+                                # 列名之后的标识符为操作符类
+                                opclasses[cols[-1]] = t.value
                 j += 1
         return i + 1
 
+    def _parse_index_options(self, tokens: List[LToken], j: int, n: int) -> tuple:
+        """
+        辅助方法: 解析 WITH ( 之后的存储参数, 直到右括号。
+        兼容 `lists = 100` (三个 token) 与 `lists=100` (一个 token) 两种写法。
+
+        Returns:
+            (参数字典, 右括号之后的下标)
+        """
+        options = {}
+        parts: List[str] = []
+        while j < n:
+            value = tokens[j].value
+            if value in (",", ")"):
+                text = "".join(parts)
+                if "=" in text:
+                    key, _, val = text.partition("=")
+                    options[key.strip().lower()] = val.strip()
+                parts = []
+                if value == ")":
+                    return options, j + 1
+            else:
+                parts.append(value)
+            j += 1
+        return options, j
+
     # --- 表处理 ---
     def handle_expect_table_name(self, token: LToken, i: int, tokens: List[LToken], n: int) -> int:
         """
@@ -288,6 +347,7 @@ class SqlParser(LParserBase[SqlParserState, Any, SqlScope]):
             type_token = tokens[current_idx]
             col_type = type_token.value
             if current_idx + 1 < n and tokens[current_idx+1].value == "(":
+                col_type += "("
                 current_idx += 2
                 while current_idx < n and tokens[current_idx].value != ")":
                     col_type += tokens[current_idx].value
@@ -322,8 +382,20 @@ class SqlParser(LParserBase[SqlParserState, Any, SqlScope]):
                         continue
                 case "DEFAULT":
                     if current_idx + 1 < n:
-                        col.default = tokens[current_idx+1].value
-                        current_idx += 2
+                        col.default, current_idx = self._parse_default(tokens, current_idx + 1, n)
+                        continue
+                case "UNIQUE":
+                    col.constraints.append("UNIQUE")
+                case "ON":
+                    # 外键动作: ON DELETE / ON UPDATE CASCADE | RESTRICT | SET NULL | SET DEFAULT | NO ACTION
+                    if current_idx + 2 < n and tokens[current_idx+1].value.upper() in ("DELETE", "UPDATE"):
+                        event = tokens[current_idx+1].value.upper()
+                        action = tokens[current_idx+2].value.upper()
+                        current_idx += 3
+                        if action in ("SET", "NO") and current_idx < n:
+                            action += " " + tokens[current_idx].value.upper()
+                            current_idx += 1
+                        col.constraints.append(f"ON {event} {action}")
                         continue
                 case "REFERENCES":
                     if current_idx + 1 < n:
@@ -349,3 +421,36 @@ class SqlParser(LParserBase[SqlParserState, Any, SqlScope]):
             self.context["current_table"] = current_table # 显式更新
                 
         return current_idx
+
+    def _parse_default(self, tokens: List[LToken], j: int, n: int) -> tuple:
+        """
+        辅助方法: 解析 DEFAULT 之后的默认值表达式, 保留 SQL 写法。
+        - 字符串字面量保留引号: 'pending'
+        - 函数调用带上括号内的参数: NOW(), nextval('seq')
+
+        Returns:
+            (默认值表达式, 表达式之后的下标)
+        """
+        token = tokens[j]
+        expr = self._token_sql(token)
+        j += 1
+        if j < n and tokens[j].value == "(" and tokens[j].type == SqlTokenType.SYMBOL:
+            depth = 0
+            while j < n:
+                t = tokens[j]
+                if t.type == SqlTokenType.SYMBOL and t.value == "(":
+                    depth += 1
+                elif t.type == SqlTokenType.SYMBOL and t.value == ")":
+                    depth -= 1
+                expr += ", " if t.type == SqlTokenType.SYMBOL and t.value == "," else self._token_sql(t)
+                j += 1
+                if depth == 0:
+                    break
+        return expr, j
+
+    @staticmethod
+    def _token_sql(token: LToken) -> str:
+        """Token 还原为 SQL 文本 (字符串重新加上引号)"""
+        if token.type == SqlTokenType.STRING:
+            return "'" + token.value.replace("'", "''") + "'"
+        return token.value
@@ -1,7 +1,8 @@
+import re
 from enum import Enum, auto
-from typing import Optional
+from typing import Any, Iterator, List, Optional, Tuple
 
-from mylib.kit.Ltokenizer import LTokenizerBase
+from mylib.kit.Ltokenizer import LTokenizerBase, LToken, LTokenBuffer
 
 
 class SqlTokenType(Enum):
@@ -23,11 +24,42 @@ class SqlTokenizerState(Enum):
     IN_COMMENT_BLOCK = auto()   # 块注释内部 /* ... */
 
 
+KEYWORDS = frozenset({
+    "CREATE", "TABLE", "IF", "NOT", "EXISTS", "PRIMARY", "KEY",
+    "FOREIGN", "REFERENCES", "CONSTRAINT", "DEFAULT", "NULL",
+    "UNIQUE", "INDEX", "ON", "USING", "EXTENSION", "CHECK",
+    "OR", "REPLACE", "ASC", "DESC", "NULLS", "FIRST", "LAST"
+})
+
+SYMBOLS = "(),;"
+
+# 扫描模式使用的正则: 连续空白 / 标识符 (直到空白、符号、引号、$、-- 或 /* 为止)
+_WHITESPACE_RE = re.compile(r"\s+")
+_IDENTIFIER_RE = re.compile(r"(?:[^\s(),;'\"$\-/]|-(?!-)|/(?!\*))+")
+
+# 扫描产出的原始 Token: (类型, 值起点, 值终点, 行, 列, 值)，值为 None 表示就是 content[起点:终点]
+RawToken = Tuple[SqlTokenType, int, int, int, int, Optional[str]]
+
+
 class SqlTokenizer(LTokenizerBase[SqlTokenizerState]):
-    def __init__(self):
+    def __init__(self, fast: bool = True):
+        """
+        Args:
+            fast: 字符串输入时使用正则扫描模式, 一步消费整个标识符 / 字符串 / 注释;
+                  False 时逐字符驱动状态机 (两种模式产出完全相同的 Token, 包括行列号)
+        """
         super().__init__(SqlTokenizerState.IDLE)
         self.dollar_tag = ""
+        self.fast = fast
+
+    def parse(self, content: Any) -> List[LToken]:
+        if not (self.fast and isinstance(content, str)):
+            return super().parse(content)
+        self._reset()
+        self.results = list(self.scan(content))
+        return self.results
 
+    # === 状态机模式 ===
     def handle_idle(self, char: str, i: int, content: str, len: int) -> Optional[int]:
         # 跳过空白字符
         if char.isspace():
@@ -47,12 +79,14 @@ class SqlTokenizer(LTokenizerBase[SqlTokenizerState]):
         if char == "'":
             self.switch_state(SqlTokenizerState.IN_STRING_SINGLE)
             self.mark_start() # 标记 Token 开始位置
+            self.begin_span(i + 1)
             return None
 
         # 检查双引号引用标识符开始 "
         if char == '"':
             self.switch_state(SqlTokenizerState.IN_QUOTED_IDENTIFIER)
             self.mark_start()
+            self.begin_span(i + 1)
             return None
 
         # 检查 Dollar 引用字符串开始 $
@@ -66,6 +100,7 @@ class SqlTokenizer(LTokenizerBase[SqlTokenizerState]):
                 self.dollar_tag = tag
                 self.switch_state(SqlTokenizerState.IN_STRING_DOLLAR)
                 self.mark_start()
+                self.begin_span(tag_end + 1)
                 return tag_end + 1
             else:
                 # 只是一个单独的 $ 符号
@@ -74,7 +109,7 @@ class SqlTokenizer(LTokenizerBase[SqlTokenizerState]):
                 return None
 
         # 处理符号
-        if char in "(),;":
+        if char in SYMBOLS:
             self.mark_start()
             self.emit(SqlTokenType.SYMBOL, char)
             return None
@@ -82,16 +117,16 @@ class SqlTokenizer(LTokenizerBase[SqlTokenizerState]):
         # 其他字符 -> 进入标识符模式
         self.switch_state(SqlTokenizerState.IDENTIFIER)
         self.mark_start()
-        self.append_buffer(char)
+        self.begin_span(i)
         return None
 
     def handle_identifier(self, char: str, i: int, content: str, n: int) -> Optional[int]:
         # 检查是否遇到分隔符
         is_separator = False
-        
+
         if char.isspace():
             is_separator = True
-        elif char in "(),;":
+        elif char in SYMBOLS:
             is_separator = True
         elif char == "'":
             is_separator = True
@@ -103,37 +138,33 @@ class SqlTokenizer(LTokenizerBase[SqlTokenizerState]):
             is_separator = True
         elif char == '/' and i + 1 < n and content[i+1] == '*':
             is_separator = True
-            
+
         if is_separator:
-            self._emit_identifier()
+            self._emit_identifier(self.take_span(i))
             self.switch_state(SqlTokenizerState.IDLE)
             return i # 重新处理当前字符 (交给 IDLE)
-            
-        self.append_buffer(char)
+
         return None
 
     def handle_in_string_single(self, char: str, i: int, content: str, n: int) -> Optional[int]:
         if char == "'":
             # 检查转义引号 '' (SQL 标准转义)
             if i + 1 < n and content[i+1] == "'":
-                self.append_buffer("'")
                 return i + 2
             else:
                 # 字符串结束
-                self.emit(SqlTokenType.STRING)
+                self.emit(SqlTokenType.STRING, self.take_span(i).replace("''", "'"))
                 self.switch_state(SqlTokenizerState.IDLE)
                 return None
-        self.append_buffer(char)
         return None
 
     def handle_in_string_dollar(self, char: str, i: int, content: str, n: int) -> Optional[int]:
         # 检查是否遇到结束标签
         if char == '$':
             if content.startswith(self.dollar_tag, i):
-                self.emit(SqlTokenType.STRING)
+                self.emit(SqlTokenType.STRING, self.take_span(i))
                 self.switch_state(SqlTokenizerState.IDLE)
                 return i + len(self.dollar_tag)
-        self.append_buffer(char)
         return None
 
     def handle_in_comment_line(self, char: str, i: int, content: str, n: int) -> Optional[int]:
@@ -151,28 +182,17 @@ class SqlTokenizer(LTokenizerBase[SqlTokenizerState]):
         if char == '"':
             # 检查转义引号 ""
             if i + 1 < n and content[i+1] == '"':
-                self.append_buffer('"')
                 return i + 2
             else:
                 # 引用标识符结束
-                self.emit(SqlTokenType.IDENTIFIER)
+                self.emit(SqlTokenType.IDENTIFIER, self.take_span(i).replace('""', '"'))
                 self.switch_state(SqlTokenizerState.IDLE)
                 return None
-        self.append_buffer(char)
         return None
 
-    def _emit_identifier(self):
-        if not self.buffer:
+    def _emit_identifier(self, text: str):
+        if not text:
             return
-        text = "".join(self.buffer)
-        
-        KEYWORDS = {
-            "CREATE", "TABLE", "IF", "NOT", "EXISTS", "PRIMARY", "KEY", 
-            "FOREIGN", "REFERENCES", "CONSTRAINT", "DEFAULT", "NULL", 
-            "UNIQUE", "INDEX", "ON", "USING", "EXTENSION", "CHECK", 
-            "OR", "REPLACE", "ASC", "DESC", "NULLS", "FIRST", "LAST"
-        }
-        
         if text.upper() in KEYWORDS:
             self.emit(SqlTokenType.KEYWORD, text)
         else:
@@ -180,6 +200,223 @@ class SqlTokenizer(LTokenizerBase[SqlTokenizerState]):
 
     def on_finish(self):
         if self.state == SqlTokenizerState.IDENTIFIER:
-            self._emit_identifier()
+            self._emit_identifier(self.take_span(len(self.source)))
         elif self.state in (SqlTokenizerState.IN_STRING_SINGLE, SqlTokenizerState.IN_STRING_DOLLAR, SqlTokenizerState.IN_QUOTED_IDENTIFIER, SqlTokenizerState.IN_COMMENT_BLOCK):
             raise ValueError(f"Unexpected end of input in state {self.state.name}")
+
+    # === 扫描模式 ===
+    def scan(self, content: str) -> Iterator[LToken]:
+        """
+        正则扫描模式: 按 Token 而不是按字符推进
+
+        行列号与状态机模式逐字符 _on_step 的结果保持一致 (包括其计数方式):
+        - 被 handle 方法跳过的字符 (如 -- 的第二个 -, '' 中的第二个 ', dollar 标签的其余字符) 不计数
+        - 结束标识符的分隔符会被处理两次, 因此计数两次
+        """
+        self.line = 1
+        self.col = 1
+        return self._scan(content, final=True)
+
+    def tokenize_buffer(self, content: str) -> LTokenBuffer:
+        """
+        扫描并写入列式缓冲区, 不创建 LToken 对象
+
+        Token 值在访问时才从 content 切片, 适合大文件; 结果与 parse / scan 一致
+        """
+        self._reset()
+        buffer = LTokenBuffer(content, SqlTokenType)
+        buffer.extend(self._scan(content, final=True, raw=True))
+        return buffer
+
+    # === 流式解析 (总是使用扫描模式) ===
+    def feed(self, chunk: str) -> List[LToken]:
+        """
+        增量输入一段 SQL 文本, 返回其中已经完整的 Token
+
+        末尾不完整的结构 (标识符、字符串、注释、dollar 字符串等) 留到下一段输入或 close
+        """
+        if self._pending is None:
+            self._reset()
+            self._pending = ""
+        content = self._pending + chunk
+        try:
+            tokens = list(self._scan(content, final=False))
+        except Exception:
+            self._pending = None
+            raise
+        self._pending = content[self._pos:]
+        return tokens
+
+    def close(self) -> List[LToken]:
+        if self._pending is None:
+            self._reset()
+            self._pending = ""
+        try:
+            return list(self._scan(self._pending, final=True))
+        finally:
+            self._pending = None
+
+    def _scan(self, content: str, final: bool, raw: bool = False) -> Iterator[Any]:
+        """
+        从 self.line / self.col 继续扫描 content, 产出 LToken
+
+        raw 为 True 时产出原始 Token 元组 (不切片、不创建对象, 供 LTokenBuffer 使用);
+        否则直接创建 LToken, 不经过元组中转 (parse / scan / feed 的热路径)
+
+        final 为 False 时, 遇到可能被后续输入改变的结构即停止, 停止位置记录在 self._pos
+        """
+        n = len(content)
+        line = self.line
+        col = self.col
+        i = 0
+
+        def advance(start: int, end: int):
+            """content[start:end] 中每个字符计一步"""
+            nonlocal line, col
+            nl = content.count('\n', start, end)
+            if nl:
+                line += nl
+                col = end - content.rfind('\n', start, end)
+            else:
+                col += end - start
+
+        try:
+            while i < n:
+                char = content[i]
+
+                # 空白
+                if char.isspace():
+                    end = _WHITESPACE_RE.match(content, i).end()
+                    advance(i, end)
+                    i = end
+                    continue
+
+                # 末尾的 - 或 / 可能是注释的开始, 等待下一段输入
+                if not final and i + 1 == n and (char == '-' or char == '/'):
+                    break
+
+                # 单行注释 -- ... \n (换行本身也在注释状态中消费)
+                if char == '-' and i + 1 < n and content[i+1] == '-':
+                    end = content.find('\n', i + 2)
+                    if end == -1:
+                        if not final:
+                            break
+                        end = n
+                    else:
+                        end += 1
+                    col += 1
+                    advance(i + 2, end)
+                    i = end
+                    continue
+
+                # 块注释 /* ... */
+                if char == '/' and i + 1 < n and content[i+1] == '*':
+                    end = content.find('*/', i + 2)
+                    if end == -1:
+                        if not final:
+                            break
+                        raise ValueError(f"Unexpected end of input in state {SqlTokenizerState.IN_COMMENT_BLOCK.name}")
+                    col += 1
+                    advance(i + 2, end + 1)
+                    i = end + 2
+                    continue
+
+                # 单引号字符串 / 双引号标识符
+                if char == "'" or char == '"':
+                    # 先找到全部引号位置 (转义引号 '' 分隔的各段), 确认字符串完整后再计数
+                    ends = []
+                    pos = i + 1
+                    closed = False
+                    while True:
+                        end = content.find(char, pos)
+                        if end == -1:
+                            break
+                        if end + 1 < n and content[end+1] == char:
+                            ends.append(end)
+                            pos = end + 2
+                            continue
+                        if end + 1 == n and not final:
+                            break   # 无法判断是结束还是转义
+                        ends.append(end)
+                        closed = True
+                        break
+                    if not closed:
+                        if not final:
+                            break
+                        state = SqlTokenizerState.IN_STRING_SINGLE if char == "'" else SqlTokenizerState.IN_QUOTED_IDENTIFIER
+                        raise ValueError(f"Unexpected end of input in state {state.name}")
+
+                    # 引号、$、符号都不是换行, 计一步即列号加一 (不调用 advance)
+                    col += 1
+                    start_line, start_col = line, col
+                    start = i + 1
+                    pos = start
+                    for end in ends:
+                        # 转义引号的第二个引号被跳过, 不计数
+                        advance(pos, end + 1)
+                        pos = end + 2
+                    i = ends[-1] + 1
+                    token_type = SqlTokenType.STRING if char == "'" else SqlTokenType.IDENTIFIER
+                    # 含转义引号时值与原文区间不同, 单独给出
+                    value = content[start:ends[-1]].replace(char * 2, char) if len(ends) > 1 else None
+                    if raw:
+                        yield (token_type, start, ends[-1], start_line, start_col, value)
+                    else:
+                        yield LToken(token_type, content[start:ends[-1]] if value is None else value, start_line, start_col)
+                    continue
+
+                # Dollar 引用字符串 / 单独的 $
+                if char == '$':
+                    tag_end = content.find('$', i + 1)
+                    if tag_end == -1:
+                        if not final:
+                            break
+                        col += 1
+                        i += 1
+                        yield (SqlTokenType.SYMBOL, i - 1, i, line, col, None) if raw else LToken(SqlTokenType.SYMBOL, "$", line, col)
+                        continue
+                    tag = content[i:tag_end+1]
+                    end = content.find(tag, tag_end + 1)
+                    if end == -1:
+                        if not final:
+                            break
+                        raise ValueError(f"Unexpected end of input in state {SqlTokenizerState.IN_STRING_DOLLAR.name}")
+                    self.dollar_tag = tag
+                    col += 1
+                    start_line, start_col = line, col
+                    advance(tag_end + 1, end + 1)
+                    i = end + len(tag)
+                    if raw:
+                        yield (SqlTokenType.STRING, tag_end + 1, end, start_line, start_col, None)
+                    else:
+                        yield LToken(SqlTokenType.STRING, content[tag_end+1:end], start_line, start_col)
+                    continue
+
+                # 符号
+                if char in SYMBOLS:
+                    col += 1
+                    i += 1
+                    yield (SqlTokenType.SYMBOL, i - 1, i, line, col, None) if raw else LToken(SqlTokenType.SYMBOL, char, line, col)
+                    continue
+
+                # 标识符 / 关键字 (不含换行)
+                end = _IDENTIFIER_RE.match(content, i).end()
+                if end == n and not final:
+                    break   # 标识符可能在下一段输入中继续
+                text = content[i:end]
+                token_type = SqlTokenType.KEYWORD if text.upper() in KEYWORDS else SqlTokenType.IDENTIFIER
+                token = (token_type, i, end, line, col + 1, None) if raw else LToken(token_type, text, line, col + 1)
+                col += end - i
+                if end < n:
+                    # 分隔符先在标识符状态计一步, 随后回到 IDLE 再处理一次
+                    if content[end] == '\n':
+                        line += 1
+                        col = 1
+                    else:
+                        col += 1
+                i = end
+                yield token
+        finally:
+            self.line = line
+            self.col = col
+            self._pos = i
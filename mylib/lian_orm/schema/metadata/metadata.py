@@ -1,5 +1,5 @@
-from dataclasses import dataclass, field
-from typing import List, Optional, Dict
+from dataclasses import dataclass, field, asdict
+from typing import Any, List, Optional, Dict
 
 
 @dataclass
@@ -37,6 +37,8 @@ class IndexMeta:
     method: 存储、访问方法
     unique: 是否唯一
     definition: 原始定义语句
+    opclasses: 列 -> 操作符类 (如 embedding -> vector_l2_ops)
+    options: 存储参数 WITH (...) (如 lists = 100)
     """
     name: str
     table_name: str
@@ -44,6 +46,8 @@ class IndexMeta:
     method: Optional[str] = None  # e.g., "ivfflat", "btree"
     unique: bool = False
     definition: str = "" # 原始定义语句
+    opclasses: Dict[str, str] = field(default_factory=dict)
+    options: Dict[str, str] = field(default_factory=dict)
 
 
 @dataclass
@@ -93,3 +97,22 @@ class SchemaMeta:
     
     def add_table(self, table: TableMeta) -> None:
         self.tables[table.name] = table
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可 JSON 序列化的字典"""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SchemaMeta":
+        """从 to_dict 的结果还原"""
+        tables = {}
+        for name, table in data.get("tables", {}).items():
+            tables[name] = TableMeta(
+                name=table["name"],
+                columns={k: ColumnMeta(**v) for k, v in table.get("columns", {}).items()},
+                indices={k: IndexMeta(**v) for k, v in table.get("indices", {}).items()},
+                primary_key=list(table.get("primary_key", [])),
+                comment=table.get("comment"),
+            )
+        extensions = [ExtensionMeta(**ext) for ext in data.get("extensions", [])]
+        return cls(tables=tables, extensions=extensions)
@@ -0,0 +1,54 @@
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Iterator
+
+from .database.transaction import Transaction
+
+if TYPE_CHECKING:
+    from .orm import Sql
+    from .repository import MemoryLogRepo, TasksRepo, TaskStepsRepo, ToolCallsRepo
+
+
+class UnitOfWork:
+    """
+    工作单元: 由 Sql.transaction() 创建
+
+    通过它访问的各个 Repo 共用事务连接，写操作在块结束时一次提交；
+    savepoint() 开启嵌套的保存点，失败时只撤销块内的写入。
+
+    Example:
+        with sql.transaction() as uow:
+            task = uow.tasks.create(Task(title="..."))
+            uow.task_steps.create_many(steps)
+            with uow.savepoint():
+                uow.tool_calls.create(call)   # 失败只回滚这一条
+    """
+
+    def __init__(self, sql: "Sql", tx: Transaction):
+        self._sql = sql
+        self.tx = tx
+
+    @property
+    def memory_log(self) -> "MemoryLogRepo":
+        return self._sql.memory_log
+
+    @property
+    def tasks(self) -> "TasksRepo":
+        return self._sql.tasks
+
+    @property
+    def task_steps(self) -> "TaskStepsRepo":
+        return self._sql.task_steps
+
+    @property
+    def tool_calls(self) -> "ToolCallsRepo":
+        return self._sql.tool_calls
+
+    def repo(self, table_name: str) -> Any:
+        """按表名获取 Repo"""
+        return self._sql._repos.get(table_name)
+
+    @contextmanager
+    def savepoint(self) -> Iterator["UnitOfWork"]:
+        """嵌套保存点: 块内异常回滚到保存点后继续抛出，外层事务不受影响"""
+        with self._sql.db_client.transaction():
+            yield self
@@ -1,4 +1,5 @@
 import json
+import httpx
 import requests
 
 from typing import List, Dict, Any
@@ -6,7 +7,8 @@ from typing import List, Dict, Any
 from mylib.config import ConfigLoader
 from mylib.kit import Loutput
 from mylib.kit.Lfind import get_embedding
-from mylib.lian_orm import Sql, MemoryLog, MemoryLogRole, MemoryLogMemoryType
+from mylib.kit.Ltransport import get_llm_transport
+from mylib.lian_orm import MemoryLog, MemoryLogRole, MemoryLogMemoryType, get_sql
 
 
 RESET = "\033[0m"
@@ -29,7 +31,7 @@ class MCPClient:
         self.base_url = "https://api.deepseek.com/v1"
         self.available_tools = self._load_tools()
         self.conversation_history = []
-        self.sql = Sql()
+        self.sql = get_sql()
     
     
     def _load_tools(self) -> List[Dict]:
@@ -50,9 +52,11 @@ class MCPClient:
         try:
             response = requests.post(
                 f"{self.mcp_server_url}/tools/{tool_name}/call",
-                json=arguments
+                json=arguments,
+                headers={"X-Tool-Timeout": "60"},
+                timeout=65
             )
-            if response.status_code == 200:
+            if response.status_code in (200, 429, 504):
                 result = response.json()
                 return result
             else:
@@ -125,27 +129,25 @@ TOOL_CALL_END
         }
         
         try:
-            response = requests.post(
+            result = get_llm_transport().post_json(
                 f"{self.base_url}/chat/completions",
+                payload,
                 headers=headers,
-                json=payload,
-                timeout=30
+                timeout=30,
+                label="MCPClient",
             )
-            
-            if response.status_code == 200:
-                result = response.json()
-                assistant_message = result["choices"][0]["message"]["content"]
-                
-                if not is_tool_result:
-                    self.conversation_history.append({"role": "user", "content": message})
-                else:
-                    self.conversation_history.append({"role": "user", "content": f"工具调用结果:\n{message}"})
-                self.conversation_history.append({"role": "assistant", "content": assistant_message})
-                
-                return assistant_message
+            assistant_message = result["choices"][0]["message"]["content"]
+
+            if not is_tool_result:
+                self.conversation_history.append({"role": "user", "content": message})
             else:
-                return f"API调用错误: {response.status_code} - {response.text}"
-                
+                self.conversation_history.append({"role": "user", "content": f"工具调用结果:\n{message}"})
+            self.conversation_history.append({"role": "assistant", "content": assistant_message})
+
+            return assistant_message
+
+        except httpx.HTTPStatusError as e:
+            return f"API调用错误: {e.response.status_code} - {e.response.text}"
         except Exception as e:
             return f"LLM调用错误: {str(e)}"
     
@@ -229,9 +231,10 @@ TOOL_CALL_END
                     result = self.call_tool(tool_name, tool_args)
                     
                     # 截断过长的工具输出，防止上下文溢出
+                    # (MCP Server 已将大结果转为句柄 + 预览, 可用 tool_result_slice 分页读取, 这里只兜底)
                     result_str = json.dumps(result, ensure_ascii=False)
                     if len(result_str) > 20000:
-                        result = f"结果过长 (长度 {len(result_str)}), 已截断: " + result_str[:20000] + "..."
+                        result = {"truncated": True, "total_length": len(result_str), "preview": result_str[:20000]}
                     
                     tool_results.append({
                         "tool": tool_name,
@@ -43,9 +43,10 @@ class MCPClientWeb:
             response = requests.post(
                 f"{self.mcp_server_url}/tools/{tool_name}/call",
                 json=arguments,
-                timeout=30
+                headers={"X-Tool-Timeout": "30"},
+                timeout=35
             )
-            if response.status_code == 200:
+            if response.status_code in (200, 429, 504):
                 result = response.json()
                 return result
             else:
@@ -211,9 +212,10 @@ TOOL_CALL_END
                     result = self.call_tool(tool_name, tool_args)
                     
                     # 截断过长的工具输出，防止上下文溢出
+                    # (MCP Server 已将大结果转为句柄 + 预览, 可用 tool_result_slice 分页读取, 这里只兜底)
                     result_str = json.dumps(result, ensure_ascii=False)
                     if len(result_str) > 20000:
-                        result = f"结果过长 (长度 {len(result_str)}), 已截断: " + result_str[:20000] + "..."
+                        result = {"truncated": True, "total_length": len(result_str), "preview": result_str[:20000]}
                     
                     log_history.append({
                         "type": "tool_execution",
@@ -13,10 +13,33 @@ MCP (Model Context Protocol) 模块
     # 方式 3: 直接调用工具（无需 HTTP）
     from mylib.mcp.tools import call_tool
     result = await call_tool("file_read", file_path="/path/to/file")
+    
+    # 方式 4: 按配置选择传输层 (inprocess / uds / http)
+    from mylib.mcp import get_tool_transport
+    transport = get_tool_transport("uds", uds="/tmp/lml-mcp.sock")
+    response = await transport.call("file_read", {"file_path": "/path/to/file"})
 """
 
-from .base import ToolResponse
-from .mcp import MCPServer
+import importlib
+
+
+# 按需导入: 只使用 mylib.mcp.tools 时不加载 FastAPI / uvicorn
+_LAZY_ATTRS = {
+    "MCPServer": ".mcp",
+    "ToolResponse": ".base",
+    "ToolTransport": ".transport",
+    "get_tool_transport": ".transport",
+    "tool_transport_from_config": ".transport",
+}
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
 
 
 __all__ = [
@@ -24,4 +47,8 @@ __all__ = [
     "MCPServer",
     # 数据模型
     "ToolResponse",
+    # 传输层
+    "ToolTransport",
+    "get_tool_transport",
+    "tool_transport_from_config",
 ]
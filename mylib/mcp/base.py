@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from typing import Any, Optional
+from typing import Any, Dict, Optional
 
 from pydantic import BaseModel
 
@@ -12,8 +12,20 @@ class ToolResponse(BaseModel):
     result: Optional[Any] = None
     success: bool
     error: Optional[str] = None
+    error_type: Optional[str] = None    # "timeout" / "busy", 其余错误为 None
+
+
+def tool_response(result: Any = None, success: bool = True, error: Optional[str] = None,
+                    error_type: Optional[str] = None) -> Dict[str, Any]:
+    """
+    构造与 ToolResponse.dict() 相同结构的字典
+
+    工具结果是服务端自己产生的可信数据, 不经过 Pydantic 校验与逐层复制 (dir_tree 等大结果开销明显)
+    """
+    return {"result": result, "success": success, "error": error, "error_type": error_type}
 
 
 __all__ = [
     "ToolResponse",
+    "tool_response",
 ]
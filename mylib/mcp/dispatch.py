@@ -0,0 +1,71 @@
+"""工具调用分发: HTTP 端点与进程内传输共用, 保证两者的响应一致"""
+
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from .base import tool_response
+from .tools import get_tool_loader, ToolLoader, ToolTimeoutError, ToolBusyError
+
+
+async def dispatch_tool_call(name: str, arguments: Dict[str, Any], timeout: Optional[float] = None,
+                                loader: Optional[ToolLoader] = None) -> Tuple[int, Dict[str, Any]]:
+    """
+    调用工具并转换为 ToolResponse 字典
+
+    Args:
+        name: 工具名
+        arguments: 工具参数
+        timeout: 本次调用的截止时间 (秒)
+        loader: 工具加载器, 默认为全局单例
+
+    Returns:
+        (HTTP 状态码, ToolResponse 字典); 超时为 504, 繁忙为 429, 其余为 200
+    """
+    loader = loader or get_tool_loader()
+    try:
+        result = await loader.invoke(name, arguments, timeout=timeout)
+        # 大结果保存在服务端, 只返回句柄与预览 (见 tool_result_slice)
+        result = loader.results.wrap(name, result, loader.cache_key(name, arguments))
+        return 200, tool_response(result)
+    except ToolTimeoutError as exc:
+        return 504, tool_response(success=False, error=str(exc), error_type="timeout")
+    except ToolBusyError as exc:
+        return 429, tool_response(success=False, error=str(exc), error_type="busy")
+    except Exception as exc:  # noqa: BLE001
+        return 200, tool_response(success=False, error=str(exc))
+
+
+async def stream_tool_events(name: str, arguments: Dict[str, Any], timeout: Optional[float] = None,
+                                loader: Optional[ToolLoader] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    流式调用工具, 产出事件字典
+
+    - {"event": "data", "data": 一批结果}
+    - {"event": "error", "error": 错误信息, "error_type": "timeout" / "busy" / "tool" / None}, 之后不再有事件
+    - {"event": "end", "count": data 事件数}
+
+    工具产出 {"success": False, ...} 时转为 error_type 为 "tool" 的 error 事件并结束; 工具抛出异常时 error_type 为 None。
+    未声明 stream_method 的工具只有一个 data 事件 (完整结果, 大结果同样转为句柄)
+    """
+    loader = loader or get_tool_loader()
+    meta = loader.get_tool_meta(name)
+    wrap = meta is None or not meta.stream_method
+    count = 0
+    try:
+        async for item in loader.stream(name, arguments, timeout=timeout):
+            if isinstance(item, dict) and item.get("success") is False:
+                yield {"event": "error", "error": item.get("error"), "error_type": "tool"}
+                return
+            if wrap:
+                item = loader.results.wrap(name, item, loader.cache_key(name, arguments))
+            count += 1
+            yield {"event": "data", "data": item}
+    except ToolTimeoutError as exc:
+        yield {"event": "error", "error": str(exc), "error_type": "timeout"}
+        return
+    except ToolBusyError as exc:
+        yield {"event": "error", "error": str(exc), "error_type": "busy"}
+        return
+    except Exception as exc:  # noqa: BLE001
+        yield {"event": "error", "error": str(exc), "error_type": None}
+        return
+    yield {"event": "end", "count": count}
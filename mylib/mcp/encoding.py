@@ -0,0 +1,141 @@
+"""
+响应编码 - 工具调用结果的快速 JSON 序列化与压缩
+
+- 安装了 orjson 时用其序列化, 否则退回标准库 json (紧凑格式, 不转义中文)
+- 客户端 Accept-Encoding 支持时压缩响应体: br (需安装 brotli) 优先, 其次 gzip
+- 不经过 FastAPI 的 jsonable_encoder 逐节点转换, dir_tree 等大结果直接一次序列化
+- 流式响应的 NDJSON / SSE 分帧
+"""
+
+import json
+import gzip
+import asyncio
+import datetime
+from enum import Enum
+from pathlib import PurePath
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# 小于该大小的响应不压缩 (压缩收益抵不过头部与 CPU 开销)
+COMPRESS_MIN_SIZE = 1024
+# 超过该大小时在线程中压缩, 不阻塞事件循环
+_THREAD_COMPRESS_SIZE = 256 * 1024
+_GZIP_LEVEL = 5
+_BROTLI_QUALITY = 4
+
+
+def _default(value: Any) -> Any:
+    """orjson / json 不能直接处理的类型, 与 jsonable_encoder 的结果保持一致"""
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if isinstance(value, PurePath):
+        return str(value)
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode("utf-8", errors="replace")
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    return str(value)
+
+
+def dumps(value: Any) -> bytes:
+    """序列化为 UTF-8 JSON 字节串"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # 超出 64 位的整数等 orjson 不支持的值, 交给标准库处理
+            pass
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+def loads(data: bytes) -> Any:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """按 Accept-Encoding 选择压缩方式 ("br" / "gzip" / None), 忽略 q=0 的项"""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for name in (("br", "gzip") if brotli is not None else ("gzip",)):
+        if accepted.get(name, accepted.get("*", 0.0)) > 0:
+            return name
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=_GZIP_LEVEL, mtime=0)
+
+
+async def encode_json(value: Any, accept_encoding: Optional[str] = None,
+                        min_size: int = COMPRESS_MIN_SIZE) -> Tuple[bytes, Dict[str, str]]:
+    """
+    序列化并按需压缩
+
+    Args:
+        value: 要序列化的值
+        accept_encoding: 请求头 Accept-Encoding, 为 None 时不压缩
+        min_size: 压缩的最小响应大小
+
+    Returns:
+        (响应体, 需要附加的响应头)
+    """
+    body = dumps(value)
+    encoding = choose_encoding(accept_encoding) if len(body) >= min_size else None
+    if encoding is None:
+        return body, {}
+    if len(body) >= _THREAD_COMPRESS_SIZE:
+        body = await asyncio.to_thread(compress, body, encoding)
+    else:
+        body = compress(body, encoding)
+    return body, {"Content-Encoding": encoding, "Vary": "Accept-Encoding"}
+
+
+def frame_event(event: Dict[str, Any], fmt: str = "ndjson") -> bytes:
+    """
+    流式事件编码
+
+    - ndjson: 每个事件一行 JSON
+    - sse: "event: <类型>\ndata: <JSON>\n\n", data 事件的 data 为结果本身
+    """
+    if fmt != "sse":
+        return dumps(event) + b"\n"
+    kind = event["event"]
+    payload = event["data"] if kind == "data" else {k: v for k, v in event.items() if k != "event"}
+    return b"event: " + kind.encode() + b"\ndata: " + dumps(payload) + b"\n\n"
+
+
+__all__ = [
+    "dumps",
+    "loads",
+    "choose_encoding",
+    "compress",
+    "encode_json",
+    "frame_event",
+]
@@ -1,20 +1,43 @@
 """MCP Server - FastAPI 服务器实现"""
 
+import os
+import stat
+import shutil
+import signal
+import socket
+import asyncio
+import inspect
+import tempfile
+import threading
 import uvicorn
 
 from pathlib import Path
-from typing import Any, Dict, List
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from mylib.config import ConfigLoader
 
-from .base import ToolResponse
+from .dispatch import dispatch_tool_call, stream_tool_events
+from .encoding import encode_json, frame_event, COMPRESS_MIN_SIZE
+from .metrics import ToolMetrics, ToolMetricsMiddleware, LoopLagMonitor
 from .tools import get_tool_loader
 
 
+# 多进程模式下传给 worker 的配置文件路径 / 大结果共享目录
+CONFIG_ENV = "LML_MCP_CONFIG"
+RESULTS_DIR_ENV = "LML_MCP_RESULTS_DIR"
+
+
 class MCPServer:
-    """MCP 服务器主类"""
+    """
+    MCP 服务器主类
+
+    [fastapi] workers > 1 时以多进程模式运行: 主进程绑定端口后启动多个 worker,
+    每个 worker 通过 create_app() 创建自己的 MCPServer 与工具实例。
+    """
 
     def __init__(self, config_path: str = None):
         """
@@ -24,16 +47,31 @@ class MCPServer:
             config_path: 配置文件路径，默认使用 mylib/mcp/config/mcp_config.toml
         """
         if config_path is None:
-            config_path = str(Path(__file__).parent / "config" / "mcp_config.toml")
+            config_path = os.environ.get(CONFIG_ENV) or str(Path(__file__).parent / "config" / "mcp_config.toml")
+        self._config_path = config_path
         self._config_loader = ConfigLoader(config_path=config_path)
         self._load_config()
 
         self._tool_loader = get_tool_loader()
+        self._apply_tools_config()
+        # 多进程模式: 主进程指定的共享目录 (配置文件中的 shared_dir 优先)
+        if os.environ.get(RESULTS_DIR_ENV) and self._tool_loader.results.shared_dir is None:
+            self._tool_loader.results.configure(shared_dir=os.environ[RESULTS_DIR_ENV])
+
+        # 就绪状态: 工具发现与预热完成后为 ready, 关闭时为 draining
+        self.state = "starting"
+        self._warm_up_task: Optional[asyncio.Task] = None
+        self._drain_timer: Optional[threading.Timer] = None
+
+        # 调用指标与事件循环延迟 (/metrics)
+        self.metrics = ToolMetrics()
+        self.loop_lag = LoopLagMonitor()
 
         self.app = FastAPI(
             title="MCP Server",
             version="1.0.0",
             description="Model Context Protocol Server - 提供统一的工具调用接口",
+            lifespan=self._lifespan,
         )
 
         self.app.add_middleware(
@@ -43,6 +81,12 @@ class MCPServer:
             allow_headers=["*"],
             allow_credentials=True,
         )
+        if self.metrics_enabled:
+            self.app.add_middleware(
+                ToolMetricsMiddleware,
+                metrics=self.metrics,
+                is_known=lambda name: self._tool_loader.get_tool_meta(name) is not None,
+            )
 
         self._register_routes()
 
@@ -53,10 +97,141 @@ class MCPServer:
             self.host = "0.0.0.0"
             self.port = 8080
             self.debug = False
+            self.uds = None
+            self.workers = 1
+            self.drain_timeout = 30.0
+            self.drain_delay = 0.0
+            self.preload = True
+            self.metrics_enabled = True
+            self.compression = True
+            self.compress_min_size = COMPRESS_MIN_SIZE
         else:
             self.host = fastapi_cfg.get("host", "0.0.0.0")
             self.port = int(fastapi_cfg.get("port", 8080))
             self.debug = bool(fastapi_cfg.get("debug", False))
+            # 同时监听的 Unix domain socket 路径, 供同机的 Agent 使用 (MCP_TRANSPORT = "uds")
+            self.uds = fastapi_cfg.get("uds") or None
+            # worker 进程数, 大于 1 时 CPU 密集的工具 (HTML 解析、目录遍历) 可用满多核
+            self.workers = max(1, int(fastapi_cfg.get("workers", 1)))
+            # 关闭时等待进行中请求完成的最长时间 (秒)
+            self.drain_timeout = float(fastapi_cfg.get("drain_timeout", 30))
+            # 收到退出信号后继续接受请求的时间 (秒), 期间 /ready 返回 503, 供负载均衡摘除本实例
+            self.drain_delay = float(fastapi_cfg.get("drain_delay", 0))
+            # 启动时预先实例化所有工具, 完成后才报告就绪
+            self.preload = bool(fastapi_cfg.get("preload", True))
+            # 记录工具调用指标并提供 /metrics
+            self.metrics_enabled = bool(fastapi_cfg.get("metrics", True))
+            # 按客户端 Accept-Encoding 压缩工具调用响应 (br 需安装 brotli)
+            self.compression = bool(fastapi_cfg.get("compression", True))
+            self.compress_min_size = int(fastapi_cfg.get("compress_min_size", COMPRESS_MIN_SIZE))
+
+    def _apply_tools_config(self):
+        """应用 [tools] 配置 (结果缓存、调用合并、大结果存储、调度等)"""
+        tools_cfg = getattr(self._config_loader, "tools", None)
+        if tools_cfg is None:
+            return
+        flight_cfg = tools_cfg.get("single_flight")
+        if flight_cfg is not None:
+            self._tool_loader.flight.enabled = bool(flight_cfg.get("enabled", True))
+
+        cache_cfg = tools_cfg.get("cache")
+        if cache_cfg is not None:
+            max_bytes = cache_cfg.get("max_bytes")
+            max_entry_bytes = cache_cfg.get("max_entry_bytes")
+            self._tool_loader.cache.configure(
+                enabled=bool(cache_cfg.get("enabled", True)),
+                max_bytes=int(max_bytes) if max_bytes is not None else None,
+                max_entry_bytes=int(max_entry_bytes) if max_entry_bytes is not None else None,
+            )
+
+        results_cfg = tools_cfg.get("results")
+        if results_cfg is not None:
+            self._tool_loader.results.configure(
+                enabled=bool(results_cfg.get("enabled", True)),
+                threshold=results_cfg.get("threshold"),
+                ttl=results_cfg.get("ttl"),
+                max_bytes=results_cfg.get("max_bytes"),
+                shared_dir=results_cfg.get("shared_dir"),
+            )
+
+        scheduler_cfg = tools_cfg.get("scheduler")
+        limits_cfg = tools_cfg.get("limits")
+        if scheduler_cfg is not None or limits_cfg is not None:
+            defaults = scheduler_cfg.to_dict() if scheduler_cfg is not None else {}
+            self._tool_loader.scheduler.configure(
+                enabled=bool(defaults.get("enabled", True)),
+                defaults={
+                    "timeout": defaults.get("default_timeout"),
+                    "max_concurrency": defaults.get("max_concurrency"),
+                    "queue_depth": defaults.get("queue_depth"),
+                },
+                overrides=limits_cfg.to_dict() if limits_cfg is not None else None,
+            )
+
+    @asynccontextmanager
+    async def _lifespan(self, app: FastAPI):
+        """
+        启动时在后台预热工具, 关闭时切换为 draining (uvicorn 负责等待进行中的请求)
+
+        由信号触发的关闭在 _on_exit_signal 中就已切换为 draining (早于关闭监听)
+        """
+        self._warm_up_task = asyncio.create_task(self._warm_up())
+        if self.metrics_enabled:
+            self.loop_lag.start()
+        self._hook_exit_signals()
+        try:
+            yield
+        finally:
+            self.state = "draining"
+            if self._drain_timer is not None:
+                self._drain_timer.cancel()
+            self.loop_lag.stop()
+            if not self._warm_up_task.done():
+                self._warm_up_task.cancel()
+
+    def _hook_exit_signals(self):
+        """
+        在 uvicorn 的退出信号处理之前切换为 draining
+
+        uvicorn 先关闭监听、等进行中的请求结束, 最后才执行 lifespan 关闭, 只在 lifespan 中切换时
+        /ready 不可能返回 draining。这里包装 uvicorn 已安装的 SIGINT / SIGTERM 处理函数
+        (单进程与多进程的 worker 都在主线程执行 lifespan)。
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            original = signal.getsignal(sig)
+            if callable(original):
+                signal.signal(sig, lambda sig, frame, original=original: self._on_exit_signal(original, sig, frame))
+
+    def _on_exit_signal(self, original, sig, frame):
+        """
+        drain_delay > 0 时推迟交给 uvicorn: 期间照常处理请求、/ready 返回 503, 负载均衡有时间摘除本实例;
+        期间再次收到信号立即关闭
+        """
+        self.state = "draining"
+        if self.drain_delay > 0 and self._drain_timer is None:
+            print(f"⏳ [{os.getpid()}] 收到退出信号, {self.drain_delay:g} 秒后停止接受新连接")
+            self._drain_timer = threading.Timer(self.drain_delay, original, (sig, frame))
+            self._drain_timer.daemon = True
+            self._drain_timer.start()
+            return
+        if self._drain_timer is not None:
+            self._drain_timer.cancel()
+        original(sig, frame)
+
+    async def _warm_up(self):
+        """在线程中实例化工具类, 不阻塞 /health 等请求"""
+        try:
+            if not self._tool_loader.tools_meta:
+                await asyncio.to_thread(self._tool_loader.discover)
+            if self.preload:
+                await asyncio.to_thread(self._tool_loader.preload)
+            if self.state == "starting":
+                self.state = "ready"
+        except Exception as exc:  # noqa: BLE001
+            print(f"[MCPServer] 工具预热失败: {exc}")
+            self.state = "failed"
 
     def _register_routes(self):
         """注册所有 API 路由"""
@@ -74,6 +249,20 @@ class MCPServer:
         async def health():
             """健康检查端点"""
             return {"status": "healthy", "service": "mcp-server"}
+
+        @self.app.get("/ready")
+        async def ready():
+            """就绪探针: 工具发现与预热完成前、关闭中返回 503"""
+            body = {"status": self.state, "pid": os.getpid(), "tools_count": len(self._tool_loader.tools_meta)}
+            return JSONResponse(status_code=200 if self.state == "ready" else 503, content=body)
+
+        @self.app.get("/metrics")
+        async def metrics():
+            """Prometheus 指标: 各工具调用次数、错误、耗时分布、响应大小、缓存命中率、事件循环延迟"""
+            if not self.metrics_enabled:
+                raise HTTPException(status_code=404, detail="指标未启用 ([fastapi] metrics = false)")
+            text = self.metrics.render(self._tool_loader, self.loop_lag)
+            return PlainTextResponse(text, media_type="text/plain; version=0.0.4; charset=utf-8")
         
         @self.app.get("/help")
         async def help():
@@ -84,9 +273,12 @@ class MCPServer:
                     "/": "获取服务状态",
                     "/help": "获取服务帮助",
                     "/healthy": "健康检查",
+                    "/ready": "就绪探针 (工具预热完成后返回 200)",
+                    "/metrics": "Prometheus 指标",
                     "/tools": "获取所有可用工具列表",
                     "/tools/{tool_name}": "获取指定工具的详细信息",
                     "/tools/{tool_name}/call": "调用单个工具",
+                    "/tools/{tool_name}/stream": "流式调用工具 (NDJSON / SSE)",
                     "/tools/reload": "热重载工具元数据与绑定",
                 },
             }
@@ -105,15 +297,78 @@ class MCPServer:
             return {"tool": meta.to_dict()}
 
         @self.app.post("/tools/{tool_name}/call")
-        async def call_single_tool(tool_name: str, arguments: Dict[str, Any]):
-            """调用单个工具"""
-            try:
-                result = await self._tool_loader.call(tool_name, **arguments)
-                return ToolResponse(result=result, success=True).dict()
-            except ValueError as exc:
-                return ToolResponse(result=None, success=False, error=str(exc)).dict()
-            except Exception as exc:  # noqa: BLE001
-                return ToolResponse(result=None, success=False, error=str(exc)).dict()
+        async def call_single_tool(
+            tool_name: str,
+            arguments: Dict[str, Any],
+            request: Request,
+            x_tool_timeout: Optional[float] = Header(None),
+        ):
+            """
+            调用单个工具
+
+            请求头 X-Tool-Timeout (秒) 指定本次调用的截止时间, 与工具默认值取较小者;
+            超时返回 504, 工具繁忙返回 429, 响应体的 error_type 分别为 "timeout" / "busy"
+
+            响应直接序列化 (orjson 可用时使用), 不经过 jsonable_encoder; 按 Accept-Encoding 压缩
+            """
+            status, body = await dispatch_tool_call(tool_name, arguments, x_tool_timeout, self._tool_loader)
+            # 供 ToolMetricsMiddleware 按错误类型计数
+            result = body["result"]
+            if not body["success"]:
+                request.state.tool_error = body.get("error_type") or "exception"
+            elif isinstance(result, dict) and result.get("success") is False:
+                request.state.tool_error = "tool"
+            accept_encoding = request.headers.get("accept-encoding") if self.compression else None
+            content, headers = await encode_json(body, accept_encoding, self.compress_min_size)
+            if status == 429:
+                headers["Retry-After"] = "1"
+            return Response(content, status_code=status, media_type="application/json", headers=headers)
+
+        @self.app.post("/tools/{tool_name}/stream")
+        async def stream_single_tool(
+            tool_name: str,
+            arguments: Dict[str, Any],
+            request: Request,
+            format: Optional[str] = None,
+            x_tool_timeout: Optional[float] = Header(None),
+        ):
+            """
+            流式调用工具, 逐批返回结果
+
+            ?format=sse 或请求头 Accept: text/event-stream 时返回 Server-Sent Events, 否则返回 NDJSON;
+            事件见 stream_tool_events。第一个事件就是超时 / 繁忙时直接返回 504 / 429 (与 /call 相同)
+            """
+            fmt = format or ("sse" if "text/event-stream" in request.headers.get("accept", "") else "ndjson")
+            if fmt not in ("sse", "ndjson"):
+                raise HTTPException(status_code=400, detail=f"不支持的格式: {fmt} (可选 ndjson / sse)")
+
+            events = stream_tool_events(tool_name, arguments, x_tool_timeout, self._tool_loader)
+            first = await events.__anext__()
+            # 供 ToolMetricsMiddleware 按错误类型计数 (流中途的错误在 body 中记录)
+            if first["event"] == "error":
+                request.state.tool_error = first.get("error_type") or "exception"
+            status = {"timeout": 504, "busy": 429}.get(first.get("error_type"))
+            if first["event"] == "error" and status is not None:
+                await events.aclose()
+                body, _ = await encode_json({"result": None, "success": False,
+                                                "error": first["error"], "error_type": first["error_type"]})
+                headers = {"Retry-After": "1"} if status == 429 else None
+                return Response(body, status_code=status, media_type="application/json", headers=headers)
+
+            async def body():
+                try:
+                    yield frame_event(first, fmt)
+                    async for event in events:
+                        if event["event"] == "error":
+                            request.state.tool_error = event.get("error_type") or "exception"
+                        yield frame_event(event, fmt)
+                finally:
+                    # 客户端断开时关闭工具的生成器, 释放执行槽位
+                    await events.aclose()
+
+            media_type = "text/event-stream" if fmt == "sse" else "application/x-ndjson"
+            headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+            return StreamingResponse(body(), media_type=media_type, headers=headers)
 
         @self.app.post("/tools/reload")
         async def reload_tools():
@@ -128,7 +383,7 @@ class MCPServer:
             except Exception as exc:  # noqa: BLE001
                 return {"success": False, "error": str(exc)}
 
-    def run(self, host: str = None, port: int = None, reload: bool = False, **kwargs):
+    def run(self, host: str = None, port: int = None, reload: bool = False, workers: int = None, **kwargs):
         """
         运行服务器
 
@@ -136,24 +391,70 @@ class MCPServer:
             host: 主机地址，默认使用配置文件中的值
             port: 端口号，默认使用配置文件中的值
             reload: 是否启用热重载（开发模式）
-            **kwargs: 传递给 uvicorn.run 的其他参数
+            workers: worker 进程数，默认使用配置文件中的值
+            **kwargs: 传递给 uvicorn.Config 的其他参数
         """
         run_host = host or self.host
         run_port = port or self.port
+        run_workers = workers or self.workers
 
         if reload:
             print("⚠️  热重载模式需要使用导入字符串，已自动禁用 reload")
             print("💡 提示: 如需热重载，请直接运行: uvicorn mylib.mcp.mcp:app --reload")
-            reload = False
 
-        uvicorn.run(
-            self.app,
+        options = dict(
             host=run_host,
             port=run_port,
             log_level="debug" if self.debug else "info",
-            reload=reload,
+            timeout_graceful_shutdown=self.drain_timeout,
             **kwargs,
         )
+        if run_workers <= 1:
+            config = uvicorn.Config(self.app, **options)
+            sockets = self._bind_sockets(config)
+            try:
+                uvicorn.Server(config).run(sockets=sockets)
+            except KeyboardInterrupt:
+                # uvicorn 优雅关闭后会重新抛出 SIGINT
+                pass
+            finally:
+                self._close_sockets(sockets)
+            return
+
+        # 多进程: worker 由 create_app 工厂创建, 通过环境变量拿到同一份配置
+        os.environ[CONFIG_ENV] = self._config_path
+        # 大结果句柄需要在 worker 之间共享 (分页请求可能落到另一个 worker)
+        results_dir = None
+        if self._tool_loader.results.shared_dir is None and not os.environ.get(RESULTS_DIR_ENV):
+            results_dir = tempfile.mkdtemp(prefix="lml-mcp-results-")
+            os.environ[RESULTS_DIR_ENV] = results_dir
+        config = uvicorn.Config(f"{__name__}:create_app", factory=True, workers=run_workers, **options)
+        sockets = self._bind_sockets(config)
+        print(f"🚀 多进程模式: {run_workers} 个 worker")
+        try:
+            _supervise(config, sockets)
+        finally:
+            self._close_sockets(sockets)
+            if results_dir:
+                shutil.rmtree(results_dir, ignore_errors=True)
+
+    def _bind_sockets(self, config: "uvicorn.Config") -> List[socket.socket]:
+        """绑定 TCP 端口, 配置了 uds 时同时绑定 Unix socket"""
+        sockets = [config.bind_socket()]
+        if self.uds:
+            path = str(self.uds)
+            # 上次异常退出遗留的 socket 文件
+            if os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode):
+                os.remove(path)
+            sockets.append(uvicorn.Config(config.app, uds=path).bind_socket())
+            print(f"🔌 Unix socket: {path}")
+        return sockets
+
+    def _close_sockets(self, sockets: List[socket.socket]):
+        for sock in sockets:
+            sock.close()
+        if self.uds and os.path.exists(str(self.uds)):
+            os.remove(str(self.uds))
 
     def get_tools_list(self) -> List[Dict[str, Any]]:
         """获取所有工具列表"""
@@ -163,14 +464,39 @@ class MCPServer:
         """获取指定工具的元数据"""
         return self._tool_loader.get_tool_meta(tool_name)
 
-    async def call_tool(self, tool_name: str, **kwargs) -> Any:
+    async def call_tool(self, tool_name: str, /, **kwargs) -> Any:
         """直接调用工具（不通过 HTTP）"""
         return await self._tool_loader.call(tool_name, **kwargs)
 
 
-# 全局应用实例（用于 uvicorn 热重载）
-# 使用方式: uvicorn mylib.mcp.mcp:app --reload --host 0.0.0.0 --port 8080
-app = MCPServer().app
+def create_app(config_path: Optional[str] = None) -> FastAPI:
+    """
+    应用工厂: 每次调用创建独立的 MCPServer (多进程模式下每个 worker 调用一次)
+    使用方式: uvicorn mylib.mcp.mcp:create_app --factory --workers 4
+    """
+    return MCPServer(config_path).app
+
+
+def _supervise(config: "uvicorn.Config", sockets: List[socket.socket]):
+    """启动 uvicorn 的多进程管理器 (兼容新旧版本的构造参数)"""
+    from uvicorn.supervisors import Multiprocess
+
+    if "target" in inspect.signature(Multiprocess).parameters:
+        Multiprocess(config, target=uvicorn.Server(config).run, sockets=sockets).run()
+    else:
+        Multiprocess(config, sockets=sockets).run()
+
+
+def __getattr__(name: str):
+    """
+    全局应用实例（用于 uvicorn 热重载），首次访问 mylib.mcp.mcp.app 时才创建
+    使用方式: uvicorn mylib.mcp.mcp:app --reload --host 0.0.0.0 --port 8080
+    """
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,336 @@
+"""
+MCP Server 指标 - Prometheus 文本格式 (/metrics)
+
+- ToolMetrics: 按工具统计调用次数、错误、耗时分布、响应大小、进行中的调用数
+- ToolMetricsMiddleware: ASGI 中间件, 包在 /tools/{tool_name}/call 与 /stream 外层记录上述指标
+- LoopLagMonitor: 定时测量事件循环延迟 (阻塞代码占住事件循环时升高)
+
+缓存命中率、调用合并、排队与大结果存储的计数直接读取 ToolLoader 各组件的 stats()。
+"""
+
+import re
+import time
+import asyncio
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+# 耗时分桶 (秒) / 响应大小分桶 (字节)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+QUANTILES = (0.5, 0.95, 0.99)
+# 计算分位数使用的最近样本数
+_RECENT_SAMPLES = 1024
+# 未注册的工具名统一记为该标签, 避免任意路径撑大标签集合
+UNKNOWN_TOOL = "_unknown"
+
+_TOOL_PATH = re.compile(r"^/tools/([^/]+)/(?:call|stream)$")
+
+
+class Histogram:
+    """累积分桶直方图, 同时保留最近的样本用于计算分位数"""
+
+    __slots__ = ("buckets", "counts", "sum", "count", "recent")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.recent: deque = deque(maxlen=_RECENT_SAMPLES)
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+        self.recent.append(value)
+
+    def quantiles(self, qs: Iterable[float] = QUANTILES) -> Dict[float, float]:
+        samples = sorted(self.recent)
+        if not samples:
+            return {}
+        return {q: samples[min(len(samples) - 1, int(q * len(samples)))] for q in qs}
+
+
+class _ToolStats:
+    __slots__ = ("calls", "errors", "latency", "size", "in_flight")
+
+    def __init__(self):
+        # HTTP 状态码 -> 次数
+        self.calls: Dict[int, int] = {}
+        # 错误类型 (tool / exception / timeout / busy / http) -> 次数
+        self.errors: Dict[str, int] = {}
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.size = Histogram(SIZE_BUCKETS)
+        self.in_flight = 0
+
+
+class ToolMetrics:
+    """按工具汇总的调用指标 (进程内, 多进程模式下每个 worker 各自统计)"""
+
+    def __init__(self):
+        self._tools: Dict[str, _ToolStats] = {}
+        self.started = time.time()
+
+    def _get(self, tool: str) -> _ToolStats:
+        stats = self._tools.get(tool)
+        if stats is None:
+            stats = self._tools[tool] = _ToolStats()
+        return stats
+
+    def begin(self, tool: str):
+        self._get(tool).in_flight += 1
+
+    def finish(self, tool: str, status: int, elapsed: float, size: int, error_type: Optional[str] = None):
+        """
+        记录一次调用
+
+        Args:
+            tool: 工具名
+            status: HTTP 状态码
+            elapsed: 耗时 (秒, 含序列化与发送)
+            size: 响应体字节数
+            error_type: 错误类型, 成功时为 None
+        """
+        stats = self._get(tool)
+        stats.in_flight -= 1
+        stats.calls[status] = stats.calls.get(status, 0) + 1
+        if error_type:
+            stats.errors[error_type] = stats.errors.get(error_type, 0) + 1
+        stats.latency.observe(elapsed)
+        stats.size.observe(size)
+
+    def stats(self) -> Dict[str, Any]:
+        """JSON 形式的概要 (各工具的调用数、错误数、分位数耗时)"""
+        return {
+            tool: {
+                "calls": sum(stats.calls.values()),
+                "errors": sum(stats.errors.values()),
+                "in_flight": stats.in_flight,
+                "latency": {f"p{int(q * 100)}": value for q, value in stats.latency.quantiles().items()},
+            }
+            for tool, stats in self._tools.items()
+        }
+
+    def render(self, loader=None, loop_lag: Optional["LoopLagMonitor"] = None) -> str:
+        """
+        生成 Prometheus 文本格式
+
+        Args:
+            loader: ToolLoader, 提供缓存 / 调用合并 / 调度 / 大结果存储的计数
+            loop_lag: 事件循环延迟监视器
+        """
+        out = _Writer()
+
+        out.family("mcp_tool_calls_total", "counter", "工具调用次数 (按 HTTP 状态码)")
+        for tool, stats in self._tools.items():
+            for status, count in sorted(stats.calls.items()):
+                out.sample("mcp_tool_calls_total", count, tool=tool, status=status)
+
+        out.family("mcp_tool_errors_total", "counter", "工具调用失败次数 (tool: 工具返回失败, exception: 工具抛出异常, timeout / busy / http)")
+        for tool, stats in self._tools.items():
+            for error_type, count in sorted(stats.errors.items()):
+                out.sample("mcp_tool_errors_total", count, tool=tool, error_type=error_type)
+
+        out.family("mcp_tool_in_flight", "gauge", "进行中的工具调用数")
+        for tool, stats in self._tools.items():
+            out.sample("mcp_tool_in_flight", stats.in_flight, tool=tool)
+
+        out.family("mcp_tool_duration_seconds", "histogram", "工具调用耗时 (含序列化与发送)")
+        for tool, stats in self._tools.items():
+            out.histogram("mcp_tool_duration_seconds", stats.latency, tool=tool)
+
+        out.family("mcp_tool_latency_seconds", "summary", f"工具调用耗时分位数 (最近 {_RECENT_SAMPLES} 次)")
+        for tool, stats in self._tools.items():
+            for q, value in stats.latency.quantiles().items():
+                out.sample("mcp_tool_latency_seconds", value, tool=tool, quantile=q)
+            out.sample("mcp_tool_latency_seconds_sum", stats.latency.sum, tool=tool)
+            out.sample("mcp_tool_latency_seconds_count", stats.latency.count, tool=tool)
+
+        out.family("mcp_tool_response_bytes", "histogram", "工具调用响应体大小")
+        for tool, stats in self._tools.items():
+            out.histogram("mcp_tool_response_bytes", stats.size, tool=tool)
+
+        if loader is not None:
+            _render_loader(out, loader)
+
+        if loop_lag is not None:
+            out.family("mcp_event_loop_lag_seconds", "gauge", "最近一次测得的事件循环延迟")
+            out.sample("mcp_event_loop_lag_seconds", loop_lag.last)
+            out.family("mcp_event_loop_lag_max_seconds", "gauge", "启动以来最大的事件循环延迟")
+            out.sample("mcp_event_loop_lag_max_seconds", loop_lag.max)
+            out.family("mcp_event_loop_lag", "histogram", "事件循环延迟分布 (秒)")
+            out.histogram("mcp_event_loop_lag", loop_lag.histogram)
+
+        out.family("mcp_process_start_time_seconds", "gauge", "进程启动时间 (Unix 时间戳)")
+        out.sample("mcp_process_start_time_seconds", self.started)
+        return out.text()
+
+
+def _render_loader(out: "_Writer", loader):
+    cache = loader.cache.stats()
+    out.family("mcp_tool_cache_lookups_total", "counter", "结果缓存查询次数 (result: hit / miss)")
+    for tool, counts in cache["tools"].items():
+        out.sample("mcp_tool_cache_lookups_total", counts["hits"], tool=tool, result="hit")
+        out.sample("mcp_tool_cache_lookups_total", counts["misses"], tool=tool, result="miss")
+    out.family("mcp_tool_cache_hit_ratio", "gauge", "结果缓存命中率")
+    for tool, counts in cache["tools"].items():
+        lookups = counts["hits"] + counts["misses"]
+        out.sample("mcp_tool_cache_hit_ratio", counts["hits"] / lookups if lookups else 0.0, tool=tool)
+    out.family("mcp_cache_bytes", "gauge", "结果缓存占用字节数 (估算)")
+    out.sample("mcp_cache_bytes", cache["bytes"])
+    out.family("mcp_cache_evictions_total", "counter", "结果缓存淘汰次数")
+    out.sample("mcp_cache_evictions_total", cache["evictions"])
+    out.family("mcp_cache_invalidations_total", "counter", "写操作导致的缓存失效条目数")
+    out.sample("mcp_cache_invalidations_total", cache["invalidations"])
+
+    flight = loader.flight.stats()
+    out.family("mcp_single_flight_total", "counter", "调用合并 (outcome: executed / shared / cancelled)")
+    out.sample("mcp_single_flight_total", flight["executions"], outcome="executed")
+    out.sample("mcp_single_flight_total", flight["shared"], outcome="shared")
+    out.sample("mcp_single_flight_total", flight["cancelled"], outcome="cancelled")
+
+    lanes = loader.scheduler.stats()
+    out.family("mcp_tool_queued_total", "counter", "并发已满时进入排队的调用次数")
+    for tool, lane in lanes.items():
+        out.sample("mcp_tool_queued_total", lane["queued"], tool=tool)
+    out.family("mcp_tool_rejected_total", "counter", "排队已满被拒绝的调用次数")
+    for tool, lane in lanes.items():
+        out.sample("mcp_tool_rejected_total", lane["rejected"], tool=tool)
+    out.family("mcp_tool_waiting", "gauge", "正在排队的调用数")
+    for tool, lane in lanes.items():
+        out.sample("mcp_tool_waiting", lane["waiting"], tool=tool)
+
+    results = loader.results.stats()
+    out.family("mcp_result_handles", "gauge", "服务端保存的大结果句柄数")
+    out.sample("mcp_result_handles", results["handles"])
+    out.family("mcp_result_bytes", "gauge", "服务端保存的大结果字节数 (估算)")
+    out.sample("mcp_result_bytes", results["bytes"])
+
+
+class _Writer:
+    """Prometheus 文本格式输出"""
+
+    def __init__(self):
+        self._lines: List[str] = []
+
+    def family(self, name: str, kind: str, help_text: str):
+        self._lines.append(f"# HELP {name} {help_text}")
+        self._lines.append(f"# TYPE {name} {kind}")
+
+    def sample(self, name: str, value: float, **labels):
+        if labels:
+            rendered = ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+            self._lines.append(f"{name}{{{rendered}}} {_number(value)}")
+        else:
+            self._lines.append(f"{name} {_number(value)}")
+
+    def histogram(self, name: str, histogram: Histogram, **labels):
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            self.sample(f"{name}_bucket", cumulative, **labels, le=_number(bound))
+        self.sample(f"{name}_bucket", histogram.count, **labels, le="+Inf")
+        self.sample(f"{name}_sum", histogram.sum, **labels)
+        self.sample(f"{name}_count", histogram.count, **labels)
+
+    def text(self) -> str:
+        return "\n".join(self._lines) + "\n"
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+class ToolMetricsMiddleware:
+    """
+    ASGI 中间件: 记录 /tools/{tool_name}/call 与 /tools/{tool_name}/stream 的耗时、状态码与响应大小
+
+    调用失败时端点在 scope["state"]["tool_error"] 中写入错误类型 (tool / exception / timeout / busy);
+    流式调用的耗时与大小覆盖整个流 (响应体发送完毕才返回), 流中途的错误同样写入 tool_error
+    """
+
+    def __init__(self, app, metrics: ToolMetrics, is_known: Callable[[str], bool]):
+        """
+        Args:
+            app: 下游 ASGI 应用
+            metrics: 指标汇总
+            is_known: 判断工具名是否已注册
+        """
+        self.app = app
+        self.metrics = metrics
+        self.is_known = is_known
+
+    async def __call__(self, scope, receive, send):
+        match = _TOOL_PATH.match(scope.get("path", "")) if scope["type"] == "http" else None
+        if match is None:
+            await self.app(scope, receive, send)
+            return
+
+        tool = match.group(1) if self.is_known(match.group(1)) else UNKNOWN_TOOL
+        state = scope.setdefault("state", {})
+        status, size = 500, 0
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        self.metrics.begin(tool)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            error_type = state.get("tool_error")
+            if error_type is None and status >= 400:
+                error_type = "http"
+            self.metrics.finish(tool, status, time.perf_counter() - started, size, error_type)
+
+
+class LoopLagMonitor:
+    """
+    事件循环延迟监视器
+
+    每隔 interval 秒 sleep 一次, 实际唤醒时间与预期的差值即为延迟;
+    同步的工具代码或序列化占住事件循环时该值升高
+    """
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.last = 0.0
+        self.max = 0.0
+        self.histogram = Histogram(LATENCY_BUCKETS)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self.last = lag
+            self.max = max(self.max, lag)
+            self.histogram.observe(lag)
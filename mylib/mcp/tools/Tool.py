@@ -6,8 +6,18 @@ Tool - MCP 工具加载器
 
 import importlib
 import pkgutil
-from typing import Dict, List, Callable, Any, Optional, Tuple
-from dataclasses import dataclass
+from contextlib import AsyncExitStack
+from typing import AsyncIterator, Dict, List, Callable, Any, Optional, Tuple
+from dataclasses import dataclass, field
+
+from .cache import ToolResultCache
+from .flight import SingleFlight
+from .scheduler import ToolScheduler
+from .results import get_result_store
+
+
+# 与工具模块同级的内部模块, 扫描时跳过
+_INTERNAL_MODULES = {"Tool", "cache", "flight", "paths", "scheduler", "results", "stream"}
 
 
 @dataclass
@@ -20,6 +30,15 @@ class ToolMetaData:
     class_name: str
     method: str
     async_method: bool = False
+    cacheable: bool = False                                     # 结果是否可缓存 (只读工具)
+    ttl: float = 0.0                                            # 缓存有效期 (秒)
+    paths: List[str] = field(default_factory=list)              # 表示路径的参数名
+    invalidate_on: List[str] = field(default_factory=list)      # 调用后使本工具缓存失效的工具
+    coalesce: bool = False                                      # 是否合并并发的相同调用 (只读工具)
+    timeout: Optional[float] = None                             # 默认截止时间 (秒)
+    max_concurrency: Optional[int] = None                       # 同时执行的调用数上限
+    queue_depth: Optional[int] = None                           # 并发已满时最多排队的调用数
+    stream_method: Optional[str] = None                         # 流式版本的方法名 (异步生成器)
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典格式"""
@@ -30,7 +49,16 @@ class ToolMetaData:
             "module": self.module,
             "class_name": self.class_name,
             "method": self.method,
-            "async_method": self.async_method
+            "async_method": self.async_method,
+            "cacheable": self.cacheable,
+            "ttl": self.ttl,
+            "paths": self.paths,
+            "invalidate_on": self.invalidate_on,
+            "coalesce": self.coalesce,
+            "timeout": self.timeout,
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": self.queue_depth,
+            "stream_method": self.stream_method,
         }
 
 
@@ -52,6 +80,12 @@ class ToolLoader:
         
         # 调用工具
         result = await loader.call("file_read", file_path="/path/to/file")
+    
+    TOOL_METADATA 中声明 cacheable / ttl 的工具结果会被缓存 (见 ToolResultCache),
+    invalidate_on 中的工具调用后相关缓存失效。
+    声明 coalesce 的工具, 并发的相同调用只执行一次 (见 SingleFlight)。
+    timeout / max_concurrency / queue_depth 控制截止时间与并发 (见 ToolScheduler)。
+    声明 stream_method 的工具可通过 stream() 逐批返回结果。
     """
     
     _instance: Optional["ToolLoader"] = None
@@ -68,8 +102,14 @@ class ToolLoader:
         
         self.package = package
         self.tools_meta: List[ToolMetaData] = []
+        self._meta_index: Dict[str, ToolMetaData] = {}
         self.callables: Dict[str, Callable[..., Any]] = {}
         self._instances: Dict[Tuple[str, str], Any] = {}
+        self.cache = ToolResultCache()
+        self.flight = SingleFlight()
+        self.scheduler = ToolScheduler()
+        # 大结果存储, 由 MCPServer 在返回响应前使用 (进程内调用不转存)
+        self.results = get_result_store()
         self._initialized = True
     
     def _iter_package_modules(self):
@@ -78,7 +118,7 @@ class ToolLoader:
         modules = []
         
         for finder, name, ispkg in pkgutil.iter_modules(pkg.__path__):
-            if name.startswith("__") or name == "Tool":
+            if name.startswith("__") or name in _INTERNAL_MODULES:
                 continue
             
             full_name = f"{self.package}.{name}"
@@ -127,7 +167,16 @@ class ToolLoader:
                         module=entry.get("module"),
                         class_name=entry.get("class_name"),
                         method=entry.get("method"),
-                        async_method=entry.get("async_method", False)
+                        async_method=entry.get("async_method", False),
+                        cacheable=bool(entry.get("cacheable", False)),
+                        ttl=float(entry.get("ttl", 0.0)),
+                        paths=list(entry.get("paths", [])),
+                        invalidate_on=list(entry.get("invalidate_on", [])),
+                        coalesce=bool(entry.get("coalesce", False)),
+                        timeout=entry.get("timeout"),
+                        max_concurrency=entry.get("max_concurrency"),
+                        queue_depth=entry.get("queue_depth"),
+                        stream_method=entry.get("stream_method"),
                     )
                     metas.append(tm)
                 except Exception as e:
@@ -135,7 +184,11 @@ class ToolLoader:
                     continue
         
         self.tools_meta = metas
-        self._build_callables()
+        self._meta_index = {meta.name: meta for meta in metas}
+        self.cache.register(metas)
+        self.scheduler.register(metas)
+        # 工具类在首次调用时才实例化，见 get_tool_callable
+        self.callables = {}
         return self.tools_meta
     
     def _get_instance(self, module_name: str, class_name: str):
@@ -150,20 +203,22 @@ class ToolLoader:
         self._instances[key] = inst
         return inst
     
-    def _build_callables(self):
-        """构建工具名到可调用方法的映射"""
-        call_map: Dict[str, Callable[..., Any]] = {}
-        
+    def _bind(self, meta: ToolMetaData) -> Optional[Callable[..., Any]]:
+        """实例化工具类并绑定方法"""
+        try:
+            inst = self._get_instance(meta.module, meta.class_name)
+            fn = getattr(inst, meta.method)
+        except Exception as e:
+            print(f"[ToolLoader] 无法绑定工具 {meta.name}: {e}")
+            return None
+        self.callables[meta.name] = fn
+        return fn
+    
+    def preload(self):
+        """预先实例化并绑定所有工具 (默认按需绑定，需要预热时调用)"""
         for meta in self.tools_meta:
-            try:
-                inst = self._get_instance(meta.module, meta.class_name)
-                fn = getattr(inst, meta.method)
-                call_map[meta.name] = fn
-            except Exception as e:
-                print(f"[ToolLoader] 无法绑定工具 {meta.name}: {e}")
-                continue
-        
-        self.callables = call_map
+            if meta.name not in self.callables:
+                self._bind(meta)
     
     def get_tools_list(self) -> List[Dict[str, Any]]:
         """
@@ -191,14 +246,11 @@ class ToolLoader:
         Returns:
             ToolMetaData 或 None
         """
-        for meta in self.tools_meta:
-            if meta.name == name:
-                return meta
-        return None
+        return self._meta_index.get(name)
     
     def get_tool_callable(self, name: str) -> Optional[Callable]:
         """
-        获取指定工具的可调用方法
+        获取指定工具的可调用方法 (首次获取时实例化工具类)
         
         Args:
             name: 工具名称
@@ -206,9 +258,15 @@ class ToolLoader:
         Returns:
             可调用方法或 None
         """
-        return self.callables.get(name)
+        fn = self.callables.get(name)
+        if fn is not None:
+            return fn
+        meta = self._meta_index.get(name)
+        if meta is None:
+            return None
+        return self._bind(meta)
     
-    async def call(self, name: str, **kwargs) -> Any:
+    async def call(self, name: str, /, **kwargs) -> Any:
         """
         调用指定工具
         
@@ -221,21 +279,142 @@ class ToolLoader:
             
         Raises:
             ValueError: 工具不存在
+            ToolTimeoutError: 超过截止时间
+            ToolBusyError: 工具并发与排队已满
             Exception: 工具执行错误
         """
-        fn = self.callables.get(name)
+        return await self.invoke(name, kwargs)
+    
+    async def invoke(self, name: str, arguments: Dict[str, Any], timeout: Optional[float] = None) -> Any:
+        """
+        调用指定工具, 可指定本次调用的截止时间
+        
+        Args:
+            name: 工具名称
+            arguments: 工具参数
+            timeout: 截止时间 (秒), 与工具默认值取较小者
+        """
+        fn = self.get_tool_callable(name)
         if fn is None:
             raise ValueError(f"工具不存在: {name}")
         
+        async with self.scheduler.deadline(name, timeout):
+            return await self._call(name, fn, arguments)
+    
+    def cache_key(self, name: str, arguments: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+        """可缓存工具本次调用的缓存键 (ResultStore 据此复用大结果的句柄), 不可缓存时返回 None"""
+        meta = self.get_tool_meta(name)
+        if meta is None or not meta.cacheable:
+            return None
+        fn = self.get_tool_callable(name)
+        made = self.cache.make_key(name, fn, arguments) if fn is not None else None
+        return made[0] if made else None
+
+    async def _call(self, name: str, fn: Callable[..., Any], kwargs: Dict[str, Any]) -> Any:
+        meta = self.get_tool_meta(name)
+        if meta is None:
+            return await self._invoke(meta, fn, kwargs)
+        
+        cache = self.cache
+        use_cache = cache.enabled and meta.cacheable
+        use_flight = self.flight.enabled and meta.coalesce
+        if use_cache or use_flight:
+            cached = cache.make_key(name, fn, kwargs)
+            if cached is not None:
+                key, paths = cached
+                if use_cache:
+                    hit, value = cache.get(key)
+                    if hit:
+                        return value
+                if not use_flight:
+                    return await self._execute(meta, fn, kwargs, key, paths)
+                # 键中带上失效代数: 写操作之后到达的调用不会合并到写之前开始的执行
+                return await self.flight.do(
+                    (key, cache.generation),
+                    lambda: self._execute(meta, fn, kwargs, key, paths, use_cache, shared=True),
+                )
+        
+        if not cache.invalidates(name):
+            return await self._run(meta, fn, kwargs)
+        try:
+            return await self._run(meta, fn, kwargs)
+        finally:
+            # 写操作失败也可能已部分生效, 总是失效
+            cache.invalidate(name, kwargs, fn)
+    
+    async def _execute(self, meta: ToolMetaData, fn: Callable[..., Any], kwargs: Dict[str, Any],
+                        key, paths, store: bool = True, shared: bool = False) -> Any:
+        """执行工具并 (按需) 写入缓存, 合并调用时只由实际执行的一方写入"""
+        generation = self.cache.generation
+        if shared:
+            async with self.scheduler.shared_deadline(meta.name):
+                result = await self._run(meta, fn, kwargs)
+        else:
+            result = await self._run(meta, fn, kwargs)
+        if store:
+            self.cache.put(key, result, meta.ttl, paths, generation)
+        return result
+    
+    async def _run(self, meta: ToolMetaData, fn: Callable[..., Any], kwargs: Dict[str, Any]) -> Any:
+        """占用执行槽位后执行工具"""
+        async with self.scheduler.slot(meta.name):
+            return await self._invoke(meta, fn, kwargs)
+    
+    async def stream(self, name: str, arguments: Dict[str, Any], timeout: Optional[float] = None) -> AsyncIterator[Any]:
+        """
+        流式调用工具, 逐批产出结果
+
+        声明了 stream_method 的工具按批产出: 截止时间覆盖整个流 (包括调用方处理各批的时间),
+        执行槽位在流结束前一直占用, 不经过结果缓存与调用合并。
+        其余工具通过 invoke 执行一次并产出完整结果, 与非流式调用一样使用结果缓存与调用合并。
+
+        Args:
+            name: 工具名称
+            arguments: 工具参数
+            timeout: 截止时间 (秒), 与工具默认值取较小者
+
+        Raises:
+            ValueError: 工具不存在
+            ToolTimeoutError: 超过截止时间
+            ToolBusyError: 工具并发与排队已满
+        """
         meta = self.get_tool_meta(name)
+        if meta is None or not meta.stream_method:
+            yield await self.invoke(name, arguments, timeout=timeout)
+            return
+        try:
+            fn = getattr(self._get_instance(meta.module, meta.class_name), meta.stream_method)
+        except Exception as e:
+            raise ValueError(f"无法绑定流式工具 {name}: {e}") from e
+
+        budget = self.scheduler.budget(name, timeout) if self.scheduler.enabled else timeout
+        expires = self.scheduler.expires_at(name, timeout)
+        async with AsyncExitStack() as stack:
+            async with self.scheduler.deadline(name, budget, expires):
+                await stack.enter_async_context(self.scheduler.slot(name))
+            agen = fn(**arguments)
+            try:
+                while True:
+                    # 只在生成下一批时计时, 超时取消的是工具而不是调用方的发送
+                    async with self.scheduler.deadline(name, budget, expires):
+                        try:
+                            item = await agen.__anext__()
+                        except StopAsyncIteration:
+                            return
+                    yield item
+            finally:
+                await agen.aclose()
+    
+    @staticmethod
+    async def _invoke(meta: Optional[ToolMetaData], fn: Callable[..., Any], kwargs: Dict[str, Any]) -> Any:
         if meta and meta.async_method:
             return await fn(**kwargs)
-        else:
-            return fn(**kwargs)
+        return fn(**kwargs)
     
     def reload(self):
         """重新加载所有工具"""
         self.tools_meta = []
+        self._meta_index = {}
         self.callables = {}
         self._instances = {}
         self.discover()
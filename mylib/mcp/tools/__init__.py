@@ -29,6 +29,7 @@ from .Tool import (
     get_tool_meta,
     call_tool
 )
+from .scheduler import ToolTimeoutError, ToolBusyError, check_deadline
 
 
 __all__ = [
@@ -39,6 +40,10 @@ __all__ = [
     "get_tools_list",
     "get_tool_meta",
     "call_tool",
+    # 调度
+    "ToolTimeoutError",
+    "ToolBusyError",
+    "check_deadline",
 ]
 
 """
@@ -48,4 +53,5 @@ __all__ = [
 (3) 每个工具模块需实现对应的类和方法，类名与 TOOL_METADATA 中的 class_name 一致，方法名与 method 一致。
 (4) 工具方法可为同步或异步，需在 TOOL_METADATA 中通过 async_method 指定。
 (5) 工具方法需接受参数字典，并返回结果字典。
+(6) 可选：在 TOOL_METADATA 中通过 stream_method 指定流式版本 (异步生成器方法)，逐批产出结果字典。
 """
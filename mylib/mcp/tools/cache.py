@@ -0,0 +1,257 @@
+"""
+ToolResultCache - 工具结果缓存
+
+按 TOOL_METADATA 中的声明缓存只读工具的结果:
+- cacheable: 是否缓存
+- ttl: 缓存有效期 (秒)
+- paths: 表示路径的参数名, 用于规范化缓存键与按路径失效
+- invalidate_on: 调用后使本工具缓存失效的工具名 (如 file_write)
+"""
+
+import json
+import time
+import inspect
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .paths import resolve_path
+
+
+def canonical_path(value: Any, fn: Optional[Callable[..., Any]] = None) -> str:
+    """
+    按工具自身的规则解析路径参数, 缓存键与失效判断使用工具实际读写的文件
+
+    fn 是工具实例的方法且实例提供 _resolve_path (FileTool / DirTool) 时使用它 (包括自定义的基础路径),
+    否则按 resolve_path 的默认规则: 相对路径基于用户家目录, 不展开 ~
+    """
+    resolver = getattr(getattr(fn, "__self__", None), "_resolve_path", None)
+    return str(resolver(value) if callable(resolver) else resolve_path(value))
+
+
+def _paths_overlap(a: str, b: str) -> bool:
+    """两个路径相同, 或一个是另一个的上级目录"""
+    if a == b:
+        return True
+    return a.startswith(b.rstrip("/") + "/") or b.startswith(a.rstrip("/") + "/")
+
+
+def payload_size(value: Any) -> int:
+    """估算结果占用的字节数 (字符串按长度计), 用于按大小淘汰"""
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value) + 48
+    if isinstance(value, dict):
+        return 64 + sum(payload_size(k) + payload_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return 56 + sum(payload_size(v) for v in value)
+    return 32
+
+
+class _Entry:
+    __slots__ = ("tool", "value", "size", "expires", "paths")
+
+    def __init__(self, tool: str, value: Any, size: int, expires: float, paths: Tuple[str, ...]):
+        self.tool = tool
+        self.value = value
+        self.size = size
+        self.expires = expires
+        self.paths = paths
+
+
+class ToolResultCache:
+    """
+    工具结果缓存 (LRU, 按结果大小淘汰)
+
+    - 缓存键: 工具名 + 规范化参数 (补全默认值, 路径参数解析为绝对路径, JSON 排序键)
+    - 写类工具调用后, 按路径使相关缓存失效: 写入 a/b.txt 会使 a/b.txt 的读取结果与 a 的目录列表失效
+    - 失败的结果 ({"success": False, ...}) 不缓存
+    - 工具执行期间发生过失效时, 该次结果不写入缓存, 避免写入过期数据
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, max_entry_bytes: Optional[int] = None,
+                    enabled: bool = True):
+        """
+        Args:
+            max_bytes: 缓存总大小上限
+            max_entry_bytes: 单个结果的大小上限, 超过时不缓存, 默认为 max_bytes 的 1/8
+            enabled: 是否启用
+        """
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes or max_bytes // 8
+
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._signatures: Dict[str, Optional[inspect.Signature]] = {}
+        # 写工具名 -> 受其影响的缓存工具名
+        self._invalidators: Dict[str, List[str]] = {}
+        self._paths: Dict[str, Tuple[str, ...]] = {}
+        # 每次失效递增, 用于丢弃执行期间已过期的结果
+        self.generation = 0
+
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0, "skipped": 0}
+        # 工具名 -> [命中, 未命中], 供 /metrics 按工具统计命中率
+        self._tool_stats: Dict[str, List[int]] = {}
+
+    def configure(self, enabled: Optional[bool] = None, max_bytes: Optional[int] = None,
+                    max_entry_bytes: Optional[int] = None):
+        """调整缓存参数 (MCPServer 从 [tools.cache] 配置读取)"""
+        if enabled is not None:
+            self.enabled = enabled
+            if not enabled:
+                self.clear()
+        if max_bytes is not None:
+            self.max_bytes = int(max_bytes)
+            self.max_entry_bytes = int(max_entry_bytes or self.max_bytes // 8)
+            self._evict()
+        elif max_entry_bytes is not None:
+            self.max_entry_bytes = int(max_entry_bytes)
+
+    def register(self, metas: Iterable[Any]):
+        """根据工具元数据建立失效关系 (ToolLoader.discover 时调用)"""
+        self.clear()
+        self._signatures.clear()
+        self._invalidators = {}
+        self._paths = {}
+        for meta in metas:
+            self._paths[meta.name] = tuple(meta.paths)
+            # 不缓存的工具也登记: 失效代数同时用于 SingleFlight 的调用合并
+            for writer in meta.invalidate_on:
+                self._invalidators.setdefault(writer, []).append(meta.name)
+
+    def invalidates(self, tool: str) -> bool:
+        return tool in self._invalidators
+
+    # === 缓存键 ===
+    def make_key(self, tool: str, fn: Callable[..., Any], kwargs: Dict[str, Any]) -> Optional[Tuple[Tuple[str, str], Tuple[str, ...]]]:
+        """
+        生成 (缓存键, 结果依赖的路径), 参数无法绑定到工具签名时返回 None (不缓存, 由工具自行报错)
+        """
+        arguments = self._bind(tool, fn, kwargs)
+        if arguments is None:
+            return None
+        paths = []
+        for name in self._paths.get(tool, ()):
+            if arguments.get(name) is not None:
+                arguments[name] = canonical_path(arguments[name], fn)
+                paths.append(arguments[name])
+        try:
+            canonical = json.dumps(arguments, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+        except (TypeError, ValueError):
+            return None
+        return (tool, canonical), tuple(paths)
+
+    def _bind(self, tool: str, fn: Callable[..., Any], kwargs: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if tool not in self._signatures:
+            try:
+                self._signatures[tool] = inspect.signature(fn)
+            except (TypeError, ValueError):
+                self._signatures[tool] = None
+        signature = self._signatures[tool]
+        if signature is None:
+            return dict(kwargs)
+        try:
+            bound = signature.bind(**kwargs)
+        except TypeError:
+            return None
+        bound.apply_defaults()
+        return dict(bound.arguments)
+
+    # === 读写 ===
+    def get(self, key: Tuple[str, str]) -> Tuple[bool, Any]:
+        counts = self._tool_stats.get(key[0])
+        if counts is None:
+            counts = self._tool_stats[key[0]] = [0, 0]
+        entry = self._entries.get(key)
+        if entry is None:
+            self._stats["misses"] += 1
+            counts[1] += 1
+            return False, None
+        if entry.expires <= time.monotonic():
+            self._remove(key)
+            self._stats["expirations"] += 1
+            self._stats["misses"] += 1
+            counts[1] += 1
+            return False, None
+        self._entries.move_to_end(key)
+        self._stats["hits"] += 1
+        counts[0] += 1
+        value = entry.value
+        # 浅拷贝, 调用方增删顶层字段不影响缓存
+        return True, dict(value) if isinstance(value, dict) else value
+
+    def put(self, key: Tuple[str, str], value: Any, ttl: float, paths: Tuple[str, ...], generation: int):
+        """写入结果, generation 为工具执行前的 self.generation"""
+        if generation != self.generation or ttl <= 0:
+            self._stats["skipped"] += 1
+            return
+        if isinstance(value, dict) and value.get("success") is False:
+            return
+        size = payload_size(value)
+        if size > self.max_entry_bytes:
+            self._stats["skipped"] += 1
+            return
+        if key in self._entries:
+            self._remove(key)
+        stored = dict(value) if isinstance(value, dict) else value
+        self._entries[key] = _Entry(key[0], stored, size, time.monotonic() + ttl, paths)
+        self._bytes += size
+        self._evict()
+
+    def invalidate(self, writer: str, kwargs: Dict[str, Any], fn: Optional[Callable[..., Any]] = None) -> int:
+        """
+        写工具调用后使相关缓存失效
+
+        写工具声明了路径参数时只删除路径重叠的条目, 否则删除受影响工具的全部条目
+
+        Args:
+            writer: 写工具名
+            kwargs: 写工具的调用参数
+            fn: 写工具的方法, 用于按工具自身的规则解析路径参数
+
+        Returns:
+            删除的条目数
+        """
+        tools = self._invalidators.get(writer)
+        if not tools:
+            return 0
+        self.generation += 1
+        written = [canonical_path(kwargs[name], fn) for name in self._paths.get(writer, ()) if kwargs.get(name) is not None]
+
+        removed = 0
+        for key, entry in list(self._entries.items()):
+            if entry.tool not in tools:
+                continue
+            if written and entry.paths and not any(_paths_overlap(w, p) for w in written for p in entry.paths):
+                continue
+            self._remove(key)
+            removed += 1
+        self._stats["invalidations"] += removed
+        return removed
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+        self.generation += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+            self._stats["evictions"] += 1
+
+    # === 统计 ===
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "enabled": self.enabled,
+            "tools": {tool: {"hits": hits, "misses": misses} for tool, (hits, misses) in self._tool_stats.items()},
+        }
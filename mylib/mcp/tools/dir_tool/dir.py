@@ -1,12 +1,23 @@
 """目录操作工具核心实现模块"""
 
 import shutil
+import asyncio
 
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, Dict, Any
+from functools import partial
+from typing import AsyncIterator, Optional, Dict, Any
 
-from .utils import build_directory_tree, get_directory_info, list_directory_contents
+from .utils import (
+    build_directory_tree,
+    get_directory_info,
+    list_directory_contents,
+    iter_directory_contents,
+    iter_directory_tree,
+)
+from ..paths import resolve_path
+from ..scheduler import ToolTimeoutError
+from ..stream import iterate_in_thread
 
 
 def get_user_home() -> Path:
@@ -44,11 +55,7 @@ class DirTool:
         返回:
             解析后的绝对路径对象
         """
-        path = Path(dir_path)
-        if not path.is_absolute():
-            # 相对路径时，基于默认基础路径解析
-            path = self.default_base / path
-        return path.resolve()
+        return resolve_path(dir_path, self.default_base)
 
     async def create(self, dir_path: str, exist_ok: bool = True) -> Dict[str, Any]:
         """
@@ -127,11 +134,46 @@ class DirTool:
             if not path.is_dir():
                 return {"success": False, "error": f"路径不是目录: {path}"}
 
-            items = list_directory_contents(path, pattern, include_hidden, files_only, dirs_only)
+            # 在线程中遍历, 不阻塞事件循环
+            items = await asyncio.to_thread(
+                list_directory_contents, path, pattern, include_hidden, files_only, dirs_only
+            )
             return {"success": True, "path": str(path), "items": items, "total": len(items)}
+        except ToolTimeoutError:
+            raise
         except Exception as e:  # noqa: BLE001
             return {"success": False, "error": f"列出目录错误: {str(e)}"}
 
+    async def list_stream(
+        self,
+        dir_path: str,
+        pattern: Optional[str] = None,
+        include_hidden: bool = False,
+        files_only: bool = False,
+        dirs_only: bool = False,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        流式列出目录内容（list 的流式版本，按遍历顺序分批，不排序）
+        
+        产出:
+            首项 {"success", "path"}，之后每批 {"items": [...]}，最后 {"total"}
+        """
+        path = self._resolve_path(dir_path)
+        if not path.exists():
+            yield {"success": False, "error": f"目录不存在: {path}"}
+            return
+        if not path.is_dir():
+            yield {"success": False, "error": f"路径不是目录: {path}"}
+            return
+
+        yield {"success": True, "path": str(path)}
+        total = 0
+        factory = partial(iter_directory_contents, path, pattern, include_hidden, files_only, dirs_only)
+        async for batch in iterate_in_thread(factory):
+            total += len(batch)
+            yield {"items": batch}
+        yield {"total": total}
+
     async def exists(self, dir_path: str) -> Dict[str, Any]:
         """
         检查目录是否存在
@@ -201,11 +243,38 @@ class DirTool:
             if not path.is_dir():
                 return {"success": False, "error": f"路径不是目录: {path}"}
 
-            tree = build_directory_tree(path, max_depth, include_hidden)
+            tree = await asyncio.to_thread(build_directory_tree, path, max_depth, include_hidden)
             return {"success": True, "path": str(path), "tree": tree}
+        except ToolTimeoutError:
+            raise
         except Exception as e:  # noqa: BLE001
             return {"success": False, "error": f"获取目录树错误: {str(e)}"}
 
+    async def tree_stream(
+        self, dir_path: str, max_depth: int = 3, include_hidden: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        流式获取目录树（tree 的流式版本，深度优先顺序分批产出扁平节点）
+        
+        产出:
+            首项 {"success", "path"}，之后每批 {"entries": [{"path", "type", "depth", "size"?}, ...]}，
+            最后 {"total"}；节点 path 为相对根目录的路径
+        """
+        path = self._resolve_path(dir_path)
+        if not path.exists():
+            yield {"success": False, "error": f"目录不存在: {path}"}
+            return
+        if not path.is_dir():
+            yield {"success": False, "error": f"路径不是目录: {path}"}
+            return
+
+        yield {"success": True, "path": str(path)}
+        total = 0
+        async for batch in iterate_in_thread(partial(iter_directory_tree, path, max_depth, include_hidden)):
+            total += len(batch)
+            yield {"entries": batch}
+        yield {"total": total}
+
     async def copy(self, src_path: str, dest_path: str, overwrite: bool = False) -> Dict[str, Any]:
         """
         复制目录
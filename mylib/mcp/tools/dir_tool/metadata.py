@@ -1,5 +1,7 @@
 """描述可用 Dir 工具操作的声明式元数据"""
 
+from ..file_tool.metadata import FS_WRITE_TOOLS
+
 TOOL_METADATA = [
     {
         "name": "dir_create",
@@ -16,6 +18,7 @@ TOOL_METADATA = [
         "class_name": "DirTool",
         "method": "create",
         "async_method": True,
+        "paths": ["dir_path"],
     },
     {
         "name": "dir_delete",
@@ -32,6 +35,7 @@ TOOL_METADATA = [
         "class_name": "DirTool",
         "method": "delete",
         "async_method": True,
+        "paths": ["dir_path"],
     },
     {
         "name": "dir_list",
@@ -50,7 +54,14 @@ TOOL_METADATA = [
         "module": "mylib.mcp.tools.dir_tool",
         "class_name": "DirTool",
         "method": "list",
+        "stream_method": "list_stream",
         "async_method": True,
+        "cacheable": True,
+        "coalesce": True,
+        "ttl": 30,
+        "paths": ["dir_path"],
+        "invalidate_on": FS_WRITE_TOOLS,
+        "timeout": 20,
     },
     {
         "name": "dir_exists",
@@ -97,7 +108,16 @@ TOOL_METADATA = [
         "module": "mylib.mcp.tools.dir_tool",
         "class_name": "DirTool",
         "method": "tree",
+        "stream_method": "tree_stream",
         "async_method": True,
+        "cacheable": True,
+        "coalesce": True,
+        "ttl": 30,
+        "paths": ["dir_path"],
+        "invalidate_on": FS_WRITE_TOOLS,
+        "timeout": 20,
+        "max_concurrency": 4,
+        "queue_depth": 16,
     },
     {
         "name": "dir_copy",
@@ -115,6 +135,7 @@ TOOL_METADATA = [
         "class_name": "DirTool",
         "method": "copy",
         "async_method": True,
+        "paths": ["src_path", "dest_path"],
     },
     {
         "name": "dir_move",
@@ -132,6 +153,7 @@ TOOL_METADATA = [
         "class_name": "DirTool",
         "method": "move",
         "async_method": True,
+        "paths": ["src_path", "dest_path"],
     },
 ]
 
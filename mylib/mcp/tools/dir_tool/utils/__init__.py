@@ -1,12 +1,14 @@
 """目录工具核心算法模块"""
 
-from .listing import list_directory_contents
-from .tree import build_directory_tree
+from .listing import list_directory_contents, iter_directory_contents
+from .tree import build_directory_tree, iter_directory_tree
 from .info import get_directory_info
 
 
 __all__ = [
     "list_directory_contents",
+    "iter_directory_contents",
     "build_directory_tree",
+    "iter_directory_tree",
     "get_directory_info",
 ]
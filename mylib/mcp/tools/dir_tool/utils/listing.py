@@ -1,31 +1,26 @@
 """目录列表算法模块"""
 
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any
 
+from ...scheduler import check_deadline
 
-def list_directory_contents(
+
+def iter_directory_contents(
     dir_path: Path,
     pattern: Optional[str] = None,
     include_hidden: bool = False,
     files_only: bool = False,
     dirs_only: bool = False,
-) -> List[Dict[str, Any]]:
+) -> Iterator[Dict[str, Any]]:
     """
-    列出目录内容
+    逐项产出目录内容（按遍历顺序，不排序）
     
-    参数:
-        dir_path: 目录路径对象
-        pattern: 文件名匹配模式（glob 语法），如 "*.py"
-        include_hidden: 是否包含隐藏文件/目录（以 . 开头）
-        files_only: 只列出文件
-        dirs_only: 只列出目录
-        
-    返回:
-        包含目录项信息的列表，每项包含 name、type、size
-    """
-    items = []
+    参数与 list_directory_contents 相同
     
+    产出:
+        目录项信息，包含 name、type、size
+    """
     # 获取目录内容（支持 glob 模式）
     if pattern:
         entries = dir_path.glob(pattern)
@@ -34,6 +29,9 @@ def list_directory_contents(
     
     # 遍历并过滤
     for item in entries:
+        # glob 模式 (如 **/*) 可能遍历大量文件, 超时则中止
+        check_deadline()
+        
         # 过滤隐藏文件
         if not include_hidden and item.name.startswith('.'):
             continue
@@ -48,12 +46,34 @@ def list_directory_contents(
             continue
         
         # 构建项信息
-        item_info = {
+        yield {
             "name": item.name,
             "type": "directory" if is_dir else "file",
             "size": item.stat().st_size if is_file else 0,
         }
-        items.append(item_info)
+
+
+def list_directory_contents(
+    dir_path: Path,
+    pattern: Optional[str] = None,
+    include_hidden: bool = False,
+    files_only: bool = False,
+    dirs_only: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    列出目录内容
+    
+    参数:
+        dir_path: 目录路径对象
+        pattern: 文件名匹配模式（glob 语法），如 "*.py"
+        include_hidden: 是否包含隐藏文件/目录（以 . 开头）
+        files_only: 只列出文件
+        dirs_only: 只列出目录
+        
+    返回:
+        包含目录项信息的列表，每项包含 name、type、size
+    """
+    items = list(iter_directory_contents(dir_path, pattern, include_hidden, files_only, dirs_only))
     
     # 按类型和名称排序（目录在前）
     items.sort(key=lambda x: (x["type"] != "directory", x["name"].lower()))
@@ -1,7 +1,9 @@
 """目录树构建算法模块"""
 
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Iterator, Any
+
+from ...scheduler import check_deadline
 
 
 def build_directory_tree(
@@ -22,6 +24,8 @@ def build_directory_tree(
     返回:
         树形结构字典，包含 name、type、children 等字段
     """
+    # 每进入一个目录检查一次截止时间, 超时则中止遍历
+    check_deadline()
     node: Dict[str, Any] = {
         "name": path.name,
         "type": "directory",
@@ -61,3 +65,49 @@ def build_directory_tree(
         node["error"] = "Permission denied"
     
     return node
+
+
+def iter_directory_tree(
+    path: Path,
+    max_depth: int,
+    include_hidden: bool,
+    current_depth: int = 0,
+    prefix: str = "",
+) -> Iterator[Dict[str, Any]]:
+    """
+    按深度优先顺序逐项产出目录树（与 build_directory_tree 的顺序相同）
+    
+    参数:
+        path: 当前路径对象
+        max_depth: 最大递归深度
+        include_hidden: 是否包含隐藏文件/目录
+        current_depth: 当前深度（内部递归使用）
+        prefix: 当前目录相对根目录的路径（内部递归使用）
+        
+    产出:
+        扁平的节点字典，包含 path（相对根目录）、type、depth，文件另有 size；
+        达到最大深度的目录带 truncated，无权限的目录带 error
+    """
+    check_deadline()
+    if current_depth >= max_depth:
+        return
+    
+    try:
+        children = sorted(path.iterdir(), key=lambda x: (x.is_file(), x.name.lower()))
+    except PermissionError:
+        yield {"path": prefix or ".", "type": "directory", "depth": current_depth, "error": "Permission denied"}
+        return
+    
+    for item in children:
+        if not include_hidden and item.name.startswith('.'):
+            continue
+        
+        rel = f"{prefix}/{item.name}" if prefix else item.name
+        if item.is_dir():
+            node = {"path": rel, "type": "directory", "depth": current_depth + 1}
+            if current_depth + 1 >= max_depth:
+                node["truncated"] = True
+            yield node
+            yield from iter_directory_tree(item, max_depth, include_hidden, current_depth + 1, rel)
+        else:
+            yield {"path": rel, "type": "file", "depth": current_depth + 1, "size": item.stat().st_size}
@@ -10,6 +10,7 @@
 - info: 获取文件信息
 - copy: 复制文件
 - move: 移动/重命名文件
+- search: 按正则/关键字搜索目录下的文件内容
 
 默认路径基于用户家目录，支持相对路径和绝对路径。
 
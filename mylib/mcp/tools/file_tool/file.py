@@ -1,7 +1,9 @@
 """文件操作工具核心实现模块"""
 
+import asyncio
+from functools import partial
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import AsyncIterator, List, Optional, Dict, Any
 
 from .utils import (
     append_file_content,
@@ -9,10 +11,15 @@ from .utils import (
     copy_file,
     delete_file,
     get_file_info,
+    iter_file_lines,
     move_file,
     read_file_content,
+    search_files,
     write_file_content,
 )
+from ..paths import resolve_path
+from ..scheduler import ToolTimeoutError
+from ..stream import iterate_in_thread
 
 
 def get_user_home() -> Path:
@@ -50,11 +57,7 @@ class FileTool:
         返回:
             解析后的绝对路径对象
         """
-        path = Path(file_path)
-        if not path.is_absolute():
-            # 相对路径时，基于默认基础路径解析
-            path = self.default_base / path
-        return path.resolve()
+        return resolve_path(file_path, self.default_base)
 
     async def read(
         self,
@@ -89,6 +92,39 @@ class FileTool:
         except Exception as e:  # noqa: BLE001
             return {"success": False, "error": f"读取文件错误: {str(e)}"}
 
+    async def read_stream(
+        self,
+        file_path: str,
+        start_line: Optional[int] = None,
+        end_line: Optional[int] = None,
+        encoding: str = "utf-8",
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        流式读取文件内容（read 的流式版本，每批 500 行）
+        
+        产出:
+            首项 {"success", "path"}，之后每批 {"start_line", "content"}，最后 {"lines_read"}；
+            编码错误时产出 {"success": False, "error"} 并结束
+        """
+        path = self._resolve_path(file_path)
+        if not path.exists():
+            yield {"success": False, "error": f"文件不存在: {path}"}
+            return
+        if not path.is_file():
+            yield {"success": False, "error": f"路径不是文件: {path}"}
+            return
+
+        yield {"success": True, "path": str(path)}
+        line_no = max(1, start_line or 1)
+        try:
+            async for batch in iterate_in_thread(partial(iter_file_lines, path, start_line, end_line, encoding), 500):
+                yield {"start_line": line_no, "content": "".join(batch)}
+                line_no += len(batch)
+        except ValueError as e:
+            yield {"success": False, "error": str(e)}
+            return
+        yield {"lines_read": line_no - max(1, start_line or 1)}
+
     async def write(
         self,
         file_path: str,
@@ -247,3 +283,50 @@ class FileTool:
         except Exception as e:  # noqa: BLE001
             return {"success": False, "error": f"移动文件错误: {str(e)}"}
 
+    async def search(
+        self,
+        root: str,
+        pattern: str,
+        literal: bool = False,
+        ignore_case: bool = False,
+        include: Optional[List[str]] = None,
+        exclude: Optional[List[str]] = None,
+        context_lines: int = 0,
+        max_results: int = 100,
+        include_hidden: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        搜索目录下的文件内容（类似 grep -rn）
+        
+        参数:
+            root: 搜索根目录
+            pattern: 正则表达式，literal=True 时按普通字符串匹配
+            literal: 是否按字面量匹配
+            ignore_case: 是否忽略大小写
+            include: 只搜索匹配这些 glob 的文件，如 ["*.py"]；含 "/" 的模式匹配相对路径
+            exclude: 跳过匹配这些 glob 的文件/目录，如 ["node_modules", "*.min.js"]
+            context_lines: 匹配行前后附带的行数（0-5）
+            max_results: 最多返回的匹配行数（1-1000），达到后停止搜索
+            include_hidden: 是否搜索隐藏文件/目录
+            
+        返回:
+            包含 success、root、matches、total、files_scanned、files_matched、truncated 的字典
+        """
+        try:
+            path = self._resolve_path(root)
+            if not path.exists():
+                return {"success": False, "error": f"目录不存在: {path}"}
+            if not path.is_dir():
+                return {"success": False, "error": f"路径不是目录: {path}"}
+
+            result = await asyncio.to_thread(
+                search_files, path, pattern, literal, ignore_case, include, exclude,
+                max(0, min(context_lines or 0, 5)), max(1, min(max_results or 100, 1000)), include_hidden,
+            )
+            return {"success": True, "root": str(path), **result}
+        except ToolTimeoutError:
+            raise
+        except ValueError as e:
+            return {"success": False, "error": str(e)}
+        except Exception as e:  # noqa: BLE001
+            return {"success": False, "error": f"搜索文件错误: {str(e)}"}
@@ -1,5 +1,11 @@
 """描述可用 File 工具操作的声明式元数据"""
 
+# 修改文件系统的工具, 调用后使文件 / 目录读取类工具的缓存按路径失效
+FS_WRITE_TOOLS = [
+    "file_write", "file_append", "file_delete", "file_copy", "file_move",
+    "dir_create", "dir_delete", "dir_copy", "dir_move",
+]
+
 TOOL_METADATA = [
     {
         "name": "file_read",
@@ -17,7 +23,13 @@ TOOL_METADATA = [
         "module": "mylib.mcp.tools.file_tool",
         "class_name": "FileTool",
         "method": "read",
+        "stream_method": "read_stream",
         "async_method": True,
+        "cacheable": True,
+        "coalesce": True,
+        "ttl": 30,
+        "paths": ["file_path"],
+        "invalidate_on": FS_WRITE_TOOLS,
     },
     {
         "name": "file_write",
@@ -36,6 +48,7 @@ TOOL_METADATA = [
         "class_name": "FileTool",
         "method": "write",
         "async_method": True,
+        "paths": ["file_path"],
     },
     {
         "name": "file_append",
@@ -53,6 +66,7 @@ TOOL_METADATA = [
         "class_name": "FileTool",
         "method": "append",
         "async_method": True,
+        "paths": ["file_path"],
     },
     {
         "name": "file_delete",
@@ -68,6 +82,7 @@ TOOL_METADATA = [
         "class_name": "FileTool",
         "method": "delete",
         "async_method": True,
+        "paths": ["file_path"],
     },
     {
         "name": "file_exists",
@@ -98,6 +113,11 @@ TOOL_METADATA = [
         "class_name": "FileTool",
         "method": "info",
         "async_method": True,
+        "cacheable": True,
+        "coalesce": True,
+        "ttl": 30,
+        "paths": ["file_path"],
+        "invalidate_on": FS_WRITE_TOOLS,
     },
     {
         "name": "file_copy",
@@ -115,6 +135,7 @@ TOOL_METADATA = [
         "class_name": "FileTool",
         "method": "copy",
         "async_method": True,
+        "paths": ["src_path", "dest_path"],
     },
     {
         "name": "file_move",
@@ -132,7 +153,45 @@ TOOL_METADATA = [
         "class_name": "FileTool",
         "method": "move",
         "async_method": True,
+        "paths": ["src_path", "dest_path"],
+    },
+    {
+        "name": "file_search",
+        "description": "在目录下递归搜索文件内容（正则或关键字），返回匹配行及上下文，自动跳过二进制文件",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "root": {"type": "string", "description": "搜索根目录"},
+                "pattern": {"type": "string", "description": "正则表达式（literal 为 true 时按普通字符串匹配）"},
+                "literal": {"type": "boolean", "description": "是否按字面量匹配，默认 false"},
+                "ignore_case": {"type": "boolean", "description": "是否忽略大小写"},
+                "include": {
+                    "type": "array", "items": {"type": "string"},
+                    "description": "只搜索匹配的文件（glob），如 [\"*.py\"]",
+                },
+                "exclude": {
+                    "type": "array", "items": {"type": "string"},
+                    "description": "跳过匹配的文件/目录（glob），如 [\"node_modules\", \"*.min.js\"]",
+                },
+                "context_lines": {"type": "integer", "description": "匹配行前后附带的行数（0-5），默认 0"},
+                "max_results": {"type": "integer", "description": "最多返回的匹配行数（1-1000），默认 100"},
+                "include_hidden": {"type": "boolean", "description": "是否搜索隐藏文件/目录"},
+            },
+            "required": ["root", "pattern"],
+        },
+        "module": "mylib.mcp.tools.file_tool",
+        "class_name": "FileTool",
+        "method": "search",
+        "async_method": True,
+        "cacheable": True,
+        "coalesce": True,
+        "ttl": 30,
+        "paths": ["root"],
+        "invalidate_on": FS_WRITE_TOOLS,
+        "timeout": 30,
+        "max_concurrency": 4,
+        "queue_depth": 16,
     },
 ]
 
-__all__ = ["TOOL_METADATA"]
+__all__ = ["TOOL_METADATA", "FS_WRITE_TOOLS"]
@@ -1,12 +1,14 @@
 """文件工具核心算法模块"""
 
-from .io_ops import read_file_content, write_file_content, append_file_content
+from .io_ops import read_file_content, iter_file_lines, write_file_content, append_file_content
 from .file_ops import copy_file, move_file, delete_file
 from .file_info import get_file_info, check_file_exists
+from .search import search_files
 
 
 __all__ = [
     "read_file_content",
+    "iter_file_lines",
     "write_file_content",
     "append_file_content",
     "copy_file",
@@ -14,4 +16,5 @@ __all__ = [
     "delete_file",
     "get_file_info",
     "check_file_exists",
+    "search_files",
 ]
@@ -1,8 +1,11 @@
 """文件读写操作算法模块"""
 
 import aiofiles
+from itertools import islice
 from pathlib import Path
-from typing import Optional, Tuple, Dict, Any
+from typing import Optional, Tuple, Dict, Any, Iterator
+
+from ...scheduler import check_deadline
 
 
 async def read_file_content(
@@ -51,6 +54,35 @@ async def read_file_content(
         raise ValueError(f"编码错误: {str(e)}")
 
 
+def iter_file_lines(
+    path: Path,
+    start_line: Optional[int] = None,
+    end_line: Optional[int] = None,
+    encoding: str = "utf-8",
+) -> Iterator[str]:
+    """
+    逐行产出文件内容（同步生成器，读到 end_line 即停止，不读取文件其余部分）
+    
+    参数:
+        path: 文件路径对象
+        start_line: 起始行号（1-indexed），None 表示从头开始
+        end_line: 结束行号（1-indexed，包含），None 表示读到末尾
+        encoding: 文件编码
+        
+    产出:
+        保留换行符的文本行
+    """
+    start_idx = max(0, (start_line - 1) if start_line else 0)
+    try:
+        with open(path, "r", encoding=encoding) as f:
+            for number, line in enumerate(islice(f, start_idx, end_line), start_idx + 1):
+                if number % 1000 == 0:
+                    check_deadline()
+                yield line
+    except UnicodeDecodeError as e:
+        raise ValueError(f"编码错误: {str(e)}")
+
+
 async def write_file_content(
     path: Path,
     content: str,
@@ -0,0 +1,289 @@
+"""文件内容搜索算法模块"""
+
+import os
+import re
+import mmap
+import fnmatch
+import threading
+from collections import deque
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from ...scheduler import check_deadline
+
+
+# 判断二进制文件时检查的开头字节数
+_SNIFF_BYTES = 8192
+# 返回的单行最大字符数 (压缩过的 JS / CSS 可能整个文件只有一行)
+_MAX_LINE_CHARS = 500
+# 每个扫描任务包含的最多文件数 / 字节数 (小文件逐个提交时线程池调度开销比扫描本身还大)
+_BATCH_FILES = 64
+_BATCH_BYTES = 4 * 1024 * 1024
+# 同时提交到线程池的任务数 (按工作线程数的倍数), 达到结果上限后不再遍历
+_WINDOW_FACTOR = 4
+
+_WORKERS = min(8, (os.cpu_count() or 1) + 4)
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    """进程内共享的扫描线程池 (多个搜索请求共用, 总线程数固定)"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=_WORKERS, thread_name_prefix="file-search")
+    return _pool
+
+
+def _split_globs(globs: Optional[Sequence[str]]) -> List[str]:
+    """glob 列表, 也接受逗号分隔的字符串 ("*.py,*.md")"""
+    if not globs:
+        return []
+    if isinstance(globs, str):
+        globs = globs.split(",")
+    return [g.strip() for g in globs if g and g.strip()]
+
+
+def _glob_match(rel: str, name: str, globs: List[str]) -> bool:
+    # 不含 "/" 的模式匹配文件名, 否则匹配相对路径
+    return any(fnmatch.fnmatch(rel if "/" in g else name, g) for g in globs)
+
+
+def iter_search_files(
+    root: Path,
+    include: List[str],
+    exclude: List[str],
+    include_hidden: bool,
+    max_file_size: int,
+) -> Iterator[Tuple[str, str, int]]:
+    """
+    按目录顺序 (文件在前, 子目录在后, 各自按名称排序) 产出待搜索的文件
+
+    参数:
+        root: 搜索根目录
+        include: 文件 glob 白名单 (为空表示全部)
+        exclude: 文件 / 目录 glob 黑名单
+        include_hidden: 是否进入隐藏目录、搜索隐藏文件
+        max_file_size: 超过该大小的文件跳过
+
+    产出:
+        (绝对路径, 相对路径, 文件大小); 不跟随符号链接目录
+    """
+    stack = [(str(root), "")]
+    while stack:
+        check_deadline()
+        dirpath, base = stack.pop()
+        try:
+            with os.scandir(dirpath) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            name = entry.name
+            if not include_hidden and name.startswith("."):
+                continue
+            rel = base + name
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if not (exclude and _glob_match(rel, name, exclude)):
+                        subdirs.append((entry.path, rel + "/"))
+                    continue
+                if not entry.is_file():
+                    continue
+                if include and not _glob_match(rel, name, include):
+                    continue
+                if exclude and _glob_match(rel, name, exclude):
+                    continue
+                size = entry.stat().st_size
+            except OSError:
+                continue
+            if 0 < size <= max_file_size:
+                yield entry.path, rel, size
+        stack.extend(reversed(subdirs))
+
+
+def _clip(line: str) -> str:
+    line = line.rstrip("\r")
+    return line if len(line) <= _MAX_LINE_CHARS else line[:_MAX_LINE_CHARS] + "..."
+
+
+def scan_file(path: str, regex: "re.Pattern[str]", context_lines: int, limit: int,
+                stop: Optional[threading.Event] = None, needle: Optional[bytes] = None) -> Optional[List[Dict[str, Any]]]:
+    """
+    用 mmap 搜索单个文件
+
+    文件内容按 UTF-8 解码 (无效字节替换为 U+FFFD) 后交给 str 正则, `.`、`[错警]`、IGNORECASE 均按字符处理;
+    给出 needle 时先在映射上查找该字节串, 不包含的文件不解码。
+
+    参数:
+        path: 文件路径
+        regex: 编译后的 str 正则 (MULTILINE)
+        context_lines: 匹配行前后附带的行数
+        limit: 本文件最多返回的匹配行数
+        stop: 已收集够结果时由调用方设置, 扫描提前结束
+        needle: 匹配行必然包含的字节串 (字面量、区分大小写的搜索)
+
+    返回:
+        匹配行列表 [{"line", "text", "before", "after"}]; 二进制或无法读取的文件返回 None
+    """
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if b"\0" in mm[:_SNIFF_BYTES]:
+                return None
+            if needle is not None and mm.find(needle) < 0:
+                return []
+            text = str(mm, "utf-8", "replace")
+    except (OSError, ValueError):
+        # 无权限、读取过程中被删除、特殊文件等
+        return None
+
+    matches: List[Dict[str, Any]] = []
+    size = len(text)
+    line_no, counted_to, pos = 1, 0, 0
+    while pos < size:
+        found = regex.search(text, pos)
+        if found is None:
+            break
+        if found.start() == size and text.endswith("\n"):
+            # 末尾换行之后的空位置不是一行 (空模式、可匹配空串的模式)
+            break
+        start = text.rfind("\n", 0, found.start()) + 1
+        end = text.find("\n", found.start())
+        end = size if end < 0 else end
+        # 同一行的多处匹配只记一次, 从下一行继续搜索
+        pos = end + 1
+        line_no += text.count("\n", counted_to, start)
+        counted_to = start
+
+        match: Dict[str, Any] = {"line": line_no, "text": _clip(text[start:end])}
+        if context_lines:
+            before, cursor = [], start
+            for _ in range(context_lines):
+                if cursor == 0:
+                    break
+                prev = text.rfind("\n", 0, cursor - 1) + 1
+                before.append(_clip(text[prev:cursor - 1]))
+                cursor = prev
+            after, cursor = [], end
+            for _ in range(context_lines):
+                if cursor >= size - 1:
+                    break
+                nxt = text.find("\n", cursor + 1)
+                nxt = size if nxt < 0 else nxt
+                after.append(_clip(text[cursor + 1:nxt]))
+                cursor = nxt
+            match["before"] = before[::-1]
+            match["after"] = after
+        matches.append(match)
+        if len(matches) >= limit or (stop is not None and stop.is_set()):
+            break
+    return matches
+
+
+def _scan_batch(batch: List[Tuple[str, str, int]], regex: "re.Pattern[str]", context_lines: int,
+                limit: int, stop: threading.Event, needle: Optional[bytes]) -> List[Tuple[str, Optional[List[Dict[str, Any]]]]]:
+    """在工作线程中依次扫描一批文件, 返回 [(相对路径, 匹配行)]"""
+    results = []
+    for path, rel, _ in batch:
+        if stop.is_set():
+            break
+        results.append((rel, scan_file(path, regex, context_lines, limit, stop, needle)))
+    return results
+
+
+def search_files(
+    root: Path,
+    pattern: str,
+    literal: bool = False,
+    ignore_case: bool = False,
+    include: Optional[Sequence[str]] = None,
+    exclude: Optional[Sequence[str]] = None,
+    context_lines: int = 0,
+    max_results: int = 100,
+    include_hidden: bool = False,
+    max_file_size: int = 10 * 1024 * 1024,
+) -> Dict[str, Any]:
+    """
+    在目录下搜索文件内容 (阻塞函数, 调用方在线程中执行)
+
+    文件按目录顺序分批提交到线程池, 按提交顺序收集结果, 因此返回的是遍历顺序上的前 max_results 个匹配;
+    找到第 max_results + 1 个匹配后停止遍历与扫描。
+    正则以 MULTILINE 编译, `^` / `$` 匹配每一行的行首 / 行尾。
+
+    返回:
+        包含 matches、total、files_scanned、files_matched、truncated 的字典;
+        truncated 表示匹配数超过 max_results, 只返回了前 max_results 个
+
+    异常:
+        ValueError: 正则表达式无效
+    """
+    try:
+        regex = re.compile(re.escape(pattern) if literal else pattern,
+                            re.MULTILINE | (re.IGNORECASE if ignore_case else 0))
+    except re.error as e:
+        raise ValueError(f"正则表达式无效: {e}") from None
+    # 字面量、区分大小写时先按字节查找, 不含该字节串的文件跳过解码
+    needle = pattern.encode("utf-8") if literal and not ignore_case and pattern else None
+    # 多找一个匹配, 用于判断是否真的被截断
+    limit = max_results + 1
+
+    pool = _get_pool()
+    window = _WORKERS * _WINDOW_FACTOR
+    stop = threading.Event()
+    pending: deque = deque()
+    files = iter_search_files(root, _split_globs(include), _split_globs(exclude), include_hidden, max_file_size)
+
+    matches: List[Dict[str, Any]] = []
+    files_scanned = 0
+    truncated = False
+
+    def collect() -> bool:
+        """收集最早提交的一批结果, 发现超出 max_results 的匹配时返回 True"""
+        nonlocal files_scanned
+        for rel, found in pending.popleft().result():
+            files_scanned += 1
+            for match in found or ():
+                if len(matches) >= max_results:
+                    return True
+                matches.append({"path": rel, **match})
+        return False
+
+    try:
+        batch: List[Tuple[str, str, int]] = []
+        batch_bytes = 0
+        for item in files:
+            batch.append(item)
+            batch_bytes += item[2]
+            if len(batch) < _BATCH_FILES and batch_bytes < _BATCH_BYTES:
+                continue
+            pending.append(pool.submit(_scan_batch, batch, regex, context_lines, limit, stop, needle))
+            batch, batch_bytes = [], 0
+            while len(pending) >= window and not truncated:
+                truncated = collect()
+            if truncated:
+                break
+            check_deadline()
+        if batch and not truncated:
+            pending.append(pool.submit(_scan_batch, batch, regex, context_lines, limit, stop, needle))
+        while pending and not truncated:
+            truncated = collect()
+            check_deadline()
+    finally:
+        stop.set()
+        for future in pending:
+            future.cancel()
+        files.close()
+
+    return {
+        "matches": matches,
+        "total": len(matches),
+        "files_scanned": files_scanned,
+        "files_matched": len({m["path"] for m in matches}),
+        "truncated": truncated,
+    }
+
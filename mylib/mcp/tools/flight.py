@@ -0,0 +1,81 @@
+"""
+SingleFlight - 合并并发的相同工具调用
+
+同一时刻的多个相同调用 (工具名 + 规范化参数相同) 只执行一次, 所有调用方得到同一结果。
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Task"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    进行中调用的合并器
+
+    - 第一个调用方创建执行任务, 之后到达的相同调用等待同一任务
+    - 任务在独立的 asyncio.Task 中执行: 某个调用方被取消 (如客户端断开) 不影响其他调用方
+    - 所有调用方都取消后才取消执行任务
+    - 执行结束后立即移除, 之后的调用重新执行 (结果复用由 ToolResultCache 负责)
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._calls: Dict[Hashable, _Call] = {}
+        self._stats = {"executions": 0, "shared": 0, "cancelled": 0}
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        执行 factory(), 若相同 key 的调用正在进行则等待其结果
+
+        Args:
+            key: 调用的唯一标识
+            factory: 返回协程的函数, 只有第一个调用方会调用它
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(factory()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _task, key=key, call=call: self._finish(key, call))
+            self._stats["executions"] += 1
+            leader = True
+        else:
+            self._stats["shared"] += 1
+            leader = False
+
+        call.waiters += 1
+        try:
+            result = await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+                self._stats["cancelled"] += 1
+                # 立即移除: 任务结束前到达的新调用不能合并到已取消的执行
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+        # 其他调用方拿到浅拷贝, 修改顶层字段互不影响
+        if not leader and isinstance(result, dict):
+            return dict(result)
+        return result
+
+    def _finish(self, key: Hashable, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        # 所有调用方都已取消时, 取走异常避免 "exception was never retrieved"
+        if not call.task.cancelled():
+            call.task.exception()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "in_flight": len(self._calls), "enabled": self.enabled}
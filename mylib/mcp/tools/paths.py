@@ -0,0 +1,21 @@
+"""路径解析 - 文件 / 目录工具与结果缓存共用的规则"""
+
+from pathlib import Path
+from typing import Any, Optional
+
+
+def resolve_path(value: Any, base: Optional[Path] = None) -> Path:
+    """
+    解析工具参数中的路径
+
+    参数:
+        value: 用户输入的路径
+        base: 相对路径的基础路径, None 则使用用户家目录
+
+    返回:
+        resolve() 后的绝对路径; 不展开 ~ (与工具实际读写的文件一致)
+    """
+    path = Path(str(value))
+    if not path.is_absolute():
+        path = (base or Path.home()) / path
+    return path.resolve()
@@ -0,0 +1,19 @@
+"""
+工具结果分页模块
+
+MCPServer 将超过阈值的工具结果保存在服务端, 响应中只返回句柄与预览:
+- slice: 按 JSON 路径与行号读取已保存结果的一部分
+
+# 读取 file_read 大结果中第 200-300 行
+tool = ResultTool()
+await tool.slice("res_0123456789abcdef", path="content", start_line=200, end_line=300)
+"""
+
+from .result import ResultTool
+from .metadata import TOOL_METADATA
+
+
+__all__ = [
+    "ResultTool",
+    "TOOL_METADATA",
+]
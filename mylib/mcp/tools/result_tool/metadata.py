@@ -0,0 +1,27 @@
+"""描述工具结果分页操作的声明式元数据"""
+
+TOOL_METADATA = [
+    {
+        "name": "tool_result_slice",
+        "description": "分页读取过大的工具结果（其他工具返回 truncated 与 handle 时使用）。"
+                        "path 选择字段（如 content、items.3、tree.children[0]），"
+                        "字符串按文本行、其他值按 JSON 行分页",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "handle": {"type": "string", "description": "工具结果中的 handle"},
+                "path": {"type": "string", "description": "JSON 路径，如 content 或 items.10，省略时为整个结果"},
+                "start_line": {"type": "integer", "description": "起始行号（1-indexed）"},
+                "end_line": {"type": "integer", "description": "结束行号（1-indexed，包含）"},
+                "max_chars": {"type": "integer", "description": "本次最多返回的字符数，默认 8000"},
+            },
+            "required": ["handle"],
+        },
+        "module": "mylib.mcp.tools.result_tool",
+        "class_name": "ResultTool",
+        "method": "slice",
+        "async_method": True,
+    },
+]
+
+__all__ = ["TOOL_METADATA"]
@@ -0,0 +1,42 @@
+"""工具结果分页核心实现模块"""
+
+from typing import Any, Dict, Optional
+
+from ..results import get_result_store
+
+
+class ResultTool:
+    """读取 ResultStore 中保存的大结果"""
+
+    # 单次返回的字符数上限, 防止一次取回整个结果
+    MAX_CHARS = 32000
+
+    def __init__(self):
+        self.store = get_result_store()
+
+    async def slice(
+        self,
+        handle: str,
+        path: Optional[str] = None,
+        start_line: int = 1,
+        end_line: Optional[int] = None,
+        max_chars: int = 8000,
+    ) -> Dict[str, Any]:
+        """
+        按 JSON 路径与行号读取已保存结果的一部分
+        
+        参数:
+            handle: 工具结果中的 handle
+            path: JSON 路径，如 "content"、"items.3.name"，None 表示整个结果
+            start_line: 起始行号（1-indexed）
+            end_line: 结束行号（1-indexed，包含），None 表示到末尾
+            max_chars: 本次最多返回的字符数
+            
+        返回:
+            包含 success、content、start_line、end_line、total_lines、has_more 的字典
+        """
+        try:
+            max_chars = max(1, min(int(max_chars or 8000), self.MAX_CHARS))
+            return self.store.slice(handle, path, start_line, end_line, max_chars)
+        except Exception as e:  # noqa: BLE001
+            return {"success": False, "error": f"读取结果错误: {str(e)}"}
@@ -0,0 +1,398 @@
+"""
+ResultStore - 大结果的服务端存储
+
+超过阈值的工具结果保存在服务端, 响应中只返回句柄与结构预览,
+客户端 (LLM) 通过 tool_result_slice 工具按 JSON 路径 / 行号分页读取需要的部分。
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+from pathlib import Path
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+
+from .cache import payload_size
+
+
+# 预览中字符串 / 列表 / 字典的保留长度
+_PREVIEW_STR = 400
+_PREVIEW_ITEMS = 5
+_PREVIEW_KEYS = 20
+# 超长行 (如压缩过的 HTML) 按该宽度折行, 保证按行分页有效
+_LINE_WIDTH = 2000
+_PATH_TOKEN = re.compile(r"[^.\[\]]+")
+# 不转存的工具: 分页工具本身的结果已有长度上限
+UNWRAPPED_TOOLS = {"tool_result_slice"}
+
+
+def _shrink(value: Any, depth: int = 0) -> Any:
+    """生成结构预览: 长字符串截断, 长列表 / 字典只保留前几项, 过深的层级只保留类型与大小"""
+    if isinstance(value, str):
+        if len(value) <= _PREVIEW_STR:
+            return value
+        return value[:_PREVIEW_STR] + f"... ({len(value)} chars)"
+    if depth >= 4 and isinstance(value, (dict, list)):
+        return f"<{type(value).__name__}, {len(value)} items>"
+    if isinstance(value, dict):
+        preview = {}
+        for k, v in value.items():
+            if len(preview) >= _PREVIEW_KEYS:
+                preview["..."] = f"({len(value)} keys)"
+                break
+            preview[k] = _shrink(v, depth + 1)
+        return preview
+    if isinstance(value, (list, tuple)):
+        items = [_shrink(v, depth + 1) for v in value[:_PREVIEW_ITEMS]]
+        if len(value) > _PREVIEW_ITEMS:
+            items.append(f"... ({len(value)} items)")
+        return items
+    return value
+
+
+def _outline(value: Any) -> Dict[str, str]:
+    """顶层字段概要: {"content": "str, 123456 chars", "items": "list, 5000 items"}"""
+    if not isinstance(value, dict):
+        return {}
+    outline = {}
+    for key, item in value.items():
+        if isinstance(item, str):
+            outline[key] = f"str, {len(item)} chars, {item.count(chr(10)) + 1} lines"
+        elif isinstance(item, (list, dict)):
+            outline[key] = f"{type(item).__name__}, {len(item)} items"
+        else:
+            outline[key] = type(item).__name__
+    return outline
+
+
+def resolve_path(value: Any, path: Optional[str]) -> Any:
+    """
+    按 JSON 路径取值, 如 "content"、"items.3.name"、"tree.children[0]"
+
+    Raises:
+        KeyError: 路径不存在
+    """
+    if not path:
+        return value
+    current = value
+    for token in _PATH_TOKEN.findall(path):
+        if isinstance(current, dict):
+            if token not in current:
+                raise KeyError(f"字段不存在: {token}")
+            current = current[token]
+        elif isinstance(current, (list, tuple)):
+            try:
+                current = current[int(token)]
+            except (ValueError, IndexError):
+                raise KeyError(f"下标无效: {token} (共 {len(current)} 项)") from None
+        else:
+            raise KeyError(f"无法在 {type(current).__name__} 上取 {token}")
+    return current
+
+
+def _split_lines(text: str) -> List[str]:
+    lines = []
+    for line in text.splitlines():
+        if len(line) <= _LINE_WIDTH:
+            lines.append(line)
+        else:
+            lines.extend(line[i:i + _LINE_WIDTH] for i in range(0, len(line), _LINE_WIDTH))
+    return lines
+
+
+def _same_result(stored: Any, result: Any) -> bool:
+    """是否为同一份结果: 缓存命中返回同一对象, 字典结果为浅拷贝 (顶层各值是同一对象)"""
+    if stored is result:
+        return True
+    if not (isinstance(stored, dict) and isinstance(result, dict)) or stored.keys() != result.keys():
+        return False
+    return all(stored[k] is result[k] for k in stored)
+
+
+class _Stored:
+    __slots__ = ("tool", "value", "size", "expires", "lines", "key", "envelope")
+
+    def __init__(self, tool: str, value: Any, size: int, expires: float, key: Optional[Hashable] = None):
+        self.tool = tool
+        self.value = value
+        self.size = size
+        self.expires = expires
+        self.key = key
+        self.envelope: Optional[Dict[str, Any]] = None
+        # JSON 路径 -> 文本行, 同一结果连续翻页时不重复序列化
+        self.lines: Dict[str, List[str]] = {}
+
+
+class ResultStore:
+    """
+    大结果存储 (按句柄读取, 有效期内可反复分页, 总大小超限时淘汰最久未访问的结果)
+
+    - 句柄为随机字符串, 默认只在当前进程内有效
+    - 配置 shared_dir 后同时写入该目录, 多进程模式下其他 worker 也能按句柄读取
+    - 读取会刷新有效期
+    - 同一缓存键的缓存命中复用已有句柄, 不重复保存
+    """
+
+    def __init__(self, threshold: int = 16 * 1024, ttl: float = 600.0, max_bytes: int = 64 * 1024 * 1024,
+                    enabled: bool = True, shared_dir: Optional[str] = None):
+        """
+        Args:
+            threshold: 结果估算大小超过该值时改为返回句柄
+            ttl: 句柄有效期 (秒)
+            max_bytes: 存储总大小上限
+            enabled: 是否启用
+            shared_dir: 多进程共享目录
+        """
+        self.enabled = enabled
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.shared_dir: Optional[Path] = None
+        if shared_dir:
+            self.configure(shared_dir=shared_dir)
+        self._items: "OrderedDict[str, _Stored]" = OrderedDict()
+        # 缓存键 -> 句柄
+        self._keys: Dict[Hashable, str] = {}
+        self._bytes = 0
+        self._stats = {"stored": 0, "reused": 0, "slices": 0, "expired": 0, "evictions": 0}
+
+    def configure(self, enabled: Optional[bool] = None, threshold: Optional[int] = None,
+                    ttl: Optional[float] = None, max_bytes: Optional[int] = None,
+                    shared_dir: Optional[str] = None):
+        """调整参数 (MCPServer 从 [tools.results] 配置读取)"""
+        if shared_dir:
+            self.shared_dir = Path(shared_dir)
+            self.shared_dir.mkdir(parents=True, exist_ok=True)
+        if enabled is not None:
+            self.enabled = enabled
+        if threshold is not None:
+            self.threshold = int(threshold)
+        if ttl is not None:
+            self.ttl = float(ttl)
+        if max_bytes is not None:
+            self.max_bytes = int(max_bytes)
+            self._evict()
+
+    # === 存储 ===
+    def wrap(self, tool: str, result: Any, key: Optional[Hashable] = None) -> Any:
+        """
+        结果不超过阈值时原样返回, 否则保存并返回句柄与预览
+
+        返回的预览保留原结果的 success 字段, 失败结果不保存;
+        给出 key (结果缓存键) 且该键已保存的是同一份结果 (缓存命中) 时, 返回原有句柄
+        """
+        if not self.enabled or tool in UNWRAPPED_TOOLS or not isinstance(result, (dict, list, str)):
+            return result
+        if isinstance(result, dict) and result.get("success") is False:
+            return result
+        size = payload_size(result)
+        if size <= self.threshold or size > self.max_bytes:
+            return result
+
+        self._purge()
+        if key is not None:
+            reused = self._reuse(key, result)
+            if reused is not None:
+                return reused
+
+        handle = f"res_{uuid.uuid4().hex[:16]}"
+        item = self._items[handle] = _Stored(tool, result, size, time.monotonic() + self.ttl, key)
+        if key is not None:
+            self._keys[key] = handle
+        self._bytes += size
+        self._stats["stored"] += 1
+        self._evict()
+        if self.shared_dir is not None:
+            self._spill(handle, tool, result)
+
+        envelope = {
+            "success": result.get("success", True) if isinstance(result, dict) else True,
+            "truncated": True,
+            "handle": handle,
+            "tool": tool,
+            "size": size,
+            "expires_in": self.ttl,
+            "outline": _outline(result),
+            "preview": _shrink(result),
+            "hint": f'结果过大, 已保存在服务端。调用 tool_result_slice(handle="{handle}", path=..., '
+                    f"start_line=..., end_line=...) 按字段与行号读取需要的部分",
+        }
+        item.envelope = envelope
+        return dict(envelope)
+
+    def _reuse(self, key: Hashable, result: Any) -> Optional[Dict[str, Any]]:
+        """同一缓存键已保存同一份结果时刷新有效期并返回原有的句柄与预览"""
+        handle = self._keys.get(key)
+        item = self._items.get(handle) if handle else None
+        if item is None or item.envelope is None or not _same_result(item.value, result):
+            return None
+        item.expires = time.monotonic() + self.ttl
+        self._items.move_to_end(handle)
+        if self.shared_dir is not None:
+            self._touch(handle)
+        self._stats["reused"] += 1
+        return dict(item.envelope)
+
+    def get(self, handle: str) -> Optional[_Stored]:
+        item = self._items.get(handle)
+        if item is None:
+            return self._load(handle)
+        now = time.monotonic()
+        if item.expires <= now:
+            self._remove(handle)
+            self._stats["expired"] += 1
+            return None
+        item.expires = now + self.ttl
+        self._items.move_to_end(handle)
+        if self.shared_dir is not None:
+            self._touch(handle)
+        return item
+
+    # === 共享目录 (多进程) ===
+    def _shared_path(self, handle: str) -> Optional[Path]:
+        # 句柄来自客户端, 只接受本模块生成的格式, 防止路径穿越
+        if self.shared_dir is None or not re.fullmatch(r"res_[0-9a-f]{16}", handle or ""):
+            return None
+        return self.shared_dir / f"{handle}.json"
+
+    def _spill(self, handle: str, tool: str, result: Any):
+        """写入共享目录 (先写临时文件再替换, 其他进程不会读到半个文件)"""
+        path = self._shared_path(handle)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            tmp.write_text(json.dumps({"tool": tool, "value": result}, ensure_ascii=False, default=str),
+                            encoding="utf-8")
+            os.replace(tmp, path)
+        except (OSError, TypeError, ValueError) as exc:
+            print(f"[ResultStore] 写入共享目录失败: {exc}")
+            tmp.unlink(missing_ok=True)
+
+    def _touch(self, handle: str):
+        try:
+            os.utime(self._shared_path(handle))
+        except (OSError, TypeError):
+            pass
+
+    def _load(self, handle: str) -> Optional[_Stored]:
+        """本进程没有该句柄时从共享目录读取 (由其他 worker 保存), 以文件修改时间判断有效期"""
+        path = self._shared_path(handle)
+        if path is None:
+            return None
+        try:
+            if path.stat().st_mtime + self.ttl <= time.time():
+                path.unlink(missing_ok=True)
+                self._stats["expired"] += 1
+                return None
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        size = payload_size(data["value"])
+        item = self._items[handle] = _Stored(data["tool"], data["value"], size, time.monotonic() + self.ttl)
+        self._bytes += size
+        self._evict()
+        self._touch(handle)
+        return item
+
+    # === 分页 ===
+    def slice(self, handle: str, path: Optional[str] = None, start_line: int = 1,
+                end_line: Optional[int] = None, max_chars: int = 8000) -> Dict[str, Any]:
+        """
+        读取已保存结果的一部分
+
+        path 选中的值为字符串时按其文本行分页, 否则按缩进后的 JSON 文本行分页 (超长行按 2000 字符折行);
+        超过 max_chars 时在行边界提前结束, 通过 next_line 继续读取
+        """
+        item = self.get(handle)
+        if item is None:
+            return {"success": False, "error": f"句柄不存在或已过期: {handle}"}
+        try:
+            value = resolve_path(item.value, path)
+        except KeyError as exc:
+            return {"success": False, "error": str(exc.args[0]), "outline": _outline(item.value)}
+
+        key = path or ""
+        lines = item.lines.get(key)
+        if lines is None:
+            text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, indent=2, default=str)
+            lines = item.lines[key] = _split_lines(text)
+        self._stats["slices"] += 1
+
+        total = len(lines)
+        start = max(1, int(start_line or 1))
+        stop = total if end_line is None else min(total, int(end_line))
+        picked, used, last = [], 0, start - 1
+        for number in range(start, stop + 1):
+            line = lines[number - 1]
+            if picked and used + len(line) + 1 > max_chars:
+                break
+            picked.append(line)
+            used += len(line) + 1
+            last = number
+
+        result = {
+            "success": True,
+            "handle": handle,
+            "path": path,
+            "type": type(value).__name__,
+            "start_line": start,
+            "end_line": last,
+            "total_lines": total,
+            "content": "\n".join(picked),
+            "has_more": last < total,
+        }
+        if last < stop:
+            result["next_line"] = last + 1
+        if isinstance(value, dict):
+            result["outline"] = _outline(value)
+        return result
+
+    # === 维护 ===
+    def _remove(self, handle: str):
+        self._forget(handle, self._items.pop(handle))
+
+    def _forget(self, handle: str, item: _Stored):
+        self._bytes -= item.size
+        if item.key is not None and self._keys.get(item.key) == handle:
+            del self._keys[item.key]
+
+    def _purge(self):
+        now = time.monotonic()
+        for handle in [h for h, item in self._items.items() if item.expires <= now]:
+            self._remove(handle)
+            self._stats["expired"] += 1
+        if self.shared_dir is not None:
+            deadline = time.time() - self.ttl
+            for path in self.shared_dir.glob("res_*.json"):
+                try:
+                    if path.stat().st_mtime <= deadline:
+                        path.unlink()
+                except OSError:
+                    pass
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and self._items:
+            handle, item = self._items.popitem(last=False)
+            self._forget(handle, item)
+            self._stats["evictions"] += 1
+
+    def clear(self):
+        self._items.clear()
+        self._keys.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "handles": len(self._items), "bytes": self._bytes, "enabled": self.enabled,
+                "shared": self.shared_dir is not None}
+
+
+_store: Optional[ResultStore] = None
+
+
+def get_result_store() -> ResultStore:
+    """进程内共享的 ResultStore (MCPServer 与 tool_result_slice 工具共用)"""
+    global _store
+    if _store is None:
+        _store = ResultStore()
+    return _store
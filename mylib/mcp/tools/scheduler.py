@@ -0,0 +1,260 @@
+"""
+ToolScheduler - 工具执行的并发限制与截止时间
+
+按工具限制同时执行的调用数与排队长度, 并为每次调用设置截止时间:
+- max_concurrency: 同时执行的调用数上限, 0 表示不限制
+- queue_depth: 并发已满时最多排队等待的调用数, 超出时立即拒绝 (ToolBusyError), -1 表示不限制
+- timeout: 默认截止时间 (秒), 0 表示不限制; 客户端传入的截止时间更早时以客户端为准
+
+截止时间通过 contextvar 传给工具, 在线程中执行的阻塞代码 (如遍历目录) 可调用 check_deadline() 主动中止。
+"""
+
+import time
+import asyncio
+import contextvars
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, replace
+from typing import Any, Deque, Dict, Optional
+
+
+class ToolTimeoutError(TimeoutError):
+    """工具调用超过截止时间"""
+
+    def __init__(self, tool: str, timeout: Optional[float]):
+        self.tool = tool
+        self.timeout = timeout
+        if timeout is None:
+            super().__init__(f"工具执行超时: {tool}")
+        else:
+            super().__init__(f"工具执行超时: {tool} (超过 {timeout:g} 秒)")
+
+
+class ToolBusyError(RuntimeError):
+    """工具并发与排队都已满, 调用被拒绝"""
+
+    def __init__(self, tool: str, queued: int):
+        self.tool = tool
+        self.queued = queued
+        super().__init__(f"工具繁忙: {tool} (排队 {queued} 个调用)")
+
+
+# (工具名, 截止时间 time.monotonic()) , 不在调度范围内时为 None
+_DEADLINE: contextvars.ContextVar[Optional[tuple]] = contextvars.ContextVar("tool_deadline", default=None)
+
+
+def current_deadline() -> Optional[float]:
+    """当前工具调用的截止时间 (time.monotonic()), 没有截止时间时返回 None"""
+    scope = _DEADLINE.get()
+    return scope[1] if scope else None
+
+
+def remaining_time() -> Optional[float]:
+    """距截止时间的剩余秒数, 没有截止时间时返回 None"""
+    deadline = current_deadline()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def check_deadline():
+    """
+    已超过截止时间时抛出 ToolTimeoutError
+
+    供工具在长时间的循环中调用。asyncio.to_thread 会复制 contextvar, 在线程中同样有效
+    """
+    scope = _DEADLINE.get()
+    if scope is not None and time.monotonic() >= scope[1]:
+        raise ToolTimeoutError(scope[0], None)
+
+
+@dataclass
+class ToolLimits:
+    """单个工具的调度参数"""
+    timeout: float = 0.0
+    max_concurrency: int = 0
+    queue_depth: int = -1
+
+
+class _Lane:
+    """单个工具的执行槽位与等待队列 (先到先得)"""
+
+    __slots__ = ("limits", "running", "waiters", "stats")
+
+    def __init__(self, limits: ToolLimits):
+        self.limits = limits
+        self.running = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.stats = {"calls": 0, "queued": 0, "rejected": 0, "timeouts": 0}
+
+    async def acquire(self, tool: str):
+        limit = self.limits.max_concurrency
+        if limit <= 0 or (self.running < limit and not self.waiters):
+            self.running += 1
+            return
+        depth = self.limits.queue_depth
+        if 0 <= depth <= len(self.waiters):
+            self.stats["rejected"] += 1
+            raise ToolBusyError(tool, len(self.waiters))
+
+        self.stats["queued"] += 1
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        try:
+            await waiter
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                # 槽位已经转交过来, 还回去
+                self.release()
+            else:
+                self.waiters.remove(waiter)
+            raise
+
+    def release(self):
+        # 槽位直接转交给下一个等待者, running 不变
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.running -= 1
+
+
+class ToolScheduler:
+    """
+    工具调度器
+
+    - 参数优先级: mcp_config.toml 的 [tools.limits.<工具名>] > TOOL_METADATA > [tools.scheduler] 默认值
+    - 截止时间覆盖排队与执行: 排队等待也计入截止时间
+    - 超时后取消执行中的协程 (aiohttp 请求等可被中断), 在线程中运行的代码通过 check_deadline() 配合中止
+    """
+
+    def __init__(self, defaults: Optional[ToolLimits] = None, enabled: bool = True):
+        self.enabled = enabled
+        self.defaults = defaults or ToolLimits()
+        self._declared: Dict[str, Dict[str, Any]] = {}
+        self._overrides: Dict[str, Dict[str, Any]] = {}
+        self._lanes: Dict[str, _Lane] = {}
+
+    def configure(self, enabled: Optional[bool] = None, defaults: Optional[Dict[str, Any]] = None,
+                    overrides: Optional[Dict[str, Dict[str, Any]]] = None):
+        """调整调度参数 (MCPServer 从 [tools.scheduler] / [tools.limits] 配置读取)"""
+        if enabled is not None:
+            self.enabled = enabled
+        if defaults:
+            self.defaults = _merge(self.defaults, defaults)
+        if overrides is not None:
+            self._overrides = {name: dict(values) for name, values in overrides.items()}
+        self._rebuild()
+
+    def register(self, metas):
+        """读取 TOOL_METADATA 中声明的 timeout / max_concurrency / queue_depth (ToolLoader.discover 时调用)"""
+        self._declared = {
+            meta.name: {key: getattr(meta, key, None) for key in ("timeout", "max_concurrency", "queue_depth")}
+            for meta in metas
+        }
+        self._rebuild()
+
+    def limits(self, tool: str) -> ToolLimits:
+        return _merge(_merge(self.defaults, self._declared.get(tool)), self._overrides.get(tool))
+
+    def _rebuild(self):
+        # 调整参数不影响进行中的调用: 已有的 lane 只更新 limits
+        for name, lane in self._lanes.items():
+            lane.limits = self.limits(name)
+
+    def _lane(self, tool: str) -> _Lane:
+        lane = self._lanes.get(tool)
+        if lane is None:
+            lane = self._lanes[tool] = _Lane(self.limits(tool))
+        return lane
+
+    def budget(self, tool: str, timeout: Optional[float] = None) -> Optional[float]:
+        """本次调用的可用时间 (秒): 工具默认值与调用方给出的 timeout 取较小者"""
+        candidates = [t for t in (self.limits(tool).timeout, timeout) if t is not None and t > 0]
+        return min(candidates) if candidates else None
+
+    def expires_at(self, tool: str, timeout: Optional[float] = None) -> Optional[float]:
+        """本次调用的截止时间 (time.monotonic()), 不限时返回 None"""
+        budget = self.budget(tool, timeout) if self.enabled else timeout
+        return None if budget is None else time.monotonic() + budget
+
+    @asynccontextmanager
+    async def deadline(self, tool: str, timeout: Optional[float] = None, expires: Optional[float] = None):
+        """
+        为一次调用设置截止时间, 超时时抛出 ToolTimeoutError
+
+        Args:
+            tool: 工具名
+            timeout: 调用方给出的时间 (秒), 如请求头 X-Tool-Timeout
+            expires: 已确定的截止时间 (expires_at 的返回值); 流式调用的每一步共用同一截止时间
+        """
+        if expires is None:
+            budget = self.budget(tool, timeout) if self.enabled else timeout
+            if budget is None:
+                yield
+                return
+            expires = time.monotonic() + budget
+        else:
+            budget = timeout
+        token = _DEADLINE.set((tool, expires))
+        try:
+            async with asyncio.timeout(max(0.0, expires - time.monotonic())) as scope:
+                yield
+        except TimeoutError:
+            if not scope.expired() and time.monotonic() < expires:
+                # 不是本次调用的截止时间: 工具自身的超时 (如 aiohttp 请求超时)
+                # 或合并执行按自己的截止时间抛出的 ToolTimeoutError, 原样抛出
+                raise
+            self._lane(tool).stats["timeouts"] += 1
+            raise ToolTimeoutError(tool, budget) from None
+        finally:
+            _DEADLINE.reset(token)
+
+    @asynccontextmanager
+    async def shared_deadline(self, tool: str):
+        """
+        合并执行 (SingleFlight) 的截止时间
+
+        执行任务复制的是第一个调用方的 context, 不能沿用其截止时间, 否则 check_deadline()
+        会按第一个调用方的时间中止所有调用方。这里只按工具默认值限时 (各调用方的截止时间
+        都不会超过它), 各调用方仍在自己的 deadline() 中按自己的时间等待。
+        """
+        token = _DEADLINE.set(None)
+        try:
+            async with self.deadline(tool):
+                yield
+        finally:
+            _DEADLINE.reset(token)
+
+    @asynccontextmanager
+    async def slot(self, tool: str):
+        """占用工具的一个执行槽位, 并发已满时排队"""
+        if not self.enabled:
+            yield
+            return
+        lane = self._lane(tool)
+        await lane.acquire(tool)
+        lane.stats["calls"] += 1
+        try:
+            yield
+        finally:
+            lane.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            name: {**lane.stats, "running": lane.running, "waiting": len(lane.waiters),
+                    "max_concurrency": lane.limits.max_concurrency, "timeout": lane.limits.timeout}
+            for name, lane in self._lanes.items()
+        }
+
+
+def _merge(base: ToolLimits, values: Optional[Dict[str, Any]]) -> ToolLimits:
+    if not values:
+        return base
+    return replace(
+        base,
+        **{
+            key: (float(values[key]) if key == "timeout" else int(values[key]))
+            for key in ("timeout", "max_concurrency", "queue_depth")
+            if values.get(key) is not None
+        },
+    )
@@ -0,0 +1,42 @@
+"""
+流式工具的辅助函数
+
+工具在 TOOL_METADATA 中声明 stream_method (异步生成器方法) 后, 可通过 ToolLoader.stream()
+与 POST /tools/{tool_name}/stream 逐批返回结果, 调用方不必等待完整结果。
+"""
+
+import asyncio
+from itertools import islice
+from typing import Any, AsyncIterator, Callable, Iterator, List
+
+
+# 一批的默认条目数
+BATCH_SIZE = 200
+
+
+async def iterate_in_thread(factory: Callable[[], Iterator[Any]], batch_size: int = BATCH_SIZE) -> AsyncIterator[List[Any]]:
+    """
+    在线程中运行同步生成器, 按批返回 (每批一次线程切换)
+
+    线程会复制当前 contextvar, 生成器中的 check_deadline() 同样有效。
+
+    Args:
+        factory: 创建同步迭代器的函数 (在线程中调用)
+        batch_size: 每批条目数
+    """
+    iterator = await asyncio.to_thread(factory)
+    try:
+        while True:
+            batch = await asyncio.to_thread(lambda: list(islice(iterator, batch_size)))
+            if not batch:
+                return
+            yield batch
+    finally:
+        # 调用方提前结束 (客户端断开) 时关闭生成器, 释放目录句柄等资源
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            try:
+                close()
+            except ValueError:
+                # 超时后线程仍在执行该生成器, 由其中的 check_deadline() 自行结束
+                pass
@@ -18,6 +18,12 @@ TOOL_METADATA = [
         "class_name": "WebTool",
         "method": "fetch",
         "async_method": True,
+        "cacheable": True,
+        "coalesce": True,
+        "timeout": 45,
+        "max_concurrency": 8,
+        "queue_depth": 32,
+        "ttl": 120,
     },
     {
         "name": "web_check_status",
@@ -34,6 +40,12 @@ TOOL_METADATA = [
         "class_name": "WebTool",
         "method": "check_status",
         "async_method": True,
+        "cacheable": True,
+        "coalesce": True,
+        "timeout": 45,
+        "max_concurrency": 8,
+        "queue_depth": 32,
+        "ttl": 60,
     },
     {
         "name": "web_extract_elements",
@@ -72,6 +84,10 @@ TOOL_METADATA = [
         "class_name": "WebTool",
         "method": "extract_elements",
         "async_method": True,
+        "coalesce": True,
+        "timeout": 45,
+        "max_concurrency": 8,
+        "queue_depth": 32,
     },
 ]
 
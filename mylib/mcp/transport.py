@@ -0,0 +1,244 @@
+"""
+ToolTransport - Agent 调用 MCP 工具的传输层
+
+- inprocess: 同进程直接调用 ToolLoader, 无 HTTP / JSON 往返
+- uds: 通过 Unix domain socket 访问同机的 MCP Server
+- http: 通过 TCP 访问 MCP Server (带连接池的 httpx 异步客户端)
+
+三种传输的 call() 返回相同结构的 ToolResponse 字典。
+"""
+
+import asyncio
+import threading
+from weakref import WeakKeyDictionary
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+from .encoding import loads
+
+
+class ToolTransport:
+    """传输层接口"""
+
+    kind = ""
+
+    async def call(self, name: str, arguments: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        调用工具
+
+        Args:
+            name: 工具名
+            arguments: 工具参数
+            timeout: 本次调用的截止时间 (秒)
+
+        Returns:
+            ToolResponse 字典 {"result", "success", "error", "error_type"}
+        """
+        raise NotImplementedError
+
+    def stream(self, name: str, arguments: Dict[str, Any], timeout: Optional[float] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        流式调用工具, 逐个产出事件 {"event": "data" / "error" / "end", ...} (见 dispatch.stream_tool_events)
+        """
+        raise NotImplementedError
+
+    async def list_tools(self) -> List[Dict[str, Any]]:
+        """工具列表 [{"name", "description", "parameters"}, ...]"""
+        raise NotImplementedError
+
+    async def aclose(self):
+        """释放当前事件循环上的连接"""
+
+
+class InProcessTransport(ToolTransport):
+    """同进程调用, 结果对象直接返回, 不经过序列化"""
+
+    kind = "inprocess"
+
+    def __init__(self, loader=None):
+        # 按需导入: 只使用 HTTP 传输时不加载工具模块
+        from .tools import get_tool_loader
+        self.loader = loader or get_tool_loader()
+
+    async def call(self, name: str, arguments: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        from .dispatch import dispatch_tool_call
+        _, body = await dispatch_tool_call(name, arguments, timeout, self.loader)
+        return body
+
+    async def stream(self, name: str, arguments: Dict[str, Any], timeout: Optional[float] = None) -> AsyncIterator[Dict[str, Any]]:
+        from .dispatch import stream_tool_events
+        async for event in stream_tool_events(name, arguments, timeout, self.loader):
+            yield event
+
+    async def list_tools(self) -> List[Dict[str, Any]]:
+        return self.loader.get_tools_list()
+
+
+class HttpTransport(ToolTransport):
+    """
+    HTTP 传输
+
+    每个事件循环持有一个带连接池的 httpx.AsyncClient (keep-alive), 不再每次调用新建连接;
+    响应体只解析一次 (orjson 可用时使用), 服务端按 Accept-Encoding 压缩的响应由 httpx 解压。
+    504 / 429 的响应体同样是 ToolResponse, 直接返回
+    """
+
+    kind = "http"
+
+    # 客户端等待时间比服务端截止时间多留的余量 (秒), 让服务端先超时并返回 504
+    TIMEOUT_MARGIN = 5.0
+
+    def __init__(self, base_url: str, timeout: float = 60.0, max_connections: int = 20):
+        """
+        Args:
+            base_url: MCP Server 地址, 如 http://127.0.0.1:8080
+            timeout: 默认截止时间 (秒)
+            max_connections: 连接池最大连接数
+        """
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self._limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        # AsyncClient 绑定到创建它的事件循环, 每个事件循环各持有一个
+        self._clients: "WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = WeakKeyDictionary()
+
+    def _create_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(base_url=self.base_url, limits=self._limits, timeout=self.timeout + self.TIMEOUT_MARGIN)
+
+    def _get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = self._clients[loop] = self._create_client()
+        return client
+
+    async def call(self, name: str, arguments: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        timeout = timeout or self.timeout
+        response = await self._get_client().post(
+            f"/tools/{name}/call",
+            json=arguments,
+            headers={"X-Tool-Timeout": str(timeout)},
+            timeout=timeout + self.TIMEOUT_MARGIN,
+        )
+        if response.status_code in (200, 429, 504):
+            return loads(response.content)
+        return {"result": None, "success": False, "error": f"HTTP Error {response.status_code}: {response.text}",
+                "error_type": None}
+
+    async def stream(self, name: str, arguments: Dict[str, Any], timeout: Optional[float] = None) -> AsyncIterator[Dict[str, Any]]:
+        timeout = timeout or self.timeout
+        async with self._get_client().stream(
+            "POST",
+            f"/tools/{name}/stream",
+            json=arguments,
+            headers={"X-Tool-Timeout": str(timeout), "Accept": "application/x-ndjson"},
+            timeout=timeout + self.TIMEOUT_MARGIN,
+        ) as response:
+            if response.status_code != 200:
+                body = await response.aread()
+                error = loads(body) if response.status_code in (429, 504) else {}
+                yield {"event": "error", "error": error.get("error") or f"HTTP Error {response.status_code}",
+                        "error_type": error.get("error_type")}
+                return
+            async for line in response.aiter_lines():
+                if line:
+                    yield loads(line)
+
+    async def list_tools(self) -> List[Dict[str, Any]]:
+        response = await self._get_client().get("/tools", timeout=5.0)
+        response.raise_for_status()
+        return response.json()["tools"]
+
+    async def aclose(self):
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+class UnixSocketTransport(HttpTransport):
+    """通过 Unix domain socket 访问同机的 MCP Server (服务端需配置 [fastapi] uds)"""
+
+    kind = "uds"
+
+    def __init__(self, path: str, timeout: float = 60.0, max_connections: int = 20):
+        """
+        Args:
+            path: socket 文件路径
+            timeout: 默认截止时间 (秒)
+            max_connections: 连接池最大连接数
+        """
+        super().__init__("http://mcp", timeout, max_connections)
+        self.path = path
+
+    def _create_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            transport=httpx.AsyncHTTPTransport(uds=self.path, limits=self._limits),
+            timeout=self.timeout + self.TIMEOUT_MARGIN,
+        )
+
+
+_TRANSPORTS = {
+    "inprocess": InProcessTransport,
+    "uds": UnixSocketTransport,
+    "http": HttpTransport,
+}
+
+_instances: Dict[Tuple, ToolTransport] = {}
+_instances_lock = threading.Lock()
+
+
+def get_tool_transport(kind: str = "http", url: Optional[str] = None, uds: Optional[str] = None,
+                        timeout: float = 60.0) -> ToolTransport:
+    """
+    获取共享的传输层实例 (相同参数返回同一实例, 连接池在多次调用间复用)
+
+    Args:
+        kind: "inprocess" / "uds" / "http"
+        url: http 传输的服务地址
+        uds: uds 传输的 socket 路径
+        timeout: 默认截止时间 (秒)
+
+    Raises:
+        ValueError: 未知的传输类型或缺少地址
+    """
+    kind = (kind or "http").lower()
+    if kind not in _TRANSPORTS:
+        raise ValueError(f"未知的工具传输类型: {kind} (可选 {', '.join(_TRANSPORTS)})")
+    if kind == "http" and not url:
+        raise ValueError("http 传输需要 url")
+    if kind == "uds" and not uds:
+        raise ValueError("uds 传输需要 socket 路径")
+
+    key = (kind, url, uds, timeout)
+    transport = _instances.get(key)
+    if transport is None:
+        with _instances_lock:
+            transport = _instances.get(key)
+            if transport is None:
+                if kind == "inprocess":
+                    transport = InProcessTransport()
+                elif kind == "uds":
+                    transport = UnixSocketTransport(uds, timeout)
+                else:
+                    transport = HttpTransport(url, timeout)
+                _instances[key] = transport
+    return transport
+
+
+def tool_transport_from_config(section, timeout: float = 60.0) -> ToolTransport:
+    """
+    按 llm_config.toml 的 [LLM_CONFIG] 创建传输层
+
+    MCP_TRANSPORT: "inprocess" / "uds" / "http" (默认)
+    MCP_SERVER_UDS: uds 传输的 socket 路径
+    MCP_SERVER_HOST / MCP_SERVER_PORT: http 传输的地址
+    """
+    kind = str(getattr(section, "MCP_TRANSPORT", "http") or "http")
+    uds = getattr(section, "MCP_SERVER_UDS", None)
+    host = str(getattr(section, "MCP_SERVER_HOST", "127.0.0.1"))
+    port = str(getattr(section, "MCP_SERVER_PORT", 8080))
+    # 0.0.0.0 是监听地址, 作为目标地址时改为本机
+    if host == "0.0.0.0":
+        host = "127.0.0.1"
+    return get_tool_transport(kind, url=f"http://{host}:{port}", uds=str(uds) if uds else None, timeout=timeout)
@@ -0,0 +1,157 @@
+"""
+file_search 内容搜索测试
+
+在临时目录中构造文件, 覆盖行首 / 行尾锚点、截断标志、忽略大小写、
+非 ASCII 字符、二进制与大小过滤、上下文行等行为。
+"""
+
+import os
+import sys
+import asyncio
+import tempfile
+from pathlib import Path
+
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+from mylib.kit import Loutput
+from mylib.mcp.tools.file_tool import FileTool
+from mylib.mcp.tools.file_tool.utils import search_files
+
+
+lo = Loutput()
+
+test_results = {
+    "passed": 0,
+    "failed": 0,
+    "errors": []
+}
+
+def test_section(title: str):
+    """测试章节标题"""
+    lo.lput(f"\n{'='*60}", font_color="cyan")
+    lo.lput(f"  {title}", font_color="cyan_high")
+    lo.lput(f"{'='*60}", font_color="cyan")
+
+def test_case(name: str, success: bool, message: str = ""):
+    """记录测试用例结果"""
+    if success:
+        test_results["passed"] += 1
+        lo.lput(f"✓ {name}", font_color="green")
+    else:
+        test_results["failed"] += 1
+        test_results["errors"].append(name)
+        lo.lput(f"✗ {name}", font_color="red")
+        if message:
+            lo.lput(f"  错误: {message}", font_color="red")
+
+def lines(result):
+    return [(m["path"], m["line"]) for m in result["matches"]]
+
+
+tmp = tempfile.TemporaryDirectory()
+root = Path(tmp.name)
+(root / "sub").mkdir()
+(root / "code.py").write_text(
+    "import os\n"
+    "def alpha():\n"
+    "    return call(1)\n"
+    "def beta():\n"
+    "    pass\n",
+    encoding="utf-8",
+)
+(root / "notes.txt").write_text("错误: 磁盘已满\n警告: 内存不足\nÄrger und ärger\n", encoding="utf-8")
+(root / "sub" / "more.py").write_text("def gamma(): pass\n", encoding="utf-8")
+(root / "blob.bin").write_bytes(b"def \x00\x01\x02 def\n")
+(root / "big.txt").write_text("def " * 1000 + "\n", encoding="utf-8")
+
+
+# ============================================================================
+test_section("1. 行首 / 行尾锚点")
+
+r = search_files(root, r"^def ", include=["*.py"])
+test_case("^def 匹配每个行首", lines(r) == [("code.py", 2), ("code.py", 4), ("sub/more.py", 1)], str(lines(r)))
+
+r = search_files(root, r"\)$", include=["*.py"])
+test_case("\\)$ 匹配行尾", lines(r) == [("code.py", 3)], str(lines(r)))
+
+r = search_files(root, "", include=["code.py"])
+test_case("空模式不产生末尾换行之后的幻影行", [m["line"] for m in r["matches"]] == [1, 2, 3, 4, 5], str(lines(r)))
+
+
+# ============================================================================
+test_section("2. 截断")
+
+r = search_files(root, r"^def ", include=["*.py"], max_results=3)
+test_case("恰好 max_results 个匹配时 truncated 为 False", r["total"] == 3 and not r["truncated"], str(r))
+
+r = search_files(root, r"^def ", include=["*.py"], max_results=2)
+test_case("超过 max_results 时 truncated 为 True", r["total"] == 2 and r["truncated"], str(r))
+test_case("截断时返回遍历顺序上的前 max_results 个", lines(r) == [("code.py", 2), ("code.py", 4)], str(lines(r)))
+
+
+# ============================================================================
+test_section("3. 忽略大小写与非 ASCII")
+
+r = search_files(root, "DEF BETA", include=["*.py"], ignore_case=True)
+test_case("ignore_case 匹配 ASCII", lines(r) == [("code.py", 4)], str(lines(r)))
+
+r = search_files(root, "ÄRGER UND ÄRGER", include=["*.txt"], ignore_case=True)
+test_case("ignore_case 匹配非 ASCII 字母", lines(r) == [("notes.txt", 3)], str(lines(r)))
+
+r = search_files(root, "^[错警].: ", include=["*.txt"])
+test_case("字符类与 . 按字符匹配中文", lines(r) == [("notes.txt", 1), ("notes.txt", 2)], str(lines(r)))
+
+r = search_files(root, "内存", literal=True)
+test_case("字面量搜索中文", lines(r) == [("notes.txt", 2)], str(lines(r)))
+
+
+# ============================================================================
+test_section("4. 二进制与大小过滤")
+
+r = search_files(root, "def ")
+test_case("跳过含 NUL 字节的二进制文件", "blob.bin" not in {m["path"] for m in r["matches"]}, str(lines(r)))
+test_case("默认大小上限内的文件被搜索", "big.txt" in {m["path"] for m in r["matches"]}, str(lines(r)))
+
+r = search_files(root, "def ", max_file_size=1024)
+test_case("超过 max_file_size 的文件跳过", "big.txt" not in {m["path"] for m in r["matches"]}, str(lines(r)))
+
+
+# ============================================================================
+test_section("5. 上下文与错误")
+
+r = search_files(root, "return", context_lines=1)
+match = r["matches"][0] if r["matches"] else {}
+test_case(
+    "context_lines 返回前后行",
+    match.get("before") == ["def alpha():"] and match.get("after") == ["def beta():"],
+    str(match),
+)
+
+try:
+    search_files(root, "call(")
+    test_case("无效正则抛出 ValueError", False, "未抛出异常")
+except ValueError:
+    test_case("无效正则抛出 ValueError", True)
+
+tool = FileTool(default_base_path=str(root))
+r = asyncio.run(tool.search(".", "call(", literal=True))
+test_case("FileTool.search 字面量搜索", r["success"] and lines(r) == [("code.py", 3)], str(r))
+r = asyncio.run(tool.search("code.py", "x"))
+test_case("FileTool.search 根路径不是目录时返回错误", not r["success"], str(r))
+
+tmp.cleanup()
+
+
+# ============================================================================
+total_tests = test_results["passed"] + test_results["failed"]
+lo.lput(f"\n总测试数: {total_tests}", font_color="white")
+lo.lput(f"通过: {test_results['passed']}", font_color="green")
+lo.lput(f"失败: {test_results['failed']}", font_color="red" if test_results["failed"] > 0 else "green")
+
+if test_results["failed"] > 0:
+    lo.lput("\n失败的测试:", font_color="red")
+    for error in test_results["errors"]:
+        lo.lput(f"  - {error}", font_color="red")
+    sys.exit(1)
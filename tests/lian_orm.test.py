@@ -14,6 +14,7 @@ SQL ORM 模块完整功能测试与使用教程
 8. 事务处理
 9. 高级查询
 10. 数据导出
+11. 查询构造器 (条件编译与字段校验)
 
 作者: Lian
 创建日期: 2025-11-24
@@ -28,7 +29,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 
 from mylib.kit import Loutput
-from mylib.lian_orm import Sql
+from mylib.lian_orm import Sql, Q
 from mylib.lian_orm.models import Task, TaskStep, ToolCall
 from mylib.lian_orm.models import TasksStatus, TaskStepsStatus, ToolCallsStatus
 
@@ -908,6 +909,122 @@ except Exception as e:
     test_case("无效字段查询", False, str(e))
 
 
+# ============================================================
+# 第十部分: 查询构造器 (编译与字段校验)
+# ============================================================
+test_section("第十部分: 查询构造器 (编译与字段校验)")
+
+lo.lput("\n【测试 10.1】None 编译为 IS NULL", font_color="yellow")
+lo.lput("说明: 等值条件的值为 None 时编译为 IS NULL / IS NOT NULL, 而不是 = NULL", font_color="white")
+lo.lput("代码: Q(description=None).compile()", font_color="gray")
+
+try:
+    is_null = Q(description=None).compile()
+    not_null = Q(description__ne=None).compile()
+    isnull_lookup = Q(description__isnull=False).compile()
+    test_case(
+        "None 编译为 IS NULL",
+        is_null == ("description IS NULL", [])
+        and not_null == ("description IS NOT NULL", [])
+        and isnull_lookup == ("description IS NOT NULL", []),
+        f"{is_null} / {not_null} / {isnull_lookup}"
+    )
+except Exception as e:
+    test_case("None 编译为 IS NULL", False, str(e))
+
+lo.lput("\n【测试 10.2】空列表 IN", font_color="yellow")
+lo.lput("说明: IN () 恒假编译为 FALSE, NOT IN () 恒真编译为 TRUE, 不生成非法 SQL", font_color="white")
+lo.lput("代码: Q(id__in=[]).compile()", font_color="gray")
+
+try:
+    empty_in = Q(id__in=[]).compile()
+    empty_not_in = Q(id__not_in=[]).compile()
+    test_case(
+        "空列表 IN 编译为 FALSE",
+        empty_in == ("FALSE", []) and empty_not_in == ("TRUE", []),
+        f"{empty_in} / {empty_not_in}"
+    )
+    count = sql.tasks.count(id__in=[])
+    test_case("空列表 IN 查询不报错", count == 0, f"count = {count}")
+except Exception as e:
+    test_case("空列表 IN", False, str(e))
+
+lo.lput("\n【测试 10.3】IN 列表与枚举参数", font_color="yellow")
+lo.lput("说明: 列表作为一个数组参数传入 (= ANY(%s)), 枚举转为其值", font_color="white")
+lo.lput("代码: Q(id__in=(1, 2, 3), status=TasksStatus.PENDING).compile()", font_color="gray")
+
+try:
+    compiled = Q(id__in=(1, 2, 3), status=TasksStatus.PENDING).compile()
+    test_case(
+        "IN 列表与枚举参数",
+        compiled == ("(id = ANY(%s) AND status = %s)", [[1, 2, 3], "pending"]),
+        str(compiled)
+    )
+except Exception as e:
+    test_case("IN 列表与枚举参数", False, str(e))
+
+lo.lput("\n【测试 10.4】条件组合", font_color="yellow")
+lo.lput("说明: Q 之间用 & | ~ 组合, 值全部以参数传递", font_color="white")
+lo.lput("代码: (Q(status='pending') | Q(status='running')) & ~Q(title__contains='50%')", font_color="gray")
+
+try:
+    compiled = ((Q(status="pending") | Q(status="running")) & ~Q(title__contains="50%")).compile()
+    test_case(
+        "条件组合",
+        compiled == ("((status = %s OR status = %s) AND NOT (title ILIKE %s))", ["pending", "running", "%50\\%%"]),
+        str(compiled)
+    )
+except Exception as e:
+    test_case("条件组合", False, str(e))
+
+lo.lput("\n【测试 10.5】Query 编译", font_color="yellow")
+lo.lput("说明: where / order_by / limit / offset 编译为一条参数化 SQL, 每步返回新的 Query", font_color="white")
+lo.lput("代码: sql.tasks.query().where(user_id='u1', title=None).order_by('-created_at').limit(20).offset(40)", font_color="gray")
+
+try:
+    base = sql.tasks.query().where(user_id="u1", title=None)
+    compiled = base.order_by("-created_at").limit(20).offset(40).compile()
+    test_case(
+        "Query 编译",
+        compiled == ("SELECT * FROM tasks WHERE (user_id = %s AND title IS NULL) ORDER BY created_at DESC LIMIT %s OFFSET %s",
+                        ["u1", 20, 40]),
+        str(compiled)
+    )
+    test_case("基础查询不被修改", base.compile() == ("SELECT * FROM tasks WHERE (user_id = %s AND title IS NULL)", ["u1"]),
+                str(base.compile()))
+except Exception as e:
+    test_case("Query 编译", False, str(e))
+
+lo.lput("\n【测试 10.6】字段校验", font_color="yellow")
+lo.lput("说明: where / order_by / select / Q 中的字段名都按表元数据校验, 无效字段抛出 ValueError", font_color="white")
+lo.lput("代码: sql.tasks.query().order_by('--id')  # 会抛出 ValueError (-- 会把其后的 LIMIT / OFFSET 变成注释)", font_color="gray")
+
+invalid_calls = {
+    "where": lambda: sql.tasks.query().where(no_such_field=1),
+    "where 带后缀": lambda: sql.tasks.query().where(no_such_field__gte=1),
+    "Q 嵌套": lambda: sql.tasks.query().where(Q(id=1) | ~Q(no_such_field=None)),
+    "order_by": lambda: sql.tasks.query().order_by("-id; DROP TABLE tasks"),
+    "order_by 多个 -": lambda: sql.tasks.query().order_by("--id"),
+    "order_by 三个 -": lambda: sql.tasks.query().order_by("---id"),
+    "select": lambda: sql.tasks.query().select("id", "password"),
+    "count": lambda: sql.tasks.count(no_such_field=1),
+}
+for label, call in invalid_calls.items():
+    try:
+        call()
+        test_case(f"字段校验: {label}", False, "未抛出 ValueError")
+    except ValueError:
+        test_case(f"字段校验: {label}", True)
+    except Exception as e:
+        test_case(f"字段校验: {label}", False, f"{type(e).__name__}: {e}")
+
+try:
+    sql.tasks.query().where(id__gte=1, status__in=["pending"]).order_by("-id").select("id", "status")
+    test_case("有效字段与后缀通过校验", True)
+except Exception as e:
+    test_case("有效字段与后缀通过校验", False, str(e))
+
+
 # ============================================================
 # 清理测试数据
 # ============================================================
@@ -0,0 +1,82 @@
+# 启动耗时基准: 用 python -X importtime 记录 main.py 各模式的导入开销
+# 用法: python tests/startup_importtime.py [--top 15] [--output importtime.json]
+import base
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+
+# 每个模式在 main.py 中实际执行的导入 (不启动服务)
+MODES = {
+    "server": "import main; from mylib.mcp import MCPServer; MCPServer()",
+    "client": "import main; from mylib.llm import llm_client",
+    "web": "import main",
+    "agent": "import main",
+}
+
+
+def measure(mode: str, code: str) -> dict:
+    """在子进程中运行一次冷启动导入，解析 importtime 输出"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=base.root,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": base.root},
+    )
+
+    modules = []
+    for line in proc.stderr.splitlines():
+        # 格式: "import time:  self [us] | cumulative | imported package"，包名前的缩进表示嵌套层级
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        name = parts[2].rstrip()
+        modules.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            "self_us": int(parts[0]),
+            "cumulative_us": int(parts[1]),
+        })
+
+    top_level = [m for m in modules if m["depth"] == 0]
+    return {
+        "mode": mode,
+        "ok": proc.returncode == 0,
+        "error": proc.stderr.strip().splitlines()[-1] if proc.returncode != 0 and proc.stderr.strip() else None,
+        "total_ms": sum(m["cumulative_us"] for m in top_level) / 1000,
+        "modules": modules,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="main.py 各模式冷启动导入耗时")
+    parser.add_argument("--top", type=int, default=10, help="每个模式展示最慢的模块数")
+    parser.add_argument("--output", help="将完整结果写入 JSON 文件")
+    parser.add_argument("modes", nargs="*", default=list(MODES), help="要测量的模式")
+    args = parser.parse_args()
+
+    results = []
+    for mode in args.modes:
+        result = measure(mode, MODES[mode])
+        results.append(result)
+
+        status = "" if result["ok"] else f"  (失败: {result['error']})"
+        print(f"=== {mode}: {result['total_ms']:.1f} ms{status}")
+        slowest = sorted(result["modules"], key=lambda m: m["cumulative_us"], reverse=True)[:args.top]
+        for m in slowest:
+            print(f"    {m['cumulative_us'] / 1000:8.1f} ms  {m['module']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入 {args.output}")
+
+
+if __name__ == "__main__":
+    main()